@@ -13,6 +13,8 @@ from app.db.models import User
 from app.security.jwt import ALGORITHM, SECRET_KEY, create_access_token, create_refresh_token
 from app.security.passwords import get_password_hash, verify_user_password
 from app.utility.SMTP import send_otp_to_email
+from app.utility.lookups import lookup_table
+from app.utility.pagination import paginate
 from app.utility.utc import CAMBODIA_TZ, get_current_cambodia_time
 
 from app.utility.telegramAlert import send_telegram_message
@@ -53,16 +55,16 @@ def user_to_response(user: User) -> UserResponse:
         created_at=user.created_at.isoformat(),  # Convert to string
     )
 
-# Function to get all users
-def get_all_users(db: Session):
-    users = db.query(User).all()
-    if not users:
+# Function to get all users (keyset-paginated by ID when a limit or cursor is given)
+def get_all_users(db: Session, limit: int = None, cursor: str = None):
+    users, next_cursor = paginate(db.query(User), [(User.id, False)], cursor=cursor, limit=limit)
+    if not users and cursor is None:
         raise HTTPException(status_code=404, detail="No users found")
 
     user_responses = []
     for user in users:
-        role_name = user.role.name
-        gender_name = user.gender.name if user.gender else None
+        role_name = lookup_table(Role).name_of(db, user.role_id)
+        gender_name = lookup_table(Gender).name_of(db, user.gender_id)
 
         user_response = UserResponse(
             id=user.id,
@@ -78,7 +80,7 @@ def get_all_users(db: Session):
         )
         user_responses.append(user_response)
 
-    return user_responses
+    return user_responses, next_cursor
 
 # Function to get a single user by ID
 def get_user(db: Session, user_id: int):
@@ -90,8 +92,8 @@ def get_user(db: Session, user_id: int):
         raise HTTPException(status_code=404, detail="User not found")
 
     # Extract role and gender names (handle None cases)
-    role_name = user.role.name
-    gender_name = user.gender.name if user.gender else None
+    role_name = lookup_table(Role).name_of(db, user.role_id)
+    gender_name = lookup_table(Gender).name_of(db, user.gender_id)
 
     # Create the UserResponse model
     user_response = UserResponse(
@@ -172,8 +174,8 @@ def register_user(user_data, db: Session):
         )
 
     # Query for the Role and Gender by ID
-    role = db.query(Role).filter(Role.id == user_data.role).first()
-    gender = db.query(Gender).filter(Gender.id == user_data.gender).first() if user_data.gender else None
+    role = lookup_table(Role).get(db, user_data.role)
+    gender = lookup_table(Gender).get(db, user_data.gender) if user_data.gender else None
 
     if not role:
         raise HTTPException(status_code=404, detail="Role not found")
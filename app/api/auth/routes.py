@@ -2,10 +2,11 @@
 
 from typing import Dict
 from app.security.jwt import get_access_token
-from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 from app.api.auth.controllers import change_email, forgot_password, get_all_users, get_current_user, get_user, register_user, login_user, request_otp, reset_password, user_to_response, verify_otp
-from app.db.config import get_db
+from app.db.config import get_db, get_replica_db
+from app.utility.pagination import set_next_cursor
 from app.schemas.auth import ChangeEmailRequest, ForgotPasswordRequest, LoginResponse, OTPVerifyRequest, RegisterUserRequest, LoginRequest, RegisterUserResponse, RequestOTPRequest, ResetPasswordRequest, UserResponse, UserWrapper
 
 
@@ -13,7 +14,7 @@ auth = APIRouter()
 
 # Route to get the current logged-in user
 @auth.get("/current-user", response_model=UserResponse)
-def get_current_user_route(db: Session = Depends(get_db), token: str = Depends(get_access_token)):
+def get_current_user_route(db: Session = Depends(get_replica_db), token: str = Depends(get_access_token)):
     # Get the current user by passing the token and the DB session
     user = get_current_user(db=db, token=token)
     
@@ -22,19 +23,26 @@ def get_current_user_route(db: Session = Depends(get_db), token: str = Depends(g
 
 # Route for fetching all users
 @auth.get("/users", response_model=list[UserResponse])
-def get_all_users_route(db: Session = Depends(get_db)):
-    return get_all_users(db=db)
+def get_all_users_route(
+    response: Response,
+    limit: int = Query(None, ge=1),
+    cursor: str = Query(None),
+    db: Session = Depends(get_replica_db)
+):
+    users, next_cursor = get_all_users(db=db, limit=limit, cursor=cursor)
+    set_next_cursor(response, next_cursor)
+    return users
 
 # Route for fetching a user by ID
 
 @auth.get("/users/{user_id}", response_model=Dict[str, UserResponse])
-def get_user_endpoint(user_id: int, db: Session = Depends(get_db)):
+def get_user_endpoint(user_id: int, db: Session = Depends(get_replica_db)):
     return get_user(db, user_id)
 
 
 # Route for fetching a user by ID
 @auth.get("/users/{user_id}", response_model=UserWrapper)
-def get_user_details(user_id: int, db: Session = Depends(get_db)):
+def get_user_details(user_id: int, db: Session = Depends(get_replica_db)):
     # Retrieve the user using your function
     user_response = get_user(db=db, user_id=user_id)
     # Return the response wrapped in the 'user' key
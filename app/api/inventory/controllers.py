@@ -1,16 +1,76 @@
-from typing import List
+import json
+import os
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from typing import AsyncIterator, List, Optional, Tuple
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
-from app.db.models.utility import StockStatus
-from app.db.models.inventory import StockItem
-from app.schemas.inventory import Product, StockItemResponse, StockItemUpdate
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy import func, insert as sql_insert, select, update
+from sqlalchemy.orm import Session, load_only
+from app.api.inventory.ledger import MOVEMENT_ADJUSTMENT, MOVEMENT_RECEIPT, MOVEMENT_RETURN, MOVEMENT_SALE, record_movement, record_movements, stock_level
+from app.api.inventory.low_stock import IS_LOW_STOCK
+from app.api.products.cache import product_cache
+from app.api.products.catalog import refresh_catalog_for_stock_items, set_catalog_stock_quantity
+from app.api.products.helper import iter_import_records
+from app.db.config import SessionLocal
+from app.db.models.utility import Category, StockStatus, Supplier, Unit
+from app.db.models.inventory import StockItem, StockMovement
+from app.db.upsert import dialect_insert
+from app.schemas.inventory import Product, StockAllocationLine, StockAllocationRequest, StockAllocationResponse, StockBatchQuantityResponse, StockBulkRow, StockItemResponse, StockItemUpdate, StockLevelResponse, StockMovementResponse, StockQuantityResponse
 import logging
 
+from app.utility.etag import collection_version
+from app.utility.export import EXPORT_BATCH_SIZE
+from app.utility.fields import parse_fields
+from app.utility.lookups import lookup_table
+from app.utility.pagination import paginate
 from app.utility.telegramAlert import send_telegram_message
+from app.utility.utc import CAMBODIA_TZ, get_current_cambodia_time
 
 
 logger = logging.getLogger(__name__)
 
+# Rows per committed batch for bulk stock upserts
+STOCK_IMPORT_BATCH_SIZE = int(os.getenv("STOCK_IMPORT_BATCH_SIZE", 500))
+
+# StockBulkRow field -> StockItem column it sets (quantity and itemId are handled separately)
+STOCK_BULK_COLUMNS = {
+    "itemName": "item_name",
+    "categoryId": "category_id",
+    "unitId": "unit_id",
+    "statusId": "stock_status_id",
+    "supplierId": "supplier_id",
+    "purchaseDate": "purchase_date",
+    "purchasePrice": "purchase_price",
+    "expiryDate": "expiry_date",
+    "barcode": "barcode",
+    "remark": "remark",
+    "restockLevel": "restock_level",
+    "image": "image",
+}
+
+# StockItemResponse field -> (StockItem column it is read from, lookup table resolving the id to a name)
+STOCK_ITEM_FIELDS = {
+    "id": (StockItem.id, None),
+    "item_id": (StockItem.itemId, None),
+    "item_name": (StockItem.item_name, None),
+    "category_name": (StockItem.category_id, Category),
+    "unit_name": (StockItem.unit_id, Unit),
+    "quantity_added": (StockItem.quantity_added, None),
+    "quantity_in_stock": (StockItem.quantity_in_stock, None),
+    "purchase_date": (StockItem.purchase_date, None),
+    "purchase_price": (StockItem.purchase_price, None),
+    "expiry_date": (StockItem.expiry_date, None),
+    "barcode": (StockItem.barcode, None),
+    "remark": (StockItem.remark, None),
+    "restock_level": (StockItem.restock_level, None),
+    "supplier_name": (StockItem.supplier_id, Supplier),
+    "status": (StockItem.stock_status_id, StockStatus),
+    "timestamp": (StockItem.created_at, None),
+    "image": (StockItem.image, None),
+}
+
 def create_stock_item(db: Session, product: Product) -> StockItemResponse:
     """Create a new stock item."""
     stock_item_data = product.dict(exclude_unset=True)
@@ -26,7 +86,7 @@ def create_stock_item(db: Session, product: Product) -> StockItemResponse:
         send_telegram_message(f"🚨 Error: Duplicate itemId {product.itemId} - This itemId already exists.")
         raise HTTPException(status_code=400, detail="Duplicate itemId: This itemId already exists.")
 
-    stock_status = db.query(StockStatus).filter(StockStatus.id == stock_status_id).first()
+    stock_status = lookup_table(StockStatus).get(db, stock_status_id)
     if not stock_status:
         logger.error("Invalid statusId: %s", stock_status_id)
         send_telegram_message(f"🚨 Error: Invalid statusId {stock_status_id} when creating stock item.")
@@ -52,6 +112,10 @@ def create_stock_item(db: Session, product: Product) -> StockItemResponse:
 
     try:
         db.add(db_stock_item)
+        db.flush()
+        record_movement(db, db_stock_item.id, MOVEMENT_RECEIPT, db_stock_item.quantity_in_stock or 0)
+        # Products may already reference this itemId
+        refresh_catalog_for_stock_items(db, [db_stock_item.itemId])
         db.commit()
         db.refresh(db_stock_item)
         logger.info("Created stock item: %s", db_stock_item.itemId)
@@ -66,10 +130,10 @@ def create_stock_item(db: Session, product: Product) -> StockItemResponse:
 
 def _generate_stock_item_response(db_stock_item: StockItem, db: Session) -> StockItemResponse:
     """Generate a response model for the StockItem."""
-    category = db_stock_item.category
-    unit = db_stock_item.unit
-    supplier = db_stock_item.supplier
-    stock_status = db_stock_item.stock_status
+    category = lookup_table(Category).get(db, db_stock_item.category_id)
+    unit = lookup_table(Unit).get(db, db_stock_item.unit_id)
+    supplier = lookup_table(Supplier).get(db, db_stock_item.supplier_id)
+    stock_status = lookup_table(StockStatus).get(db, db_stock_item.stock_status_id)
 
     return StockItemResponse(
         id=db_stock_item.id,
@@ -79,9 +143,10 @@ def _generate_stock_item_response(db_stock_item: StockItem, db: Session) -> Stoc
         unit_name=unit.name if unit else "Unknown",
         quantity_added=db_stock_item.quantity_added,
         quantity_in_stock=db_stock_item.quantity_in_stock,
-        purchase_date=db_stock_item.purchase_date,
+        # Dates are stored as datetimes; rows written with the column default carry a time of day
+        purchase_date=db_stock_item.purchase_date.date() if db_stock_item.purchase_date else None,
         purchase_price=db_stock_item.purchase_price,
-        expiry_date=db_stock_item.expiry_date,
+        expiry_date=db_stock_item.expiry_date.date() if db_stock_item.expiry_date else None,
         barcode=db_stock_item.barcode,
         remark=db_stock_item.remark,
         restock_level=db_stock_item.restock_level,
@@ -101,11 +166,21 @@ def update_stock_item(db: Session, item_id: int, stock_item: StockItemUpdate) ->
         raise HTTPException(status_code=404, detail="Stock item not found.")
 
     update_data = stock_item.dict(exclude_unset=True)
+    previous_item_id = db_stock_item.itemId
+    previous_quantity = db_stock_item.quantity_in_stock or 0
     for key, value in update_data.items():
         setattr(db_stock_item, key, value)
+    # Products embedding the stock item (under its old or new itemId) need their copies refreshed
+    item_ids = {previous_item_id, db_stock_item.itemId}
 
     try:
+        db.flush()
+        quantity_change = (db_stock_item.quantity_in_stock or 0) - previous_quantity
+        if quantity_change:
+            record_movement(db, item_id, MOVEMENT_ADJUSTMENT, quantity_change)
+        refresh_catalog_for_stock_items(db, item_ids)
         db.commit()
+        product_cache.invalidate_stock_items(item_ids)
         db.refresh(db_stock_item)
         logger.info("Updated stock item ID: %d", item_id)
     except Exception as e:
@@ -117,10 +192,38 @@ def update_stock_item(db: Session, item_id: int, stock_item: StockItemUpdate) ->
     return _generate_stock_item_response(db_stock_item, db)
 
 
-def get_all_stock_items(db: Session) -> List[StockItemResponse]:
-    """Retrieve all stock items."""
-    stock_items = db.query(StockItem).all()
-    return [_generate_stock_item_response(item, db) for item in stock_items]
+def get_all_stock_items(db: Session, limit: Optional[int] = None, cursor: Optional[str] = None, fields: Optional[str] = None) -> Tuple[list, Optional[str]]:
+    """Retrieve all stock items, keyset-paginated by ID when a limit or cursor is given."""
+    field_names = parse_fields(fields, STOCK_ITEM_FIELDS)
+    query = db.query(StockItem)
+    if field_names:
+        # Load only the columns behind the requested fields
+        query = query.options(load_only(*{STOCK_ITEM_FIELDS[name][0] for name in field_names}))
+    stock_items, next_cursor = paginate(query, [(StockItem.id, False)], cursor=cursor, limit=limit)
+    if field_names:
+        return [_stock_item_fields(item, field_names, db) for item in stock_items], next_cursor
+    return [_generate_stock_item_response(item, db) for item in stock_items], next_cursor
+
+
+def get_low_stock_items(db: Session, limit: Optional[int] = None, cursor: Optional[str] = None) -> Tuple[list, Optional[str]]:
+    """Stock items at or below their restock level, read through the partial low-stock index."""
+    query = db.query(StockItem).filter(IS_LOW_STOCK)
+    stock_items, next_cursor = paginate(query, [(StockItem.id, False)], cursor=cursor, limit=limit)
+    return [_generate_stock_item_response(item, db) for item in stock_items], next_cursor
+
+
+def _stock_item_fields(db_stock_item: StockItem, field_names: List[str], db: Session) -> dict:
+    """Build a sparse stock item dict holding only the requested fields."""
+    item = {}
+    for name in field_names:
+        column, lookup = STOCK_ITEM_FIELDS[name]
+        value = getattr(db_stock_item, column.key)
+        if lookup is not None:
+            value = lookup_table(lookup).name_of(db, value, "Unknown")
+        elif name in ("purchase_date", "expiry_date") and value is not None:
+            value = value.date()
+        item[name] = value
+    return item
 
 
 def get_stock_item(db: Session, item_id: int) -> StockItemResponse:
@@ -134,6 +237,17 @@ def get_stock_item(db: Session, item_id: int) -> StockItemResponse:
     return _generate_stock_item_response(stock_item, db)
 
 
+def get_stock_items_version(db: Session) -> tuple:
+    """Version of the stock item collection, for conditional GETs."""
+    return collection_version(db, StockItem)
+
+
+def get_stock_item_version(db: Session, item_id: int) -> Optional[tuple]:
+    """Version of a single stock item, or None when it does not exist."""
+    updated_at = db.execute(select(StockItem.updated_at).where(StockItem.id == item_id)).first()
+    return (item_id, *updated_at) if updated_at else None
+
+
 def delete_stock_item(db: Session, stock_item_id: int):
     """Delete a stock item by its ID."""
     stock_item = db.query(StockItem).filter(StockItem.id == stock_item_id).first()
@@ -143,8 +257,14 @@ def delete_stock_item(db: Session, stock_item_id: int):
         raise HTTPException(status_code=404, detail="Stock item not found.")
     
     try:
+        item_id = stock_item.itemId
+        if stock_item.quantity_in_stock:
+            record_movement(db, stock_item_id, MOVEMENT_ADJUSTMENT, -stock_item.quantity_in_stock, reference="stock item deleted")
         db.delete(stock_item)
+        db.flush()
+        refresh_catalog_for_stock_items(db, [item_id])
         db.commit()
+        product_cache.invalidate_stock_items([item_id])
         logger.info("Deleted stock item ID: %d", stock_item_id)
         return {"message": "Stock item deleted successfully.", "status": 200}
     except Exception as e:
@@ -167,3 +287,388 @@ def get_stock_status(db: Session, item_id: int):
         "out_of_stock": 1 if stock_item.quantity_in_stock == 0 else 0,
         "status": 200
     }
+
+
+def _change_quantity(db: Session, item_id: int, delta: int) -> Optional[tuple]:
+    """
+    Add `delta` to a stock item's quantity in one conditional UPDATE; returns (itemId, new quantity).
+
+    A decrement only matches while enough stock is left, so concurrent reservations can
+    never oversell, and no row is read and written back. Returns None when nothing matched.
+    """
+    statement = update(StockItem).where(StockItem.id == item_id)
+    if delta < 0:
+        statement = statement.where(StockItem.quantity_in_stock >= -delta)
+    # updated_at moves with it (column onupdate), so ETags of the item and the collection change
+    statement = statement.values(quantity_in_stock=StockItem.quantity_in_stock + delta)
+    if db.get_bind().dialect.update_returning:
+        return db.execute(statement.returning(StockItem.itemId, StockItem.quantity_in_stock)).first()
+    if not db.execute(statement).rowcount:
+        return None
+    return db.execute(select(StockItem.itemId, StockItem.quantity_in_stock).where(StockItem.id == item_id)).first()
+
+
+def _raise_quantity_error(db: Session, item_id: int, quantity: int):
+    """Explain why a quantity change matched no row: unknown item (404) or not enough stock (409)."""
+    available = db.execute(select(StockItem.quantity_in_stock).where(StockItem.id == item_id)).scalar()
+    if available is None:
+        logger.error("Stock item not found for ID: %d", item_id)
+        raise HTTPException(status_code=404, detail=f"Stock item {item_id} not found.")
+    logger.info("Insufficient stock for ID %d: requested %d, available %d", item_id, quantity, available)
+    raise HTTPException(
+        status_code=409,
+        detail=f"Insufficient stock for item {item_id}: requested {quantity}, available {available}.",
+    )
+
+
+def adjust_stock_quantities(db: Session, quantities: dict, reserve: bool, reference: Optional[str] = None) -> List[StockQuantityResponse]:
+    """
+    Reserve (decrement) or release (increment) stock for {stock item ID: quantity}, all or nothing.
+
+    Every change is a single conditional UPDATE in one short transaction; if any item is
+    missing or short, the whole batch is rolled back.
+    """
+    results = []
+    try:
+        # A fixed lock order keeps concurrent multi-item batches from deadlocking
+        for item_id in sorted(quantities):
+            quantity = quantities[item_id]
+            changed = _change_quantity(db, item_id, -quantity if reserve else quantity)
+            if changed is None:
+                _raise_quantity_error(db, item_id, quantity)
+            set_catalog_stock_quantity(db, changed.itemId, changed.quantity_in_stock)
+            results.append(StockQuantityResponse(id=item_id, item_id=changed.itemId, quantity_in_stock=changed.quantity_in_stock))
+        record_movements(
+            db,
+            [(result.id, -quantities[result.id] if reserve else quantities[result.id]) for result in results],
+            MOVEMENT_SALE if reserve else MOVEMENT_RETURN,
+            reference,
+        )
+        db.commit()
+    except HTTPException:
+        db.rollback()
+        raise
+    except Exception as e:
+        db.rollback()
+        logger.error("Error adjusting stock quantities: %s", e)
+        send_telegram_message(f"🚨 Error adjusting stock quantities: {e}")
+        raise HTTPException(status_code=500, detail="Error adjusting stock quantities.")
+
+    product_cache.invalidate_stock_items([result.item_id for result in results])
+    return results
+
+
+def reserve_stock(db: Session, item_id: int, quantity: int) -> StockQuantityResponse:
+    """Atomically take `quantity` units of a stock item; 409 when not enough are left."""
+    return adjust_stock_quantities(db, {item_id: quantity}, reserve=True)[0]
+
+
+def release_stock(db: Session, item_id: int, quantity: int) -> StockQuantityResponse:
+    """Atomically put back `quantity` units of a stock item."""
+    return adjust_stock_quantities(db, {item_id: quantity}, reserve=False)[0]
+
+
+def adjust_stock_batch(db: Session, lines, reserve: bool) -> StockBatchQuantityResponse:
+    """Reserve or release a whole cart; lines for the same item are added up."""
+    quantities = Counter()
+    for line in lines:
+        quantities[line.id] += line.quantity
+    return StockBatchQuantityResponse(items=adjust_stock_quantities(db, quantities, reserve=reserve))
+
+
+# Attempts of a FEFO allocation when its lots are drained by concurrent reservations in between
+STOCK_ALLOCATION_ATTEMPTS = 3
+
+
+def _now() -> datetime:
+    # Stock dates are stored as naive Cambodia time
+    return get_current_cambodia_time().replace(tzinfo=None)
+
+
+def get_expiring_stock_items(db: Session, days: int, include_expired: bool = False, limit: Optional[int] = None, cursor: Optional[str] = None) -> Tuple[list, Optional[str]]:
+    """Stock items expiring within `days` days, soonest first, read through the expiry_date index."""
+    now = _now()
+    query = db.query(StockItem).filter(StockItem.expiry_date <= now + timedelta(days=days))
+    if not include_expired:
+        query = query.filter(StockItem.expiry_date >= now)
+    stock_items, next_cursor = paginate(query, [(StockItem.expiry_date, False), (StockItem.id, False)], cursor=cursor, limit=limit)
+    return [_generate_stock_item_response(item, db) for item in stock_items], next_cursor
+
+
+def _plan_allocation(db: Session, request: StockAllocationRequest) -> dict:
+    """
+    Pick the lots to take from, first expired first out, in one query: {stock item ID: quantity}.
+
+    A running total over the lots in expiry order keeps every lot up to the one that
+    completes the requested quantity; lots without an expiry date come last.
+    """
+    lots = select(StockItem.id, StockItem.quantity_in_stock).where(
+        StockItem.quantity_in_stock > 0,
+        (StockItem.expiry_date >= _now()) | StockItem.expiry_date.is_(None),
+    )
+    if request.item_name is not None:
+        lots = lots.where(StockItem.item_name == request.item_name)
+    else:
+        lots = lots.where(StockItem.category_id == request.category_id)
+    lots = lots.add_columns(
+        func.sum(StockItem.quantity_in_stock).over(
+            order_by=(StockItem.expiry_date.is_(None), StockItem.expiry_date, StockItem.id)
+        ).label("running_total")
+    ).subquery()
+
+    plan = {}
+    remaining = request.quantity
+    rows = db.execute(
+        select(lots.c.id, lots.c.quantity_in_stock)
+        .where(lots.c.running_total - lots.c.quantity_in_stock < request.quantity)
+        .order_by(lots.c.running_total)
+    ).all()
+    for lot_id, available in rows:
+        plan[lot_id] = min(available, remaining)
+        remaining -= plan[lot_id]
+    if remaining > 0:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Insufficient unexpired stock: requested {request.quantity}, available {request.quantity - remaining}.",
+        )
+    return plan
+
+
+def allocate_stock(db: Session, request: StockAllocationRequest) -> StockAllocationResponse:
+    """Reserve a quantity of an item (by name) or category from the lots that expire first, all or nothing."""
+    if (request.item_name is None) == (request.category_id is None):
+        raise HTTPException(status_code=400, detail="Provide exactly one of item_name or category_id.")
+
+    for attempt in range(STOCK_ALLOCATION_ATTEMPTS):
+        plan = _plan_allocation(db, request)
+        try:
+            reserved = adjust_stock_quantities(db, plan, reserve=True, reference="FEFO allocation")
+            break
+        except HTTPException as e:
+            # A concurrent reservation drained a planned lot; plan again from fresh quantities
+            if e.status_code != 409 or attempt == STOCK_ALLOCATION_ATTEMPTS - 1:
+                raise
+
+    expiry_dates = dict(db.execute(select(StockItem.id, StockItem.expiry_date).where(StockItem.id.in_(plan))).all())
+    allocations = [
+        StockAllocationLine(
+            id=result.id,
+            item_id=result.item_id,
+            expiry_date=expiry_dates[result.id].date() if expiry_dates.get(result.id) else None,
+            quantity=plan[result.id],
+            quantity_in_stock=result.quantity_in_stock,
+        )
+        for result in reserved
+    ]
+    # Same order as the plan, by the full expiry timestamp
+    allocations.sort(key=lambda line: (expiry_dates.get(line.id) is None, expiry_dates.get(line.id) or datetime.max, line.id))
+    return StockAllocationResponse(quantity=request.quantity, allocations=allocations)
+
+
+def get_stock_movements(db: Session, item_id: int, limit: Optional[int] = None, cursor: Optional[str] = None) -> Tuple[list, Optional[str]]:
+    """Ledger of a stock item, oldest first, keyset-paginated by movement ID."""
+    query = db.query(StockMovement).filter(StockMovement.stock_item_id == item_id)
+    movements, next_cursor = paginate(query, [(StockMovement.id, False)], cursor=cursor, limit=limit)
+    if not movements and cursor is None:
+        raise HTTPException(status_code=404, detail="No stock movements found.")
+    return [StockMovementResponse.from_orm(movement) for movement in movements], next_cursor
+
+
+def get_stock_level(db: Session, item_id: int, at: Optional[datetime] = None) -> StockLevelResponse:
+    """Quantity of a stock item now or at a past point in time, from the ledger."""
+    if at is not None and at.tzinfo is not None:
+        # Ledger timestamps are naive Cambodia time, like every other column
+        at = at.astimezone(CAMBODIA_TZ).replace(tzinfo=None)
+    return StockLevelResponse(**stock_level(db, item_id, at))
+
+
+# Bulk stock upsert (supplier deliveries: JSON array, CSV or NDJSON, upserted on itemId in batches)
+def load_stock_import_references(db: Session) -> dict:
+    """Pre-load the IDs a StockBulkRow may reference, so rows are validated without queries."""
+    return {
+        "statusId": lookup_table(StockStatus).ids(db),
+        "categoryId": lookup_table(Category).ids(db),
+        "unitId": lookup_table(Unit).ids(db),
+        "supplierId": lookup_table(Supplier).ids(db),
+    }
+
+
+def validate_stock_row(record: dict, references: dict) -> StockBulkRow:
+    """Validate one delivery line; raises ValueError with a readable message."""
+    # Empty CSV cells of optional fields mean "keep the current value"
+    record = {
+        field: value for field, value in record.items()
+        if value != "" or field not in StockBulkRow.model_fields or StockBulkRow.model_fields[field].is_required()
+    }
+    try:
+        row = StockBulkRow(**record)
+    except ValidationError as e:
+        raise ValueError("; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()))
+
+    invalid = [field for field, ids in references.items() if getattr(row, field) is not None and getattr(row, field) not in ids]
+    if invalid:
+        raise ValueError(f"Invalid foreign key references: {', '.join(invalid)}")
+    return row
+
+
+def upsert_stock_batch(db: Session, rows: List[StockBulkRow]) -> dict:
+    """
+    Insert or update (on itemId) a batch of delivery lines and commit it as one transaction.
+
+    Delivered quantities are added to quantity_added and quantity_in_stock; other fields
+    a line leaves out keep the existing item's values (or the column defaults for new items,
+    except purchase_date, which is today's date rather than the current time).
+    """
+    # Lines repeating an itemId add up, later values win
+    merged = {}
+    for row in rows:
+        values = merged.setdefault(row.itemId, {"itemId": row.itemId, "quantity_added": 0, "quantity_in_stock": 0})
+        values.update({STOCK_BULK_COLUMNS[field]: value for field, value in row.dict(exclude_none=True).items() if field in STOCK_BULK_COLUMNS})
+        values["quantity_added"] += row.quantity
+        values["quantity_in_stock"] += row.quantity
+
+    item_ids = list(merged)
+    existing = {item_id for (item_id,) in db.query(StockItem.itemId).filter(StockItem.itemId.in_(item_ids))}
+    now = get_current_cambodia_time()
+    for item_id, values in merged.items():
+        if item_id not in existing:
+            values.setdefault("purchase_date", now.date())
+
+    # One statement per set of columns, since every row of an executemany needs the same keys
+    groups = defaultdict(list)
+    for values in merged.values():
+        groups[tuple(sorted(values))].append(values)
+
+    try:
+        insert = dialect_insert(db, StockItem)
+        for columns, group in groups.items():
+            other_columns = [column for column in columns if column not in ("itemId", "quantity_added", "quantity_in_stock")]
+            if insert is not None:
+                statement = insert.on_conflict_do_update(
+                    index_elements=[StockItem.itemId],
+                    set_={
+                        **{column: insert.excluded[column] for column in other_columns},
+                        "quantity_added": func.coalesce(StockItem.quantity_added, 0) + insert.excluded.quantity_added,
+                        "quantity_in_stock": func.coalesce(StockItem.quantity_in_stock, 0) + insert.excluded.quantity_in_stock,
+                        "updated_at": now,
+                    },
+                )
+                db.execute(statement, group)
+                continue
+            for values in group:
+                if values["itemId"] in existing:
+                    db.execute(
+                        update(StockItem)
+                        .where(StockItem.itemId == values["itemId"])
+                        .values(
+                            **{column: values[column] for column in other_columns},
+                            quantity_added=func.coalesce(StockItem.quantity_added, 0) + values["quantity_added"],
+                            quantity_in_stock=func.coalesce(StockItem.quantity_in_stock, 0) + values["quantity_in_stock"],
+                        )
+                    )
+                else:
+                    db.execute(sql_insert(StockItem).values(**values))
+
+        ids = dict(db.query(StockItem.itemId, StockItem.id).filter(StockItem.itemId.in_(item_ids)))
+        record_movements(db, [(ids[item_id], merged[item_id]["quantity_in_stock"]) for item_id in item_ids], MOVEMENT_RECEIPT, "bulk delivery")
+        refresh_catalog_for_stock_items(db, item_ids)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    product_cache.invalidate_stock_items(item_ids)
+    return {"inserted": len(item_ids) - len(existing), "updated": len(existing)}
+
+
+async def import_stock_items(chunks: AsyncIterator[bytes], fmt: str, batch_size: int = STOCK_IMPORT_BATCH_SIZE):
+    """
+    Stream-upsert delivery lines, yielding NDJSON report lines: one per rejected line,
+    one per committed batch and a final summary.
+    """
+    # The request-scoped session is closed before a streamed body finishes, so use our own
+    db = SessionLocal()
+    summary = {"inserted": 0, "updated": 0, "failed": 0, "batches": 0}
+    batch = []
+
+    async def flush():
+        result = await run_in_threadpool(upsert_stock_batch, db, [row for _, row in batch])
+        summary["inserted"] += result["inserted"]
+        summary["updated"] += result["updated"]
+        summary["batches"] += 1
+        report = {"batch": summary["batches"], "lines": [batch[0][0], batch[-1][0]], **result}
+        batch.clear()
+        return json.dumps(report) + "\n"
+
+    try:
+        references = await run_in_threadpool(load_stock_import_references, db)
+        async for line_no, record in iter_import_records(chunks, fmt):
+            try:
+                if isinstance(record, Exception):
+                    raise record
+                batch.append((line_no, validate_stock_row(record, references)))
+            except ValueError as e:
+                summary["failed"] += 1
+                yield json.dumps({"line": line_no, "error": str(e)}) + "\n"
+                continue
+
+            if len(batch) >= batch_size:
+                yield await flush()
+
+        if batch:
+            yield await flush()
+    except Exception as e:
+        # Batches already committed stay committed; report where the upsert stopped
+        logger.error("Error upserting stock items after %d batches: %s", summary["batches"], e)
+        send_telegram_message(f"🚨 Error upserting stock items after {summary['batches']} batches: {e}")
+        yield json.dumps({"error": "Bulk upsert aborted", "detail": str(e), "summary": summary}) + "\n"
+        return
+    finally:
+        db.close()
+
+    if summary["failed"]:
+        send_telegram_message(f"⚠️ Stock bulk upsert finished with {summary['failed']} rejected lines ({summary['inserted']} inserted, {summary['updated']} updated).")
+    yield json.dumps({"summary": summary}) + "\n"
+
+
+def iter_stock_export():
+    """Yield every stock item in the StockItemResponse shape, streamed from a server-side cursor."""
+    # Plain columns rather than the entity, so streamed rows never enter the identity map
+    statement = (
+        select(
+            *StockItem.__table__.columns,
+            Category.name.label("category_name"),
+            Unit.name.label("unit_name"),
+            Supplier.name.label("supplier_name"),
+            StockStatus.name.label("status_name"),
+        )
+        .outerjoin(Category, Category.id == StockItem.category_id)
+        .outerjoin(Unit, Unit.id == StockItem.unit_id)
+        .outerjoin(Supplier, Supplier.id == StockItem.supplier_id)
+        .outerjoin(StockStatus, StockStatus.id == StockItem.stock_status_id)
+        .order_by(StockItem.id)
+        .execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE)
+    )
+
+    # The request-scoped session is closed before a streamed body finishes, so use our own (on a replica if any)
+    with SessionLocal(use_replica=True) as db:
+        for row in db.execute(statement).mappings():
+            yield {
+                "id": row["id"],
+                "item_id": row["itemId"],
+                "item_name": row["item_name"],
+                "category_name": row["category_name"] or "Unknown",
+                "unit_name": row["unit_name"] or "Unknown",
+                "quantity_added": row["quantity_added"],
+                "quantity_in_stock": row["quantity_in_stock"],
+                "purchase_date": row["purchase_date"].date() if row["purchase_date"] else None,
+                "purchase_price": row["purchase_price"],
+                "expiry_date": row["expiry_date"].date() if row["expiry_date"] else None,
+                "barcode": row["barcode"],
+                "remark": row["remark"],
+                "restock_level": row["restock_level"],
+                "supplier_name": row["supplier_name"] or "Unknown",
+                "status": row["status_name"] or "Unknown",
+                "timestamp": row["created_at"],
+                "image": row["image"],
+            }
@@ -0,0 +1,151 @@
+# app/api/inventory/ledger.py
+
+import logging
+import os
+from datetime import datetime
+from typing import Iterable, Optional
+
+from sqlalchemy import func, insert, literal, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.db.config import SessionLocal
+from app.db.models.inventory import StockItem, StockMovement, StockSnapshot
+from app.utility.scheduler import schedule
+from app.utility.utc import get_current_cambodia_time
+
+logger = logging.getLogger(__name__)
+
+MOVEMENT_RECEIPT = "receipt"
+MOVEMENT_SALE = "sale"
+MOVEMENT_ADJUSTMENT = "adjustment"
+MOVEMENT_RETURN = "return"
+
+# Movements of one item after its last snapshot before the next snapshot is taken
+STOCK_SNAPSHOT_EVERY = int(os.getenv("STOCK_SNAPSHOT_EVERY", 100))
+# Seconds between snapshot runs (0 disables the background run)
+STOCK_SNAPSHOT_INTERVAL = int(os.getenv("STOCK_SNAPSHOT_INTERVAL", 300))
+
+
+def record_movement(db: Session, stock_item_id: int, movement_type: str, quantity: int, reference: Optional[str] = None):
+    """Append one movement; call inside the transaction that changes quantity_in_stock."""
+    record_movements(db, [(stock_item_id, quantity)], movement_type, reference)
+
+
+def record_movements(db: Session, changes: Iterable[tuple], movement_type: str, reference: Optional[str] = None):
+    """Append a movement per (stock item ID, signed quantity) pair in a single INSERT."""
+    now = get_current_cambodia_time()
+    rows = [
+        {"stock_item_id": stock_item_id, "movement_type": movement_type, "quantity": quantity,
+         "reference": reference, "created_at": now}
+        for stock_item_id, quantity in changes
+    ]
+    if rows:
+        db.execute(insert(StockMovement), rows)
+
+
+def _last_snapshots(db: Session, item_ids) -> dict:
+    """Latest snapshot of each given stock item, keyed by stock item ID."""
+    statement = select(StockSnapshot).where(StockSnapshot.stock_item_id.in_(item_ids))
+    snapshots = {}
+    for snapshot in db.scalars(statement.order_by(StockSnapshot.stock_item_id, StockSnapshot.movement_id)):
+        snapshots[snapshot.stock_item_id] = snapshot
+    return snapshots
+
+
+def stock_level(db: Session, stock_item_id: int, at: Optional[datetime] = None) -> dict:
+    """
+    Quantity of a stock item now, or at `at`, from the ledger.
+
+    Reads the item's latest snapshot before that point and adds up only the movements
+    recorded after it, so the cost doesn't grow with the item's history.
+    """
+    snapshot_query = select(StockSnapshot).where(StockSnapshot.stock_item_id == stock_item_id)
+    if at is not None:
+        snapshot_query = snapshot_query.where(StockSnapshot.as_of <= at)
+    snapshot = db.scalars(snapshot_query.order_by(StockSnapshot.movement_id.desc()).limit(1)).first()
+
+    tail_query = select(func.coalesce(func.sum(StockMovement.quantity), 0), func.count()).where(
+        StockMovement.stock_item_id == stock_item_id,
+        StockMovement.id > (snapshot.movement_id if snapshot else 0),
+    )
+    if at is not None:
+        tail_query = tail_query.where(StockMovement.created_at <= at)
+    tail_quantity, tail_count = db.execute(tail_query).one()
+
+    return {
+        "id": stock_item_id,
+        "quantity": (snapshot.quantity if snapshot else 0) + tail_quantity,
+        "at": at,
+        "snapshot_as_of": snapshot.as_of if snapshot else None,
+        "movements_replayed": tail_count,
+    }
+
+
+def snapshot_stock_items(db: Session, every: int = STOCK_SNAPSHOT_EVERY) -> int:
+    """Snapshot every item with at least `every` movements since its last snapshot; commits and returns the count."""
+    last_snapshot = (
+        select(StockSnapshot.stock_item_id, func.max(StockSnapshot.movement_id).label("movement_id"))
+        .group_by(StockSnapshot.stock_item_id)
+        .subquery()
+    )
+    due = db.execute(
+        select(StockMovement.stock_item_id, func.max(StockMovement.id), func.sum(StockMovement.quantity))
+        .outerjoin(last_snapshot, last_snapshot.c.stock_item_id == StockMovement.stock_item_id)
+        .where(StockMovement.id > func.coalesce(last_snapshot.c.movement_id, 0))
+        .group_by(StockMovement.stock_item_id)
+        .having(func.count() >= every)
+    ).all()
+    if not due:
+        return 0
+
+    item_ids = [stock_item_id for stock_item_id, _, _ in due]
+    previous = _last_snapshots(db, item_ids)
+    as_of = dict(db.execute(
+        select(StockMovement.id, StockMovement.created_at).where(StockMovement.id.in_([row[1] for row in due]))
+    ).all())
+    db.execute(insert(StockSnapshot), [
+        {
+            "stock_item_id": stock_item_id,
+            "movement_id": movement_id,
+            "quantity": (previous[stock_item_id].quantity if stock_item_id in previous else 0) + tail_quantity,
+            "as_of": as_of[movement_id],
+        }
+        for stock_item_id, movement_id, tail_quantity in due
+    ])
+    db.commit()
+    return len(due)
+
+
+def run_stock_snapshots():
+    with SessionLocal() as db:
+        count = snapshot_stock_items(db)
+    if count:
+        logger.info("Took %d stock snapshots", count)
+
+
+def init_stock_ledger(engine: Engine):
+    """Record an opening balance for stock items that have no movements yet (e.g. created before the ledger)."""
+    with Session(engine) as db:
+        db.execute(
+            insert(StockMovement).from_select(
+                ["stock_item_id", "movement_type", "quantity", "reference", "created_at"],
+                select(
+                    StockItem.id, literal(MOVEMENT_ADJUSTMENT), func.coalesce(StockItem.quantity_in_stock, 0),
+                    literal("opening balance"), literal(get_current_cambodia_time()),
+                ).where(~select(StockMovement.id).where(StockMovement.stock_item_id == StockItem.id).exists()),
+            )
+        )
+        db.commit()
+
+
+schedule("stock-snapshots", STOCK_SNAPSHOT_INTERVAL, run_stock_snapshots)
+
+
+if __name__ == "__main__":
+    # One snapshot run: python -m app.api.inventory.ledger
+    from app.db.config import init_db
+
+    logging.basicConfig(level=logging.INFO)
+    init_db()
+    run_stock_snapshots()
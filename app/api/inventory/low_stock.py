@@ -0,0 +1,123 @@
+# app/api/inventory/low_stock.py
+
+import logging
+import os
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.db.config import SessionLocal
+from app.db.models.inventory import LowStockAlert, StockItem
+from app.utility.scheduler import schedule
+from app.utility.telegramAlert import send_telegram_message
+from app.utility.utc import get_current_cambodia_time
+
+logger = logging.getLogger(__name__)
+
+# Seconds between low-stock scans (0 disables the background scanner)
+LOW_STOCK_SCAN_INTERVAL = int(os.getenv("LOW_STOCK_SCAN_INTERVAL", 60))
+# Seconds between full scans; the scans in between only re-check items touched since the previous one
+LOW_STOCK_FULL_SCAN_INTERVAL = int(os.getenv("LOW_STOCK_FULL_SCAN_INTERVAL", 3600))
+# Items listed in one Telegram digest; the rest are summarized as a count
+LOW_STOCK_DIGEST_MAX_ITEMS = int(os.getenv("LOW_STOCK_DIGEST_MAX_ITEMS", 50))
+
+# Matches the partial index ix_stocks_low_stock
+IS_LOW_STOCK = StockItem.quantity_in_stock <= func.coalesce(StockItem.restock_level, 0)
+
+_SCAN_COLUMNS = (StockItem.id, StockItem.itemId, StockItem.item_name, StockItem.quantity_in_stock, StockItem.restock_level)
+
+
+class LowStockScanner:
+    """
+    Tracks which stock items are at or below their restock level and reports newly low ones.
+
+    The first scan of a process (and one every LOW_STOCK_FULL_SCAN_INTERVAL) reads the low
+    items from the partial index; the scans in between only re-evaluate items whose
+    updated_at moved past the previous scan's watermark. Reported items are kept in
+    low_stock_alerts, so they are not reported again, not even after a restart or by
+    another worker, until they recover and drop once more.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._watermark = None
+        self._full_scan_at = None
+
+    def _record_low(self, db: Session, rows: list, notified: set) -> list:
+        """Remember the low rows not reported yet and return them."""
+        newly_low = [row for row in rows if row.id not in notified]
+        if newly_low:
+            now = get_current_cambodia_time()
+            db.execute(insert(LowStockAlert), [{"stock_item_id": row.id, "notified_at": now} for row in newly_low])
+        return newly_low
+
+    def _full_scan(self, db: Session) -> list:
+        rows = db.execute(select(*_SCAN_COLUMNS).where(IS_LOW_STOCK)).all()
+        notified = set(db.scalars(select(LowStockAlert.stock_item_id)))
+        newly_low = self._record_low(db, rows, notified)
+        # Forget items that recovered (or were deleted) since they were reported
+        recovered = notified - {row.id for row in rows}
+        if recovered:
+            db.execute(delete(LowStockAlert).where(LowStockAlert.stock_item_id.in_(recovered)))
+        self._full_scan_at = time.monotonic()
+        return newly_low
+
+    def _incremental_scan(self, db: Session) -> list:
+        rows = db.execute(
+            select(*_SCAN_COLUMNS, IS_LOW_STOCK.label("is_low")).where(StockItem.updated_at >= self._watermark)
+        ).all()
+        if not rows:
+            return []
+        notified = set(db.scalars(
+            select(LowStockAlert.stock_item_id).where(LowStockAlert.stock_item_id.in_([row.id for row in rows]))
+        ))
+        newly_low = self._record_low(db, [row for row in rows if row.is_low], notified)
+        recovered = [row.id for row in rows if not row.is_low and row.id in notified]
+        if recovered:
+            db.execute(delete(LowStockAlert).where(LowStockAlert.stock_item_id.in_(recovered)))
+        return newly_low
+
+    def scan(self, db: Session) -> list:
+        """Run one scan and commit it; returns the rows of items that became low since they were last reported."""
+        with self._lock:
+            # Taken before reading, so writes racing with this scan are picked up by the next one
+            watermark = db.scalar(select(func.max(StockItem.updated_at)))
+            full = (
+                self._watermark is None
+                or self._full_scan_at is None
+                or time.monotonic() - self._full_scan_at >= LOW_STOCK_FULL_SCAN_INTERVAL
+            )
+            newly_low = self._full_scan(db) if full else self._incremental_scan(db)
+            db.commit()
+            if watermark is not None:
+                self._watermark = watermark
+            return newly_low
+
+
+def low_stock_digest(rows: list, max_items: int = LOW_STOCK_DIGEST_MAX_ITEMS) -> Optional[str]:
+    """One Telegram message for all items that went low in a scan, or None if there are none."""
+    if not rows:
+        return None
+    lines = [f"📉 Low stock: {len(rows)} item(s) at or below their restock level"]
+    for row in rows[:max_items]:
+        lines.append(f"• {row.item_name} ({row.itemId}): {row.quantity_in_stock} left, restock level {row.restock_level or 0}")
+    if len(rows) > max_items:
+        lines.append(f"…and {len(rows) - max_items} more, see /api/stock/stocks/low")
+    return "\n".join(lines)
+
+
+low_stock_scanner = LowStockScanner()
+
+
+def run_low_stock_scan():
+    with SessionLocal() as db:
+        newly_low = low_stock_scanner.scan(db)
+    digest = low_stock_digest(newly_low)
+    if digest:
+        send_telegram_message(digest)
+
+
+schedule("low-stock-scan", LOW_STOCK_SCAN_INTERVAL, run_low_stock_scan)
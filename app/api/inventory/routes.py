@@ -1,18 +1,38 @@
 # app/api/inventory/routes.py
 
+from datetime import datetime
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
-from app.schemas.inventory import Product, StockItemResponse, ErrorResponse, StockItemUpdate
+from app.schemas.inventory import Product, StockAllocationRequest, StockAllocationResponse, StockBatchQuantityRequest, StockBatchQuantityResponse, StockItemResponse, ErrorResponse, StockItemUpdate, StockLevelResponse, StockMovementResponse, StockQuantityRequest, StockQuantityResponse
 from app.api.inventory.controllers import (
+    STOCK_IMPORT_BATCH_SIZE,
+    adjust_stock_batch,
+    allocate_stock,
     create_stock_item,
     delete_stock_item,
     get_all_stock_items,
+    get_expiring_stock_items,
+    get_low_stock_items,
+    iter_stock_export,
     get_stock_item,
+    get_stock_item_version,
+    get_stock_items_version,
+    get_stock_level,
+    get_stock_movements,
     get_stock_status,
+    import_stock_items,
+    release_stock,
+    reserve_stock,
     update_stock_item,
 )
-from app.db.config import get_db
+from app.db.config import ReadSession, get_db, get_read_db
+from app.utility.etag import check_not_modified
+from app.utility.export import export_response
+from app.utility.fields import sparse_response
+from app.utility.serialization import trusted_json_response
+from app.utility.pagination import set_next_cursor
+from app.utility.streaming import RequestStreamingResponse
 import logging
 
 logger = logging.getLogger(__name__)
@@ -27,18 +47,88 @@ def create_stock(stock_item_request: Product, db: Session = Depends(get_db)):
         logger.error(f"Error creating stock item: {e.detail}")
         raise e
 
+# Bulk upsert on itemId: a JSON array, or a streamed CSV (header row + one line per item) or NDJSON body
+# of StockBulkRow lines; delivered quantities are added to existing items
+@stock.post("/stocks/bulk")
+def bulk_upsert_stocks(
+    request: Request,
+    format: str = Query(None, regex="^(json|csv|ndjson)$"),  # Defaults to the request Content-Type
+    batch_size: int = Query(STOCK_IMPORT_BATCH_SIZE, ge=1, le=10000),  # Lines per committed batch
+):
+    content_type = request.headers.get("content-type", "")
+    fmt = format or ("csv" if "csv" in content_type else "ndjson" if "ndjson" in content_type else "json")
+    return RequestStreamingResponse(
+        import_stock_items(request.stream(), fmt, batch_size=batch_size),
+        media_type="application/x-ndjson",
+    )
+
 @stock.get("/stocks", response_model=List[StockItemResponse])
-def read_stocks(db: Session = Depends(get_db)):
+async def read_stocks(
+    request: Request,
+    response: Response,
+    limit: int = Query(None, ge=1),
+    cursor: str = Query(None),
+    fields: str = Query(None),  # Optional sparse fieldset, e.g. "id,item_name,quantity_in_stock"
+    db: ReadSession = Depends(get_read_db)
+):
     try:
-        return get_all_stock_items(db)
+        # Answer 304 from the collection version alone when the client's copy is current
+        not_modified = check_not_modified(request, response, await db.run(get_stock_items_version))
+        if not_modified:
+            return not_modified
+        stock_items, next_cursor = await db.run(get_all_stock_items, limit=limit, cursor=cursor, fields=fields)
+        set_next_cursor(response, next_cursor)
+        if fields:
+            return sparse_response(response, stock_items)
+        return trusted_json_response(response, stock_items, List[StockItemResponse])
+    except HTTPException as e:
+        logger.error(f"Error fetching all stock items: {e.detail}")
+        raise e
     except Exception as e:
         logger.error(f"Error fetching all stock items: {str(e)}")
         raise HTTPException(status_code=500, detail="Error fetching stock items")
 
+# Items at or below their restock level (declared before /stocks/{item_id} so "low" isn't taken for an ID)
+@stock.get("/stocks/low", response_model=List[StockItemResponse])
+async def read_low_stocks(
+    response: Response,
+    limit: int = Query(None, ge=1),
+    cursor: str = Query(None),
+    db: ReadSession = Depends(get_read_db)
+):
+    stock_items, next_cursor = await db.run(get_low_stock_items, limit=limit, cursor=cursor)
+    set_next_cursor(response, next_cursor)
+    return trusted_json_response(response, stock_items, List[StockItemResponse])
+
+# Items expiring within `days` days, soonest first
+@stock.get("/stocks/expiring", response_model=List[StockItemResponse])
+async def read_expiring_stocks(
+    response: Response,
+    days: int = Query(30, ge=0),
+    include_expired: bool = Query(False),  # Also list items already past their expiry date
+    limit: int = Query(None, ge=1),
+    cursor: str = Query(None),
+    db: ReadSession = Depends(get_read_db)
+):
+    stock_items, next_cursor = await db.run(
+        get_expiring_stock_items, days=days, include_expired=include_expired, limit=limit, cursor=cursor
+    )
+    set_next_cursor(response, next_cursor)
+    return trusted_json_response(response, stock_items, List[StockItemResponse])
+
+@stock.get("/export")
+def export_stocks(format: str = Query("ndjson", regex="^(ndjson|csv)$")):
+    return export_response(iter_stock_export(), format, filename="stocks")
+
 @stock.get("/stocks/{item_id}", response_model=StockItemResponse)
-def read_stock(item_id: int, db: Session = Depends(get_db)):
+async def read_stock(item_id: int, request: Request, response: Response, db: ReadSession = Depends(get_read_db)):
     try:
-        return get_stock_item(db, item_id)
+        version = await db.run(get_stock_item_version, item_id)
+        if version:
+            not_modified = check_not_modified(request, response, version)
+            if not_modified:
+                return not_modified
+        return await db.run(get_stock_item, item_id)
     except HTTPException as e:
         logger.error(f"Error fetching stock item by ID {item_id}: {e.detail}")
         raise e
@@ -59,10 +149,51 @@ def delete_stock(id: int, db: Session = Depends(get_db)):
         logger.error(f"Error deleting stock item ID {id}: {e.detail}")
         raise e
 
+# Atomic quantity changes for checkouts: 409 instead of overselling when stock runs out
+@stock.post("/stocks/reserve", response_model=StockBatchQuantityResponse, responses={404: {"model": ErrorResponse}, 409: {"model": ErrorResponse}})
+def reserve_stocks(request: StockBatchQuantityRequest, db: Session = Depends(get_db)):
+    # All or nothing: one short item rolls back the whole cart
+    return adjust_stock_batch(db=db, lines=request.items, reserve=True)
+
+@stock.post("/stocks/release", response_model=StockBatchQuantityResponse, responses={404: {"model": ErrorResponse}})
+def release_stocks(request: StockBatchQuantityRequest, db: Session = Depends(get_db)):
+    return adjust_stock_batch(db=db, lines=request.items, reserve=False)
+
+# First-expired-first-out: reserve a quantity of an item name or category from the lots expiring first
+@stock.post("/stocks/allocate", response_model=StockAllocationResponse, responses={400: {"model": ErrorResponse}, 409: {"model": ErrorResponse}})
+def allocate_stocks(request: StockAllocationRequest, db: Session = Depends(get_db)):
+    return allocate_stock(db=db, request=request)
+
+@stock.post("/stocks/{item_id}/reserve", response_model=StockQuantityResponse, responses={404: {"model": ErrorResponse}, 409: {"model": ErrorResponse}})
+def reserve_stock_route(item_id: int, request: StockQuantityRequest, db: Session = Depends(get_db)):
+    return reserve_stock(db=db, item_id=item_id, quantity=request.quantity)
+
+@stock.post("/stocks/{item_id}/release", response_model=StockQuantityResponse, responses={404: {"model": ErrorResponse}})
+def release_stock_route(item_id: int, request: StockQuantityRequest, db: Session = Depends(get_db)):
+    return release_stock(db=db, item_id=item_id, quantity=request.quantity)
+
+# Stock movement ledger of an item, oldest first
+@stock.get("/stocks/{item_id}/movements", response_model=List[StockMovementResponse])
+async def read_stock_movements(
+    item_id: int,
+    response: Response,
+    limit: int = Query(None, ge=1),
+    cursor: str = Query(None),
+    db: ReadSession = Depends(get_read_db)
+):
+    movements, next_cursor = await db.run(get_stock_movements, item_id, limit=limit, cursor=cursor)
+    set_next_cursor(response, next_cursor)
+    return movements
+
+# Quantity from the ledger, now or at a past point in time (?at=2026-01-31T23:59:59)
+@stock.get("/stocks/{item_id}/level", response_model=StockLevelResponse)
+async def read_stock_level(item_id: int, at: datetime = Query(None), db: ReadSession = Depends(get_read_db)):
+    return await db.run(get_stock_level, item_id, at=at)
+
 @stock.get("/stocks/status/{item_id}", response_model=dict)
-def stock_status(item_id: int, db: Session = Depends(get_db)):
+async def stock_status(item_id: int, db: ReadSession = Depends(get_read_db)):
     try:
-        return get_stock_status(db=db, item_id=item_id)
+        return await db.run(get_stock_status, item_id=item_id)
     except HTTPException as e:
         logger.error(f"Error fetching stock status for item ID {item_id}: {e.detail}")
         raise e
@@ -0,0 +1,228 @@
+# app/api/products/autocomplete.py
+
+import bisect
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+
+from sqlalchemy.orm import Session
+
+from app.db.config import SessionLocal
+from app.db.models.product import Product
+from app.db.models.utility import Brand
+from app.utility.lookups import bump_shared_version, lookup_table, shared_version
+
+# Words are runs of letters/digits, matched case-insensitively
+_WORD = re.compile(r"[^\W_]+", re.UNICODE)
+
+# Minimum trigram similarity for a word to count as a typo of the query word
+FUZZY_THRESHOLD = 0.4
+
+# Scores for how a query word matched a product word
+EXACT_SCORE = 1.0
+PREFIX_SCORE = 0.9
+FUZZY_WEIGHT = 0.8
+
+# Shared version counter (in lookup_versions) bumped by every product write
+PRODUCTS_VERSION = "products"
+
+# Seconds between checks of that counter for product writes made by other workers
+AUTOCOMPLETE_VERSION_CHECK_INTERVAL = float(os.getenv("AUTOCOMPLETE_VERSION_CHECK_INTERVAL", 5))
+
+
+def _words(*values) -> set[str]:
+    return {word for value in values if value for word in _WORD.findall(value.lower())}
+
+
+def _trigrams(word: str) -> set[str]:
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class ProductAutocompleteIndex:
+    """
+    In-process index over product title, product code and brand name for keystroke search.
+
+    Prefix matches use a sorted vocabulary; typo tolerance comes from trigram similarity
+    between the query word and indexed words. Each worker process holds its own copy: the
+    worker making a product write updates its copy in place and bumps the shared "products"
+    version, and every other worker rebuilds its copy when sync() sees that version move.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._version = None
+        self._checked_at = None
+        self._reset()
+
+    def _reset(self):
+        self._products = {}                   # product id -> suggestion dict
+        self._product_words = {}              # product id -> set of words
+        self._word_ids = defaultdict(set)     # word -> product ids
+        self._sorted_words = []               # vocabulary, sorted for prefix lookups
+        self._gram_words = defaultdict(set)   # trigram -> words containing it
+
+    def build(self, db: Session):
+        """(Re)build the whole index from the database."""
+        # Read before the rows, so a write racing with the build moves the version past it
+        version = shared_version(db, PRODUCTS_VERSION)
+        rows = (
+            db.query(Product.id, Product.title, Product.productcode, Brand.name)
+            .outerjoin(Brand, Brand.id == Product.brand_id)
+            .all()
+        )
+        with self._lock:
+            self._reset()
+            for product_id, title, productcode, brand_name in rows:
+                self._add(product_id, title, productcode, brand_name)
+            self._version = version
+            self._checked_at = time.monotonic()
+
+    def sync(self, db: Session):
+        """Rebuild if another worker wrote products since the last check (at most once per check interval)."""
+        with self._lock:
+            if self._checked_at is not None and time.monotonic() - self._checked_at < AUTOCOMPLETE_VERSION_CHECK_INTERVAL:
+                return
+            self._checked_at = time.monotonic()
+        if shared_version(db, PRODUCTS_VERSION) != self._version:
+            self.build(db)
+
+    def _bump(self):
+        # In its own session, so the commit doesn't expire the caller's instances
+        with SessionLocal() as db:
+            version = bump_shared_version(db, PRODUCTS_VERSION)
+        # Keep our copy current unless another worker also wrote since it was (re)built
+        with self._lock:
+            if self._version == version - 1:
+                self._version = version
+
+    def upsert(self, product_id: int, title: str, productcode: str, brand_name: str = None):
+        """Add a product, or replace its entry after an update."""
+        with self._lock:
+            self._remove(product_id)
+            self._add(product_id, title, productcode, brand_name)
+
+    def upsert_products(self, entries: list[tuple]):
+        """
+        Index freshly written products from (id, title, productcode, brand name) tuples and
+        bump the shared version; call after the write is committed.
+        """
+        with self._lock:
+            for product_id, title, productcode, brand_name in entries:
+                self._remove(product_id)
+                self._add(product_id, title, productcode, brand_name)
+        self._bump()
+
+    def remove(self, product_ids: list[int]):
+        """Drop deleted products from the index and bump the shared version; call after the delete is committed."""
+        with self._lock:
+            for product_id in product_ids:
+                self._remove(product_id)
+        self._bump()
+
+    def search(self, q: str, limit: int = 10) -> list[dict]:
+        """Return up to `limit` suggestions where every query word matches as a prefix or a close typo."""
+        query_words = _WORD.findall(q.lower())
+        if not query_words:
+            return []
+
+        with self._lock:
+            scores = None
+            for query_word in query_words:
+                word_scores = self._match_word(query_word)
+                if scores is None:
+                    scores = word_scores
+                else:
+                    scores = {pid: score + word_scores[pid] for pid, score in scores.items() if pid in word_scores}
+                if not scores:
+                    return []
+
+            ranked = sorted(scores.items(), key=lambda item: (-item[1], len(self._products[item[0]]["title"] or ""), item[0]))
+            return [dict(self._products[pid], score=round(score / len(query_words), 3)) for pid, score in ranked[:limit]]
+
+    def _match_word(self, query_word: str) -> dict:
+        """Best score per product id for a single query word."""
+        best = {}
+
+        def credit(word, score):
+            for pid in self._word_ids[word]:
+                if score > best.get(pid, 0):
+                    best[pid] = score
+
+        # Prefix matches: walk the sorted vocabulary from the query word onwards
+        i = bisect.bisect_left(self._sorted_words, query_word)
+        while i < len(self._sorted_words) and self._sorted_words[i].startswith(query_word):
+            word = self._sorted_words[i]
+            credit(word, EXACT_SCORE if word == query_word else PREFIX_SCORE)
+            i += 1
+
+        # Fuzzy matches: words sharing enough trigrams with the query word
+        if len(query_word) >= 3:
+            query_grams = _trigrams(query_word)
+            shared = defaultdict(int)
+            for gram in query_grams:
+                for word in self._gram_words.get(gram, ()):
+                    shared[word] += 1
+            for word, overlap in shared.items():
+                similarity = overlap / (len(query_grams) + len(_trigrams(word)) - overlap)
+                if similarity >= FUZZY_THRESHOLD:
+                    credit(word, similarity * FUZZY_WEIGHT)
+
+        return best
+
+    def _add(self, product_id, title, productcode, brand_name):
+        words = _words(title, productcode, brand_name)
+        self._products[product_id] = {
+            "id": product_id,
+            "title": title,
+            "productcode": productcode,
+            "brand_name": brand_name,
+        }
+        self._product_words[product_id] = words
+        for word in words:
+            if not self._word_ids[word]:
+                bisect.insort(self._sorted_words, word)
+                for gram in _trigrams(word):
+                    self._gram_words[gram].add(word)
+            self._word_ids[word].add(product_id)
+
+    def _remove(self, product_id):
+        self._products.pop(product_id, None)
+        for word in self._product_words.pop(product_id, set()):
+            ids = self._word_ids[word]
+            ids.discard(product_id)
+            if ids:
+                continue
+            # Last product using this word: drop it from the vocabulary
+            del self._word_ids[word]
+            del self._sorted_words[bisect.bisect_left(self._sorted_words, word)]
+            for gram in _trigrams(word):
+                self._gram_words[gram].discard(word)
+                if not self._gram_words[gram]:
+                    del self._gram_words[gram]
+
+
+def autocomplete_entries(db: Session, db_products: list[Product]) -> list[tuple]:
+    """
+    The values upsert_products() indexes, with brand names from the lookup table.
+
+    Take them before committing: afterwards the instances are expired and reading
+    them costs a query each.
+    """
+    brands = lookup_table(Brand)
+    return [
+        (db_product.id, db_product.title, db_product.productcode, brands.name_of(db, db_product.brand_id))
+        for db_product in db_products
+    ]
+
+
+# Process-wide index used by the products routes
+autocomplete_index = ProductAutocompleteIndex()
+
+
+def init_autocomplete_index():
+    """Build the autocomplete index at startup."""
+    with SessionLocal() as db:
+        autocomplete_index.build(db)
@@ -0,0 +1,116 @@
+# app/api/products/cache.py
+
+import os
+import threading
+from collections import defaultdict
+from typing import Iterable, Optional
+
+from cachetools import TTLCache
+
+from app.schemas.product import ProductResponse
+
+# Built ProductResponse objects kept per product id; bounded by size (LRU) and age
+PRODUCT_CACHE_MAXSIZE = int(os.getenv("PRODUCT_CACHE_MAXSIZE", 10000))
+PRODUCT_CACHE_TTL = int(os.getenv("PRODUCT_CACHE_TTL", 300))
+
+
+class _CountingTTLCache(TTLCache):
+    """TTLCache that counts entries dropped to make room for new ones."""
+
+    def __init__(self, maxsize, ttl):
+        super().__init__(maxsize=maxsize, ttl=ttl)
+        self.evictions = 0
+
+    def popitem(self):
+        # Only called by cachetools when the cache is full
+        key, value = super().popitem()
+        self.evictions += 1
+        return key, value
+
+
+class ProductResponseCache:
+    """
+    Read-through cache of single-product responses, keyed by product id.
+
+    Each entry is stored with the version it was built from (see get_product_version), and
+    is only served to a caller that read the same version from the database. Writes made
+    by other worker processes therefore miss the cache right away instead of after the TTL,
+    and a cached body always matches the ETag built from that version.
+
+    Entries are also invalidated explicitly by this worker's product writes and stock item
+    writes (via a stock itemId -> product ids index). A generation counter stops a response
+    built from data read before an invalidation from being stored after it.
+    """
+
+    def __init__(self, maxsize: int = PRODUCT_CACHE_MAXSIZE, ttl: int = PRODUCT_CACHE_TTL):
+        self._lock = threading.Lock()
+        self._cache = _CountingTTLCache(maxsize=maxsize, ttl=ttl)
+        self._by_stock_item = defaultdict(set)
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, product_id: int, version: Optional[tuple]) -> Optional[ProductResponse]:
+        """The cached response if it was built from `version` of the product, else None."""
+        with self._lock:
+            entry = self._cache.get(product_id)
+            if entry is not None and entry[0] != version:
+                # The product changed since, e.g. through another worker
+                del self._cache[product_id]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[1]
+
+    def generation(self) -> int:
+        """Token to pass to put(); take it before reading the product from the database."""
+        with self._lock:
+            return self._generation
+
+    def put(self, product_id: int, response: ProductResponse, generation: int, version: tuple):
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._cache[product_id] = (version, response)
+            if response.stock_item_id:
+                self._by_stock_item[response.stock_item_id].add(product_id)
+
+    def invalidate(self, product_ids: Iterable[int]):
+        """Drop the given products, e.g. after they were updated or deleted."""
+        with self._lock:
+            self._generation += 1
+            for product_id in product_ids:
+                self._cache.pop(product_id, None)
+
+    def invalidate_stock_items(self, item_ids: Iterable[str]):
+        """Drop every product embedding one of the given stock items (by itemId)."""
+        with self._lock:
+            self._generation += 1
+            for item_id in item_ids:
+                for product_id in self._by_stock_item.pop(item_id, ()):
+                    self._cache.pop(product_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._cache.clear()
+            self._by_stock_item.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._cache.expire()
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._cache),
+                "maxsize": self._cache.maxsize,
+                "ttl": self._cache.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self._cache.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+product_cache = ProductResponseCache()
@@ -0,0 +1,128 @@
+# app/api/products/catalog.py
+
+import logging
+
+from sqlalchemy import delete, func, insert, select, text, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, aliased
+
+from app.db.models.catalog import ProductCatalogView
+from app.db.models.inventory import StockItem
+from app.db.models.product import Product
+from app.db.models.utility import Brand, Category, Color, Model, StockStatus, Unit
+
+logger = logging.getLogger(__name__)
+
+
+def catalog_select():
+    """SELECT producing product_catalog_view rows from the normalized tables."""
+    stock_category = aliased(Category)
+    stock_status = aliased(StockStatus)
+    return (
+        select(
+            Product.id, Product.productcode, Product.title, Product.price, Product.description,
+            Product.discount, Product.rating, Product.warranty, Product.image,
+            Product.created_at, Product.updated_at,
+            Product.brand_id, Product.model_id, Product.color_id, Product.category_id, Product.stock_status_id,
+            Brand.name, Model.name, Color.name, Category.name, StockStatus.name,
+            Product.stock_item_id, StockItem.item_name, StockItem.quantity_in_stock, StockItem.expiry_date,
+            Unit.name, stock_category.name, stock_status.name, StockItem.barcode,
+        )
+        .outerjoin(Brand, Brand.id == Product.brand_id)
+        .outerjoin(Model, Model.id == Product.model_id)
+        .outerjoin(Color, Color.id == Product.color_id)
+        .outerjoin(Category, Category.id == Product.category_id)
+        .outerjoin(StockStatus, StockStatus.id == Product.stock_status_id)
+        .outerjoin(StockItem, StockItem.itemId == Product.stock_item_id)
+        .outerjoin(Unit, Unit.id == StockItem.unit_id)
+        .outerjoin(stock_category, stock_category.id == StockItem.category_id)
+        .outerjoin(stock_status, stock_status.id == StockItem.stock_status_id)
+    )
+
+
+# Catalog columns in the order catalog_select() produces them
+_CATALOG_COLUMNS = [
+    "id", "productcode", "title", "price", "description",
+    "discount", "rating", "warranty", "image",
+    "created_at", "updated_at",
+    "brand_id", "model_id", "color_id", "category_id", "stock_status_id",
+    "brand_name", "model_name", "color_name", "category_name", "stock_status_name",
+    "stock_item_id", "stock_item_name", "stock_quantity_in_stock", "stock_expiry_date",
+    "stock_unit_name", "stock_category_name", "stock_status", "stock_barcode",
+]
+
+
+def _insert_from(db: Session, where=None):
+    statement = catalog_select()
+    if where is not None:
+        statement = statement.where(where)
+    db.execute(insert(ProductCatalogView).from_select(_CATALOG_COLUMNS, statement))
+
+
+def refresh_catalog(db: Session, product_ids):
+    """Rewrite the catalog rows of the given products; call inside the transaction that saves them (after a flush)."""
+    product_ids = list(product_ids)
+    if not product_ids:
+        return
+    remove_from_catalog(db, product_ids)
+    _insert_from(db, Product.id.in_(product_ids))
+
+
+def refresh_catalog_for_stock_items(db: Session, item_ids):
+    """Rewrite the catalog rows of every product embedding one of the given stock items (by itemId)."""
+    item_ids = [item_id for item_id in item_ids if item_id]
+    if not item_ids:
+        return
+    product_ids = select(Product.id).where(Product.stock_item_id.in_(item_ids))
+    db.execute(delete(ProductCatalogView).where(ProductCatalogView.id.in_(product_ids)))
+    _insert_from(db, Product.stock_item_id.in_(item_ids))
+
+
+def set_catalog_stock_quantity(db: Session, item_id: str, quantity: int):
+    """Copy a stock item's new quantity into the catalog rows embedding it; cheaper than a refresh for quantity-only changes."""
+    db.execute(
+        update(ProductCatalogView)
+        .where(ProductCatalogView.stock_item_id == item_id)
+        .values(stock_quantity_in_stock=quantity)
+    )
+
+
+def remove_from_catalog(db: Session, product_ids):
+    """Drop the catalog rows of deleted products; call inside the transaction that deletes them."""
+    product_ids = list(product_ids)
+    if product_ids:
+        db.execute(delete(ProductCatalogView).where(ProductCatalogView.id.in_(product_ids)))
+
+
+def rebuild_catalog(db: Session) -> int:
+    """Recreate every catalog row from the normalized tables and commit; returns the row count."""
+    db.execute(delete(ProductCatalogView))
+    _insert_from(db)
+    db.commit()
+    return db.scalar(select(func.count()).select_from(ProductCatalogView))
+
+
+def init_catalog(engine: Engine):
+    """Backfill catalog rows for products written while the catalog didn't exist."""
+    with Session(engine) as db:
+        _insert_from(db, Product.id.not_in(select(ProductCatalogView.id)))
+        db.commit()
+
+    # Search matches titles and product codes on the catalog, so it needs the same GIN indexes as products
+    if engine.dialect.name == "postgresql":
+        with engine.begin() as conn:
+            for column in ("title", "productcode"):
+                conn.execute(text(
+                    f"CREATE INDEX IF NOT EXISTS ix_product_catalog_view_{column}_tsv ON product_catalog_view "
+                    f"USING GIN (to_tsvector('simple', coalesce({column}, '')))"
+                ))
+
+
+if __name__ == "__main__":
+    # Full rebuild: python -m app.api.products.catalog
+    from app.db.config import SessionLocal, init_db
+
+    logging.basicConfig(level=logging.INFO)
+    init_db()
+    with SessionLocal() as session:
+        logger.info("Rebuilt product catalog: %d rows", rebuild_catalog(session))
@@ -1,13 +1,41 @@
-from datetime import datetime
-from sqlalchemy.orm import Session
+import json
+import os
+from typing import AsyncIterator
+from pydantic import ValidationError
+from sqlalchemy import delete, insert as sql_insert, select, update
+from sqlalchemy.orm import Session, aliased
 from fastapi import HTTPException, Query
-from app.api.products.helper import apply_filters, build_product_response, get_related_models
+from fastapi.concurrency import run_in_threadpool
+from app.api.products.autocomplete import autocomplete_entries, autocomplete_index
+from app.api.products.cache import product_cache
+from app.api.products.catalog import refresh_catalog, remove_from_catalog
+from app.api.products.facets import clear_facet_cache, get_facets, parse_facets
+from app.api.products.search import index_products, remove_from_index
+from app.api.products.helper import apply_filters, build_catalog_fields, build_catalog_responses, build_product_response, get_related_models, get_sort_spec, iter_import_records, parse_sort, product_create_values, with_catalog_fields
+from app.db.models.catalog import ProductCatalogView
 from app.db.models.product import Product
-from app.db.models.utility import Brand, Model, Color, Category, StockStatus
+from app.db.models.utility import Brand, Model, Color, Category, StockStatus, Unit
 from app.db.models.inventory import StockItem
-from app.schemas.product import ProductCreate, ProductResponse, ProductUpdate, ProductUpdateResponse, StockItemResponse
-from app.db.config import get_db  
+from app.schemas.product import ProductBatchResponse, ProductBulkUpdate, ProductBulkUpdateResponse, ProductCreate, ProductResponse, ProductSearchResponse, ProductSuggestion, ProductUpdate, ProductUpdateResponse, StockItemResponse
+from app.db.config import SessionLocal, get_db  
+from app.db.replicas import reads_from_replica
+from app.db.upsert import dialect_insert
+from app.utility.etag import collection_version
+from app.utility.export import EXPORT_BATCH_SIZE
+from app.utility.fields import parse_fields
+from app.utility.lookups import lookup_table
+from app.utility.pagination import paginate
 from app.utility.telegramAlert import send_telegram_message
+from app.utility.utc import get_current_cambodia_time
+
+# Keys accepted by the `fields` sparse fieldset parameter
+PRODUCT_FIELDS = list(ProductResponse.model_fields)
+
+# Most ids accepted by one batch get
+PRODUCT_BATCH_MAX_IDS = int(os.getenv("PRODUCT_BATCH_MAX_IDS", 500))
+
+# Rows per committed batch for product imports
+PRODUCT_IMPORT_BATCH_SIZE = int(os.getenv("PRODUCT_IMPORT_BATCH_SIZE", 500))
 
 # Create Product
 def create_product(db: Session, product: ProductCreate):
@@ -18,39 +46,20 @@ def create_product(db: Session, product: ProductCreate):
             raise HTTPException(status_code=400, detail="Product with this productcode already exists.")
         
         # Create a new product
-        db_product = Product(
-            productcode=product.productcode,
-            title=product.title,
-            price=product.price,
-            description=product.description,
-            brand_id=product.brand_id,
-            model_id=product.model_id,
-            color_id=product.color_id,
-            category_id=product.category_id,
-            discount=product.discount,
-            rating=product.rating,
-            warranty=product.warranty,
-            stock_status_id=product.status_id,
-            image=product.image,
-            stock_item_id=product.stockItemId,  # Ensure this is passed as string if `itemId` is a string
-        )
+        db_product = Product(**product_create_values(product))
         
-        # Add to session and commit to DB
+        # Add to session, index it for search and commit to DB
         db.add(db_product)
+        db.flush()
+        index_products(db, [db_product])
+        refresh_catalog(db, [db_product.id])
         db.commit()
         db.refresh(db_product)  # Refresh to get the id and updated fields
+        autocomplete_index.upsert_products(autocomplete_entries(db, [db_product]))
+        clear_facet_cache()
 
-        # Get the related models
-        brand = db.query(Brand).filter(Brand.id == db_product.brand_id).first()
-        model = db.query(Model).filter(Model.id == db_product.model_id).first()
-        color = db.query(Color).filter(Color.id == db_product.color_id).first()
-        category = db.query(Category).filter(Category.id == db_product.category_id).first()
-        status = db.query(StockStatus).filter(StockStatus.id == db_product.stock_status_id).first()
-        stock_item = db.query(StockItem).filter(StockItem.itemId == db_product.stock_item_id).first()
-
-        # Validate that the related models exist
-        if not (brand and model and color and category and status and stock_item):
-            raise HTTPException(status_code=400, detail="Invalid foreign key references")
+        # Get the related models (raises 400 if any of them does not exist)
+        brand, model, color, category, status, stock_item = get_related_models(db, db_product)
 
         # Convert expiry_date to string if it's a datetime object
         expiry_date_str = stock_item.expiry_date.isoformat() if stock_item.expiry_date else None
@@ -127,11 +136,17 @@ def update_product(db: Session, product_id: int, product_data: ProductUpdate):
             db_product.image = product_data.image
 
         # Set the current time as the new updated_at value
-        db_product.updated_at = datetime.now()
+        db_product.updated_at = get_current_cambodia_time()
 
-        # Commit the changes to the database
+        # Re-index the product for search and the catalog, and commit the changes to the database
+        db.flush()
+        index_products(db, [db_product])
+        refresh_catalog(db, [product_id])
         db.commit()
+        product_cache.invalidate([product_id])
         db.refresh(db_product)
+        autocomplete_index.upsert_products(autocomplete_entries(db, [db_product]))
+        clear_facet_cache()
 
         # Return the updated product as a response
         return ProductUpdateResponse.from_orm(db_product)
@@ -142,35 +157,44 @@ def update_product(db: Session, product_id: int, product_data: ProductUpdate):
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 
-# Get all products
-def get_all_products(db: Session):
+# Get all products (keyset-paginated when a limit or cursor is given)
+def get_all_products(db: Session, limit: int = None, cursor: str = None, fields: str = None):
     try:
-        # Fetch all products from the database
-        db_products = db.query(Product).all()
-
-        # If no products found, raise a 404 error
-        if not db_products:
+        # Fetch the page of products from the denormalized catalog (no joins)
+        # (only the columns behind the requested fields when a sparse fieldset is given)
+        field_names = parse_fields(fields, PRODUCT_FIELDS)
+        query = db.query(ProductCatalogView)
+        if field_names:
+            query = with_catalog_fields(query, field_names, get_sort_spec())
+        db_products, next_cursor = paginate(query, get_sort_spec(), cursor=cursor, limit=limit)
+
+        # If no products found on the first page, raise a 404 error
+        if not db_products and cursor is None:
             raise HTTPException(status_code=404, detail="No products found.")
 
-        # Prepare the response with all product details
-        products = []
-        for db_product in db_products:
-            # Fetch related models (brand, model, color, category, stock status, stock item)
-            brand, model, color, category, status, stock_item = get_related_models(db, db_product)
-
-            # Append product details to the response list
-            products.append(build_product_response(db_product, brand, model, color, category, status, stock_item))
-
-        return products
+        # Catalog rows already carry the related names, so no per-row queries here
+        if field_names:
+            return build_catalog_fields(db_products, field_names), next_cursor
+        return build_catalog_responses(db_products), next_cursor
+    except HTTPException:
+        raise
     except Exception as e:
         # Send Telegram message only in case of an error
         send_telegram_message(f"❌ Error fetching all products: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 
-# Get single product
-def get_single_product(db: Session, product_id: int):
+# Get single product (`version` is the product's get_product_version(), when the caller already read it)
+def get_single_product(db: Session, product_id: int, version: tuple = None):
     try:
+        # Serve the built response from the cache when it was built from the current version
+        if version is None:
+            version = get_product_version(db, product_id)
+        cached = product_cache.get(product_id, version)
+        if cached is not None:
+            return cached
+        generation = product_cache.generation()
+
         # Fetch the product by ID from the database
         db_product = db.query(Product).filter(Product.id == product_id).first()
 
@@ -181,34 +205,104 @@ def get_single_product(db: Session, product_id: int):
         # Fetch related models (brand, model, color, category, stock status, stock item)
         brand, model, color, category, status, stock_item = get_related_models(db, db_product)
 
-        # Return the product details as a response
-        return build_product_response(db_product, brand, model, color, category, status, stock_item)
+        # Cache and return the product details as a response (unless a lagging replica may have
+        # served a row older than the last invalidation)
+        response = build_product_response(db_product, brand, model, color, category, status, stock_item)
+        if not reads_from_replica(db):
+            product_cache.put(product_id, response, generation, version)
+        return response
+    except HTTPException:
+        raise
     except Exception as e:
         # Send Telegram message only in case of an error
         send_telegram_message(f"❌ Error fetching product ID {product_id}: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 
-# Limit products (pagination or limit fetch)
-def get_limited_products(db: Session, limit: int = Query(10, ge=1)):
+# Version of the product collection for conditional GETs: products plus their embedded stock items
+def get_products_version(db: Session) -> tuple:
+    return collection_version(db, Product, StockItem)
+
+
+# Version of a single product for conditional GETs and the response cache, or None when it does not exist
+def get_product_version(db: Session, product_id: int):
+    return get_product_versions(db, [product_id]).get(product_id)
+
+
+# Versions (product id, product updated_at, stock item updated_at) of many products in one query
+def get_product_versions(db: Session, product_ids: list[int]) -> dict:
+    rows = db.execute(
+        select(Product.id, Product.updated_at, StockItem.updated_at)
+        .outerjoin(StockItem, StockItem.itemId == Product.stock_item_id)
+        .where(Product.id.in_(product_ids))
+    )
+    return {row[0]: tuple(row) for row in rows}
+
+
+# Get many products by id: cached responses first, the rest in one IN query on the catalog
+def get_products_batch(db: Session, product_ids: list[int]) -> ProductBatchResponse:
+    # Keep the requested order, dropping repeated ids
+    product_ids = list(dict.fromkeys(product_ids))
+    if len(product_ids) > PRODUCT_BATCH_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {PRODUCT_BATCH_MAX_IDS} ids per request")
+
     try:
-        # Fetch the limited number of products from the database
-        db_products = db.query(Product).limit(limit).all()
+        found = {}
+        versions = get_product_versions(db, product_ids)
+        for product_id in product_ids:
+            cached = product_cache.get(product_id, versions.get(product_id))
+            if cached is not None:
+                found[product_id] = cached
+
+        to_load = [product_id for product_id in product_ids if product_id not in found]
+        if to_load:
+            generation = product_cache.generation()
+            rows = db.query(ProductCatalogView).filter(ProductCatalogView.id.in_(to_load)).all()
+            # Rows read from a replica may predate the last invalidation, so they aren't cached
+            cacheable = not reads_from_replica(db)
+            for response in build_catalog_responses(rows):
+                if cacheable and response.id in versions:
+                    product_cache.put(response.id, response, generation, versions[response.id])
+                found[response.id] = response
+
+        return ProductBatchResponse(
+            items=[found[product_id] for product_id in product_ids if product_id in found],
+            missing=[product_id for product_id in product_ids if product_id not in found],
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        # Send Telegram message only in case of an error
+        send_telegram_message(f"❌ Error fetching product batch: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
 
-        # If no products found, raise a 404 error
-        if not db_products:
-            raise HTTPException(status_code=404, detail="No products found.")
 
-        # Prepare the response with all product details
-        products = []
-        for db_product in db_products:
-            # Fetch related models (brand, model, color, category, stock status, stock item)
-            brand, model, color, category, status, stock_item = get_related_models(db, db_product)
+# Hit/miss/eviction counters of the single-product response cache
+def get_product_cache_stats():
+    return product_cache.stats()
 
-            # Append product details to the response list
-            products.append(build_product_response(db_product, brand, model, color, category, status, stock_item))
 
-        return products
+# Limit products (pagination or limit fetch)
+def get_limited_products(db: Session, limit: int = Query(10, ge=1), cursor: str = None, fields: str = None):
+    try:
+        # Fetch the limited number of products from the database, starting after the cursor
+        # (only the columns behind the requested fields when a sparse fieldset is given)
+        field_names = parse_fields(fields, PRODUCT_FIELDS)
+        query = db.query(ProductCatalogView)
+        if field_names:
+            query = with_catalog_fields(query, field_names, get_sort_spec())
+        db_products, next_cursor = paginate(query, get_sort_spec(), cursor=cursor, limit=limit)
+
+        # If no products found on the first page, raise a 404 error
+        if not db_products and cursor is None:
+            raise HTTPException(status_code=404, detail="No products found.")
+
+        # Catalog rows already carry the related names, so no per-row queries here
+        if field_names:
+            return build_catalog_fields(db_products, field_names), next_cursor
+        return build_catalog_responses(db_products), next_cursor
+    except HTTPException:
+        raise
     except Exception as e:
         # Send Telegram message only in case of an error
         send_telegram_message(f"❌ Error fetching limited products: {str(e)}")
@@ -229,12 +323,15 @@ def search_products(
     stock_status_name: str = None,
     productcode: str = None,
     sort_by: str = None,  # Sorting parameter
-    sort_order: str = 'asc'  # Sorting order
+    sort_order: str = 'asc',  # Sorting order
+    sort: str = None,  # Multi-key sort, e.g. "-price,rating"; replaces sort_by/sort_order
+    limit: int = None,  # Page size (keyset pagination)
+    cursor: str = None,  # Cursor returned with the previous page
+    facets: str = None,  # Comma separated facets to count, e.g. "brand,category"
+    fields: str = None  # Sparse fieldset, e.g. "id,title,price"
 ):
     try:
-        # Apply filters using the helper function
-        query = apply_filters(
-            db=db,
+        filters = dict(
             id=id,
             title=title,
             min_price=min_price,
@@ -245,33 +342,71 @@ def search_products(
             color_name=color_name,
             stock_status_name=stock_status_name,
             productcode=productcode,
+        )
+        facet_names = parse_facets(facets) if facets else None
+        field_names = parse_fields(fields, PRODUCT_FIELDS)
+        if sort and sort_by:
+            raise HTTPException(status_code=400, detail="Use either sort or sort_by, not both")
+        sort_spec = None
+        if sort:
+            sort_spec = parse_sort(sort)
+        elif sort_by != 'relevance':
+            sort_spec = get_sort_spec(sort_by, sort_order)
+
+        # Apply filters using the helper function
+        query = apply_filters(
+            db=db,
+            **filters,
             sort_by=sort_by,  # Pass sorting parameters
             sort_order=sort_order
         )
 
-        # Fetch results
-        db_products = query.all()
+        # Load only the columns behind a sparse fieldset (facets still count over the full query)
+        page_query = with_catalog_fields(query, field_names, sort_spec) if field_names else query
 
-        # If no products found, raise a 404 error
-        if not db_products:
-            raise HTTPException(status_code=404, detail="No products found.")
+        # Relevance ranks can't be encoded in a cursor, so relevance results are only limited
+        if sort_spec is None:
+            if cursor is not None:
+                raise HTTPException(status_code=400, detail="Cursor pagination is not supported with sort_by=relevance")
+            db_products, next_cursor = page_query.limit(limit).all(), None
 
-        # Prepare response for all found products
-        products = []
-        for db_product in db_products:
-            # Fetch related models (brand, model, color, category, stock status, stock item)
-            brand, model, color, category, status, stock_item = get_related_models(db, db_product)
+        # Fetch the page of results from the denormalized catalog
+        else:
+            db_products, next_cursor = paginate(page_query, sort_spec, cursor=cursor, limit=limit)
 
-            # Append product details to the response list
-            products.append(build_product_response(db_product, brand, model, color, category, status, stock_item))
+        # If no products found on the first page, raise a 404 error
+        if not db_products and cursor is None:
+            raise HTTPException(status_code=404, detail="No products found.")
 
-        return products
+        # Catalog rows already carry the related names, so no per-row queries here
+        if field_names:
+            products = build_catalog_fields(db_products, field_names)
+        else:
+            products = build_catalog_responses(db_products)
+
+        # Facet counts cover the whole filtered set, not just this page
+        if facet_names:
+            facet_counts = get_facets(db, query, filters, facet_names)
+            if field_names:
+                return {"items": products, "facets": facet_counts}, next_cursor
+            return ProductSearchResponse(items=products, facets=facet_counts), next_cursor
+
+        return products, next_cursor
+    except HTTPException:
+        raise
     except Exception as e:
         # Send Telegram message only in case of an error
         send_telegram_message(f"❌ Error searching products: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 
+# Autocomplete products (served from the in-memory index, no database round trip)
+def autocomplete_products(db: Session, q: str, limit: int = 10):
+    # Pick up product writes made by other workers
+    autocomplete_index.sync(db)
+    return [ProductSuggestion(**suggestion) for suggestion in autocomplete_index.search(q, limit=limit)]
+
+
 # Delete Product
 def delete_product(db: Session, product_id: int):
     try:
@@ -282,9 +417,14 @@ def delete_product(db: Session, product_id: int):
         if not db_product:
             raise HTTPException(status_code=404, detail="Product not found")
 
-        # Delete the product from the database
+        # Delete the product from the database and the search index
         db.delete(db_product)
+        remove_from_index(db, [product_id])
+        remove_from_catalog(db, [product_id])
         db.commit()
+        product_cache.invalidate([product_id])
+        autocomplete_index.remove([product_id])
+        clear_facet_cache()
 
         # Send Telegram message upon deletion
         send_telegram_message(f"🗑️ Product deleted: {db_product.productcode} - {db_product.title}.")
@@ -300,25 +440,279 @@ def delete_product(db: Session, product_id: int):
 # Delete multiple products
 def delete_multiple_products(db: Session, product_ids: list[int]):
     try:
-        # Fetch the products with the given IDs from the database
-        products_to_delete = db.query(Product).filter(Product.id.in_(product_ids)).all()
+        # Delete the products in one statement, getting the deleted rows back via RETURNING where supported
+        statement = delete(Product).where(Product.id.in_(product_ids)).execution_options(synchronize_session=False)
+        if db.get_bind().dialect.delete_returning:
+            deleted = db.execute(statement.returning(Product.id, Product.productcode)).all()
+        else:
+            deleted = db.query(Product.id, Product.productcode).filter(Product.id.in_(product_ids)).all()
+            db.execute(statement)
 
         # If no products are found, raise an error
-        if not products_to_delete:
+        if not deleted:
+            db.rollback()
             raise HTTPException(status_code=404, detail="No products found with the provided IDs")
 
-        # Delete the products
-        for product in products_to_delete:
-            db.delete(product)
+        deleted_ids = sorted(product_id for product_id, _ in deleted)
+        remove_from_index(db, deleted_ids)
+        remove_from_catalog(db, deleted_ids)
 
         # Commit the transaction
         db.commit()
+        product_cache.invalidate(deleted_ids)
+        autocomplete_index.remove(deleted_ids)
+        clear_facet_cache()
 
         # Send Telegram message upon deletion
-        send_telegram_message(f"🗑️ {len(products_to_delete)} products deleted: {', '.join([p.productcode for p in products_to_delete])}.")
-        # Return a success message
-        return {"detail": f"{len(products_to_delete)} products deleted successfully"}
+        send_telegram_message(f"🗑️ {len(deleted)} products deleted: {', '.join([productcode for _, productcode in deleted])}.")
+        # Return a success message with the affected rows
+        return {
+            "detail": f"{len(deleted)} products deleted successfully",
+            "deleted": len(deleted),
+            "ids": deleted_ids,
+        }
+    except HTTPException:
+        raise
     except Exception as e:
         # Send Telegram message only in case of an error
         send_telegram_message(f"❌ Error deleting multiple products: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+# Import products (streamed CSV / NDJSON, upserted on productcode in batches)
+def load_import_references(db: Session) -> dict:
+    """Pre-load the IDs a ProductCreate row may reference, so rows are validated without queries."""
+    return {
+        "brand_id": lookup_table(Brand).ids(db),
+        "model_id": lookup_table(Model).ids(db),
+        "color_id": lookup_table(Color).ids(db),
+        "category_id": lookup_table(Category).ids(db),
+        "status_id": lookup_table(StockStatus).ids(db),
+        "stockItemId": {item_id for (item_id,) in db.query(StockItem.itemId)},
+    }
+
+
+def validate_import_record(record: dict, references: dict) -> ProductCreate:
+    """Validate one imported row; raises ValueError with a readable message."""
+    # Empty CSV cells of optional fields fall back to the schema defaults
+    record = {
+        field: value for field, value in record.items()
+        if value != "" or field not in ProductCreate.model_fields or ProductCreate.model_fields[field].is_required()
+    }
+    try:
+        product = ProductCreate(**record)
+    except ValidationError as e:
+        raise ValueError("; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()))
+
+    invalid = [field for field, ids in references.items() if getattr(product, field) not in ids]
+    if invalid:
+        raise ValueError(f"Invalid foreign key references: {', '.join(invalid)}")
+    return product
+
+
+def upsert_product_batch(db: Session, products: list[ProductCreate]) -> dict:
+    """Insert or update (on productcode) a batch of products and commit it as one transaction."""
+    # Last row wins when a productcode repeats inside the batch
+    rows = {product.productcode: product_create_values(product) for product in products}
+    codes = list(rows)
+    existing = {code for (code,) in db.query(Product.productcode).filter(Product.productcode.in_(codes))}
+    now = get_current_cambodia_time()
+
+    try:
+        insert = dialect_insert(db, Product)
+        if insert is not None:
+            update_columns = [column for column in next(iter(rows.values())) if column != "productcode"]
+            statement = insert.on_conflict_do_update(
+                index_elements=[Product.productcode],
+                set_={**{column: insert.excluded[column] for column in update_columns}, "updated_at": now},
+            )
+            db.execute(statement, list(rows.values()))
+        else:
+            ids = dict(db.query(Product.productcode, Product.id).filter(Product.productcode.in_(existing)))
+            if existing:
+                db.execute(update(Product), [{**rows[code], "id": ids[code], "updated_at": now} for code in existing])
+            new_rows = [row for code, row in rows.items() if code not in existing]
+            if new_rows:
+                db.execute(sql_insert(Product), new_rows)
+
+        # Keep the search index in the same transaction as the rows
+        db_products = db.query(Product).filter(Product.productcode.in_(codes)).all()
+        product_ids = [product.id for product in db_products]
+        index_products(db, db_products)
+        refresh_catalog(db, product_ids)
+        # Read before the commit expires the instances
+        entries = autocomplete_entries(db, db_products)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    product_cache.invalidate(product_ids)
+    autocomplete_index.upsert_products(entries)
+    clear_facet_cache()
+    return {"inserted": len(codes) - len(existing), "updated": len(existing)}
+
+
+async def import_products(chunks: AsyncIterator[bytes], fmt: str, batch_size: int = PRODUCT_IMPORT_BATCH_SIZE):
+    """
+    Stream-import products, yielding NDJSON report lines: one per rejected row,
+    one per committed batch and a final summary.
+    """
+    # The request-scoped session is closed before a streamed body finishes, so use our own
+    db = SessionLocal()
+    summary = {"inserted": 0, "updated": 0, "failed": 0, "batches": 0}
+    batch = []
+
+    async def flush():
+        result = await run_in_threadpool(upsert_product_batch, db, [product for _, product in batch])
+        summary["inserted"] += result["inserted"]
+        summary["updated"] += result["updated"]
+        summary["batches"] += 1
+        report = {"batch": summary["batches"], "lines": [batch[0][0], batch[-1][0]], **result}
+        batch.clear()
+        return json.dumps(report) + "\n"
+
+    try:
+        references = await run_in_threadpool(load_import_references, db)
+        async for line_no, record in iter_import_records(chunks, fmt):
+            try:
+                if isinstance(record, Exception):
+                    raise record
+                batch.append((line_no, validate_import_record(record, references)))
+            except ValueError as e:
+                summary["failed"] += 1
+                yield json.dumps({"line": line_no, "error": str(e)}) + "\n"
+                continue
+
+            if len(batch) >= batch_size:
+                yield await flush()
+
+        if batch:
+            yield await flush()
+    except Exception as e:
+        # Batches already committed stay committed; report where the import stopped
+        send_telegram_message(f"❌ Error importing products after {summary['batches']} batches: {str(e)}")
+        yield json.dumps({"error": "Import aborted", "detail": str(e), "summary": summary}) + "\n"
+        return
+    finally:
+        db.close()
+
+    if summary["failed"]:
+        send_telegram_message(f"⚠️ Product import finished with {summary['failed']} rejected rows ({summary['inserted']} inserted, {summary['updated']} updated).")
+    yield json.dumps({"summary": summary}) + "\n"
+
+
+# Bulk update products: one UPDATE per distinct patch
+def bulk_update_products(db: Session, bulk: ProductBulkUpdate) -> ProductBulkUpdateResponse:
+    # Group ids by patch, so items sharing the same change are updated together
+    if bulk.items is not None:
+        groups = {}
+        for item in bulk.items:
+            patch = item.patch.dict(exclude_none=True)
+            groups.setdefault(tuple(sorted(patch.items())), []).append(item.id)
+    else:
+        groups = {tuple(sorted(bulk.patch.dict(exclude_none=True).items())): list(bulk.ids)}
+
+    if any(not patch for patch in groups):
+        raise HTTPException(status_code=400, detail="Each patch must set at least one field")
+
+    requested = {product_id for ids in groups.values() for product_id in ids}
+    updated_ids = set()
+    now = get_current_cambodia_time()
+
+    try:
+        for patch, ids in groups.items():
+            statement = (
+                update(Product)
+                .where(Product.id.in_(ids))
+                .values(**dict(patch), updated_at=now)
+                .execution_options(synchronize_session=False)
+            )
+            if db.get_bind().dialect.update_returning:
+                updated_ids.update(product_id for (product_id,) in db.execute(statement.returning(Product.id)))
+            else:
+                updated_ids.update(product_id for (product_id,) in db.query(Product.id).filter(Product.id.in_(ids)))
+                db.execute(statement)
+
+        # Re-index the updated products for search in the same transaction
+        db_products = db.query(Product).filter(Product.id.in_(updated_ids)).populate_existing().all()
+        index_products(db, db_products)
+        refresh_catalog(db, updated_ids)
+        # Read before the commit expires the instances
+        entries = autocomplete_entries(db, db_products)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        send_telegram_message(f"❌ Error bulk updating products: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+    product_cache.invalidate(updated_ids)
+    autocomplete_index.upsert_products(entries)
+    clear_facet_cache()
+
+    return ProductBulkUpdateResponse(
+        updated=len(updated_ids),
+        ids=sorted(updated_ids),
+        missing=sorted(requested - updated_ids),
+    )
+
+
+# Export products (streamed from a server-side cursor, one row in memory at a time)
+def iter_product_export():
+    """Yield every product in the ProductResponse shape without loading ORM objects."""
+    stock_category = aliased(Category)
+    stock_status = aliased(StockStatus)
+    statement = (
+        select(
+            Product.id, Product.productcode, Product.title, Product.price, Product.description,
+            Brand.name.label("brand_name"), Model.name.label("model_name"), Color.name.label("color_name"),
+            Category.name.label("category_name"), Product.discount, Product.rating, Product.warranty,
+            StockStatus.name.label("stock_status_name"), Product.image, Product.created_at, Product.stock_item_id,
+            StockItem.item_name, StockItem.quantity_in_stock, StockItem.expiry_date, StockItem.barcode,
+            Unit.name.label("unit_name"), stock_category.name.label("stock_category_name"),
+            stock_status.name.label("stock_item_status"),
+        )
+        .outerjoin(Brand, Brand.id == Product.brand_id)
+        .outerjoin(Model, Model.id == Product.model_id)
+        .outerjoin(Color, Color.id == Product.color_id)
+        .outerjoin(Category, Category.id == Product.category_id)
+        .outerjoin(StockStatus, StockStatus.id == Product.stock_status_id)
+        .outerjoin(StockItem, StockItem.itemId == Product.stock_item_id)
+        .outerjoin(Unit, Unit.id == StockItem.unit_id)
+        .outerjoin(stock_category, stock_category.id == StockItem.category_id)
+        .outerjoin(stock_status, stock_status.id == StockItem.stock_status_id)
+        .order_by(Product.id)
+        .execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE)
+    )
+
+    # The request-scoped session is closed before a streamed body finishes, so use our own (on a replica if any)
+    with SessionLocal(use_replica=True) as db:
+        for row in db.execute(statement).mappings():
+            yield {
+                "id": row["id"],
+                "productcode": row["productcode"],
+                "title": row["title"],
+                "price": row["price"],
+                "description": row["description"],
+                "brand_name": row["brand_name"],
+                "model_name": row["model_name"],
+                "color_name": row["color_name"],
+                "category_name": row["category_name"],
+                "discount": row["discount"],
+                "rating": row["rating"],
+                "warranty": row["warranty"],
+                "stock_status_name": row["stock_status_name"],
+                "image": row["image"],
+                "created_at": row["created_at"],
+                "stock_item_id": row["stock_item_id"],
+                "stockItem": {
+                    "itemId": row["stock_item_id"],
+                    "itemName": row["item_name"],
+                    "quantityInStock": row["quantity_in_stock"],
+                    "expiryDate": row["expiry_date"].date() if row["expiry_date"] else None,
+                    "unitName": row["unit_name"],
+                    "categoryName": row["stock_category_name"],
+                    "status": row["stock_item_status"],
+                    "barcode": row["barcode"],
+                },
+            }
@@ -0,0 +1,102 @@
+# app/api/products/facets.py
+
+import os
+import threading
+
+from cachetools import TTLCache
+from fastapi import HTTPException
+from sqlalchemy import func, literal, select, union_all
+from sqlalchemy.orm import Query, Session
+
+from app.db.models.product import Product
+from app.db.models.utility import Brand, Category, Color, Model, StockStatus
+
+# Facet name -> (product foreign key, lookup model holding the display name)
+FACETS = {
+    "brand": (Product.brand_id, Brand),
+    "model": (Product.model_id, Model),
+    "color": (Product.color_id, Color),
+    "category": (Product.category_id, Category),
+    "stock_status": (Product.stock_status_id, StockStatus),
+}
+
+# Facet counts for recently seen filter sets; cleared on every product write. The cache is per
+# worker process and only the worker making a write clears it, so other workers may serve counts
+# up to FACET_CACHE_TTL seconds old; keep the TTL short.
+facet_cache = TTLCache(
+    maxsize=int(os.getenv("FACET_CACHE_MAXSIZE", 1024)),
+    ttl=int(os.getenv("FACET_CACHE_TTL", 60)),
+)
+_facet_cache_lock = threading.Lock()
+
+
+def parse_facets(facets: str) -> list[str]:
+    """Parse the comma separated `facets` parameter into a sorted list of known facet names."""
+    names = sorted({name.strip() for name in facets.split(",") if name.strip()})
+    unknown = [name for name in names if name not in FACETS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Invalid facet(s): {', '.join(unknown)}")
+    return names
+
+
+def facet_cache_key(filters: dict, names: list[str]) -> tuple:
+    """Normalize filters so equivalent searches (case, whitespace, unset values) share a cache entry."""
+    normalized = tuple(sorted(
+        (key, value.strip().lower() if isinstance(value, str) else value)
+        for key, value in filters.items() if value is not None and value != ""
+    ))
+    return normalized, tuple(names)
+
+
+def count_facets(db: Session, query: Query, names: list[str]) -> dict:
+    """
+    Count products per facet value for a filtered product query in a single statement.
+
+    The filtered products are computed once in a CTE and each facet is a GROUP BY over it,
+    combined with UNION ALL (portable to SQLite, which has no GROUPING SETS).
+    """
+    # The query may select Product or the catalog read model, which share the column names
+    entity = query.column_descriptions[0]["entity"]
+    columns = [entity.id] + [getattr(entity, FACETS[name][0].key) for name in names]
+    filtered = query.order_by(None).with_entities(*columns).cte("faceted_products")
+
+    selects = []
+    for name in names:
+        fk, lookup = FACETS[name]
+        selects.append(
+            select(
+                literal(name).label("facet"),
+                lookup.id.label("id"),
+                lookup.name.label("name"),
+                func.count().label("count"),
+            )
+            .select_from(filtered.join(lookup, lookup.id == filtered.c[fk.key]))
+            .group_by(lookup.id, lookup.name)
+        )
+
+    counts = {name: [] for name in names}
+    for facet, value_id, value_name, count in db.execute(union_all(*selects)):
+        counts[facet].append({"id": value_id, "name": value_name, "count": count})
+    for values in counts.values():
+        values.sort(key=lambda value: (-value["count"], value["name"] or ""))
+    return counts
+
+
+def get_facets(db: Session, query: Query, filters: dict, names: list[str]) -> dict:
+    """Return facet counts for the filter set, from the cache when possible."""
+    key = facet_cache_key(filters, names)
+    with _facet_cache_lock:
+        cached = facet_cache.get(key)
+    if cached is not None:
+        return cached
+
+    counts = count_facets(db, query, names)
+    with _facet_cache_lock:
+        facet_cache[key] = counts
+    return counts
+
+
+def clear_facet_cache():
+    """Drop all cached facet counts; call after products are written."""
+    with _facet_cache_lock:
+        facet_cache.clear()
@@ -1,21 +1,120 @@
 # app/api/products/helper.py
 
-from sqlalchemy import desc
-from sqlalchemy.orm import Session
+import codecs
+import csv
+import json
+from typing import AsyncIterator
+from sqlalchemy.orm import Query, Session, joinedload, load_only
+from app.api.products.search import apply_text_search
+from app.db.models.catalog import ProductCatalogView
 from app.db.models.product import Product
 from app.db.models.utility import Brand, Model, Color, Category, StockStatus
 from app.db.models.inventory import StockItem
-from app.schemas.product import ProductResponse, StockItemResponse
+from app.schemas.product import ProductCreate, ProductResponse, StockItemResponse
+from app.utility.lookups import lookup_table
+from app.utility.pagination import order_by_clauses
 from fastapi import HTTPException
 
+# Helper function to map a ProductCreate payload onto Product columns
+def product_create_values(product: ProductCreate) -> dict:
+    return dict(
+        productcode=product.productcode,
+        title=product.title,
+        price=product.price,
+        description=product.description,
+        brand_id=product.brand_id,
+        model_id=product.model_id,
+        color_id=product.color_id,
+        category_id=product.category_id,
+        discount=product.discount,
+        rating=product.rating,
+        warranty=product.warranty,
+        stock_status_id=product.status_id,
+        image=product.image,
+        stock_item_id=product.stockItemId,  # Ensure this is passed as string if `itemId` is a string
+    )
+
+# Helper function to parse a streamed CSV or NDJSON body (or a JSON array) into (line number, record)
+# pairs, yielding an exception instead of a record for lines that can't be parsed
+async def iter_import_records(chunks: AsyncIterator[bytes], fmt: str):
+    if fmt == "json":
+        # An array can't be split on newlines, so it is parsed once the whole body arrived;
+        # the "line number" of each record is its position in the array
+        try:
+            records = json.loads(b"".join([chunk async for chunk in chunks]))
+            if not isinstance(records, list):
+                raise ValueError("expected a JSON array")
+        except ValueError as e:
+            yield 1, e
+            return
+        for position, record in enumerate(records, 1):
+            yield position, record if isinstance(record, dict) else ValueError("expected a JSON object")
+        return
+
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    header = None
+    buffer = ""
+    pending = ""  # CSV record spanning several lines (newline inside a quoted field)
+    line_no = 0
+
+    async def lines():
+        nonlocal buffer
+        async for chunk in chunks:
+            buffer += decoder.decode(chunk)
+            *complete, buffer = buffer.split("\n")
+            for line in complete:
+                yield line.rstrip("\r")
+        buffer += decoder.decode(b"", final=True)
+        if buffer.strip():
+            yield buffer.rstrip("\r")
+
+    async for line in lines():
+        line_no += 1
+        if fmt == "ndjson":
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise ValueError("expected a JSON object")
+                yield line_no, record
+            except ValueError as e:
+                yield line_no, e
+            continue
+
+        # CSV: an odd number of quotes means a quoted field continues on the next line
+        pending = f"{pending}\n{line}" if pending else line
+        if pending.count('"') % 2:
+            continue
+        record_text, pending = pending, ""
+        if not record_text.strip():
+            continue
+        values = next(csv.reader([record_text]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) != len(header):
+            yield line_no, ValueError(f"expected {len(header)} columns, got {len(values)}")
+            continue
+        yield line_no, dict(zip(header, values))
+
+    if pending:
+        yield line_no, ValueError("unterminated quoted field")
+
 # Helper function to get related models for a product
 def get_related_models(db: Session, db_product: Product):
-    brand = db.query(Brand).filter(Brand.id == db_product.brand_id).first()
-    model = db.query(Model).filter(Model.id == db_product.model_id).first()
-    color = db.query(Color).filter(Color.id == db_product.color_id).first()
-    category = db.query(Category).filter(Category.id == db_product.category_id).first()
-    status = db.query(StockStatus).filter(StockStatus.id == db_product.stock_status_id).first()
-    stock_item = db.query(StockItem).filter(StockItem.itemId == db_product.stock_item_id).first()
+    # Reference rows come from the in-memory lookup tables; only the stock item hits the DB
+    brand = lookup_table(Brand).get(db, db_product.brand_id)
+    model = lookup_table(Model).get(db, db_product.model_id)
+    color = lookup_table(Color).get(db, db_product.color_id)
+    category = lookup_table(Category).get(db, db_product.category_id)
+    status = lookup_table(StockStatus).get(db, db_product.stock_status_id)
+    stock_item = (
+        db.query(StockItem)
+        .options(joinedload(StockItem.unit), joinedload(StockItem.category), joinedload(StockItem.stock_status))
+        .filter(StockItem.itemId == db_product.stock_item_id)
+        .first()
+    )
 
     # Validate that all related models exist
     if not (brand and model and color and category and status and stock_item):
@@ -23,6 +122,90 @@ def get_related_models(db: Session, db_product: Product):
 
     return brand, model, color, category, status, stock_item
 
+# Helper function to build responses from product_catalog_view rows, which already carry
+# every lookup name and the embedded stock item, so no related rows are loaded
+def build_catalog_responses(rows: list[ProductCatalogView]) -> list[ProductResponse]:
+    products = []
+    for row in rows:
+        # Validate that all related models existed when the row was written
+        if not (row.brand_name and row.model_name and row.color_name and row.category_name
+                and row.stock_status_name and row.stock_item_name):
+            raise HTTPException(status_code=400, detail="Invalid foreign key references")
+
+        products.append(ProductResponse(
+            id=row.id,
+            productcode=row.productcode,
+            title=row.title,
+            price=row.price,
+            description=row.description,
+            brand_name=row.brand_name,
+            model_name=row.model_name,
+            color_name=row.color_name,
+            category_name=row.category_name,
+            discount=row.discount,
+            rating=row.rating,
+            warranty=row.warranty,
+            stock_status_name=row.stock_status_name,
+            image=row.image,
+            created_at=row.created_at,
+            stock_item_id=row.stock_item_id,
+            stockItem=StockItemResponse(
+                itemId=row.stock_item_id,
+                itemName=row.stock_item_name,
+                quantityInStock=row.stock_quantity_in_stock,
+                expiryDate=row.stock_expiry_date.isoformat() if row.stock_expiry_date else None,
+                unitName=row.stock_unit_name,
+                categoryName=row.stock_category_name,
+                status=row.stock_status,
+                barcode=row.stock_barcode
+            )
+        ))
+    return products
+
+# Catalog columns holding the embedded stockItem block
+STOCK_ITEM_COLUMNS = [
+    ProductCatalogView.stock_item_id,
+    ProductCatalogView.stock_item_name,
+    ProductCatalogView.stock_quantity_in_stock,
+    ProductCatalogView.stock_expiry_date,
+    ProductCatalogView.stock_unit_name,
+    ProductCatalogView.stock_category_name,
+    ProductCatalogView.stock_status,
+    ProductCatalogView.stock_barcode,
+]
+
+# Helper function to load only the catalog columns behind the requested response fields
+# (plus the sort keys, which the pagination cursor reads). Every other ProductResponse
+# field has a catalog column of the same name.
+def with_catalog_fields(query: Query, fields: list[str], sort_spec: list = None) -> Query:
+    columns = {column.key: column for column, _ in sort_spec or []}
+    for field in fields:
+        for column in STOCK_ITEM_COLUMNS if field == "stockItem" else [getattr(ProductCatalogView, field)]:
+            columns[column.key] = column
+    return query.options(load_only(*columns.values()))
+
+# Helper function to build sparse product dicts holding only the requested fields
+def build_catalog_fields(rows: list[ProductCatalogView], fields: list[str]) -> list[dict]:
+    products = []
+    for row in rows:
+        product = {}
+        for field in fields:
+            if field == "stockItem":
+                product[field] = dict(
+                    itemId=row.stock_item_id,
+                    itemName=row.stock_item_name,
+                    quantityInStock=row.stock_quantity_in_stock,
+                    expiryDate=row.stock_expiry_date.date() if row.stock_expiry_date else None,
+                    unitName=row.stock_unit_name,
+                    categoryName=row.stock_category_name,
+                    status=row.stock_status,
+                    barcode=row.stock_barcode,
+                )
+            else:
+                product[field] = getattr(row, field)
+        products.append(product)
+    return products
+
 # Helper function to build the response for a product and its stock item
 def build_product_response(db_product: Product, brand, model, color, category, status, stock_item):
     # Convert expiry_date to string if it's a datetime object
@@ -57,6 +240,45 @@ def build_product_response(db_product: Product, brand, model, color, category, s
         )
     )
 
+# Columns accepted by the `sort_by` and `sort` search parameters
+SORT_COLUMNS = {
+    'price': Product.price,
+    'title': Product.title,
+    'rating': Product.rating,
+    'created_at': Product.created_at,
+}
+
+# Helper function to turn sort_by/sort_order into a sort spec, with `id` as a unique tiebreak.
+# `entity` is Product or the catalog read model, which share the sort column names.
+def get_sort_spec(sort_by: str = None, sort_order: str = 'asc', entity=ProductCatalogView):
+    descending = sort_order == 'desc'
+    if not sort_by:
+        return [(entity.id, descending)]
+    return parse_sort(f"-{sort_by}" if descending else sort_by, entity)
+
+# Helper function to parse a multi-key sort such as "-price,rating" (a leading "-" sorts that key
+# descending) into a sort spec. An `id` tiebreak in the direction of the last key is appended so
+# the order is total and pages are stable across requests. Every nullable key sorts its NULLs last
+# (see order_by_clauses), in ORDER BY as well as in the cursor condition.
+def parse_sort(sort: str, entity=ProductCatalogView):
+    spec = []
+    seen = set()
+    for key in (part.strip() for part in sort.split(",")):
+        if not key:
+            continue
+        descending = key.startswith("-")
+        name = key.lstrip("-+")
+        if name not in SORT_COLUMNS:
+            raise HTTPException(status_code=400, detail=f"Invalid sort field: {name}")
+        if name in seen:
+            raise HTTPException(status_code=400, detail=f"Duplicate sort field: {name}")
+        seen.add(name)
+        spec.append((getattr(entity, SORT_COLUMNS[name].key), descending))
+
+    if not spec:
+        raise HTTPException(status_code=400, detail="Invalid sort field")
+    return spec + [(entity.id, spec[-1][1])]
+
 # Helper function to search
 def apply_filters(
     db: Session, 
@@ -73,61 +295,42 @@ def apply_filters(
     sort_by: str = None,  # New parameter for sorting
     sort_order: str = 'asc'  # New parameter for sort direction (default is 'asc')
 ):
-    query = db.query(Product)
+    query = db.query(ProductCatalogView)
 
     # Filter by id if provided
     if id:
-        query = query.filter(Product.id == id)
-    
-    # Filter by title if provided (case-insensitive partial match)
-    if title:
-        query = query.filter(Product.title.ilike(f"%{title}%"))
+        query = query.filter(ProductCatalogView.id == id)
     
     # Filter by price range if provided
     if min_price is not None:
-        query = query.filter(Product.price >= min_price)
+        query = query.filter(ProductCatalogView.price >= min_price)
     if max_price is not None:
-        query = query.filter(Product.price <= max_price)
+        query = query.filter(ProductCatalogView.price <= max_price)
 
-    # Filter by category name if provided
-    if category_name:
-        query = query.join(Category).filter(Category.name.ilike(f"%{category_name}%"))
+    # Filter by category, model, brand, color and stock status names if provided. Names are
+    # resolved to IDs from the in-memory lookup tables so the product query needs no joins
+    # and uses the foreign key indexes on the catalog.
+    for name, model, foreign_key in (
+        (category_name, Category, ProductCatalogView.category_id),
+        (model_name, Model, ProductCatalogView.model_id),
+        (brand_name, Brand, ProductCatalogView.brand_id),
+        (color_name, Color, ProductCatalogView.color_id),
+        (stock_status_name, StockStatus, ProductCatalogView.stock_status_id),
+    ):
+        if name:
+            query = query.filter(foreign_key.in_(lookup_table(model).ids_matching(db, name)))
     
-    # Filter by model name if provided
-    if model_name:
-        query = query.join(Model).filter(Model.name.ilike(f"%{model_name}%"))
-    
-    # Filter by brand name if provided
-    if brand_name:
-        query = query.join(Brand).filter(Brand.name.ilike(f"%{brand_name}%"))
-    
-    # Filter by color name if provided
-    if color_name:
-        query = query.join(Color).filter(Color.name.ilike(f"%{color_name}%"))
-    
-    # Filter by stock status name if provided
-    if stock_status_name:
-        query = query.join(StockStatus).filter(StockStatus.name.ilike(f"%{stock_status_name}%"))
-    
-    # Filter by product code if provided
-    if productcode:
-        query = query.filter(Product.productcode.ilike(f"%{productcode}%"))
-
-    # Sort products if sort_by is provided
-    if sort_by:
-        if sort_by == 'price':
-            query = query.order_by(Product.price)
-        elif sort_by == 'title':
-            query = query.order_by(Product.title)
-        elif sort_by == 'rating':
-            query = query.order_by(Product.rating)
-        elif sort_by == 'created_at':
-            query = query.order_by(Product.created_at)
-        else:
-            raise HTTPException(status_code=400, detail="Invalid sort field")
-
-        # Apply sort direction (ascending or descending)
-        if sort_order == 'desc':
-            query = query.order_by(desc(sort_by))
+    # Filter by title and product code if provided (full-text prefix match, ILIKE without an index)
+    rank = None
+    if title or productcode:
+        query, rank = apply_text_search(db, query, title=title, productcode=productcode, entity=ProductCatalogView)
+
+    # Order by relevance when requested, best matches first (id order when there is nothing to rank)
+    if sort_by == 'relevance':
+        query = query.order_by(*([rank] if rank is not None else []), ProductCatalogView.id)
+
+    # Sort products if sort_by is provided (the direction applies to the sort column and the id tiebreak)
+    elif sort_by:
+        query = query.order_by(*order_by_clauses(get_sort_spec(sort_by, sort_order, ProductCatalogView)))
 
     return query
\ No newline at end of file
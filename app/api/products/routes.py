@@ -1,10 +1,16 @@
 # app/api/products/routes.py
 
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, Query
-from app.schemas.product import ProductCreate, ProductResponse, ProductUpdate, ProductUpdateResponse
-from app.api.products.controllers import create_product, delete_multiple_products, delete_product, get_all_products, get_limited_products, get_single_product, search_products, update_product
-from app.db.config import get_db  
+from typing import List, Union
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from app.schemas.product import ProductBatchRequest, ProductBatchResponse, ProductBulkUpdate, ProductBulkUpdateResponse, ProductCreate, ProductResponse, ProductSearchResponse, ProductSuggestion, ProductUpdate, ProductUpdateResponse
+from app.api.products.controllers import PRODUCT_IMPORT_BATCH_SIZE, autocomplete_products, bulk_update_products, create_product, import_products, iter_product_export, delete_multiple_products, delete_product, get_all_products, get_limited_products, get_product_cache_stats, get_products_batch, get_product_version, get_products_version, get_single_product, search_products, update_product
+from app.db.config import ReadSession, get_db, get_read_db
+from app.utility.etag import check_not_modified
+from app.utility.export import export_response
+from app.utility.fields import sparse_response
+from app.utility.serialization import trusted_json_response
+from app.utility.pagination import set_next_cursor
+from app.utility.streaming import RequestStreamingResponse
 from sqlalchemy.orm import Session
 
 
@@ -20,30 +26,104 @@ def create_product_route(
         raise e
 
 
+# Bulk import: stream a CSV (header row + one product per line) or NDJSON body of ProductCreate rows
+@products.post("/import")
+def import_products_route(
+    request: Request,
+    format: str = Query(None, regex="^(csv|ndjson)$"),  # Defaults to the request Content-Type
+    batch_size: int = Query(PRODUCT_IMPORT_BATCH_SIZE, ge=1, le=10000),  # Rows per committed batch
+):
+    fmt = format or ("csv" if "csv" in request.headers.get("content-type", "") else "ndjson")
+    return RequestStreamingResponse(
+        import_products(request.stream(), fmt, batch_size=batch_size),
+        media_type="application/x-ndjson",
+    )
+
+
+# Export the whole catalog as NDJSON or CSV, streamed row by row
+@products.get("/export")
+def export_products_route(format: str = Query("ndjson", regex="^(ndjson|csv)$")):
+    return export_response(iter_product_export(), format, filename="products")
+
+
+# Bulk update: apply one patch to many ids, or a per-id list of patches
+@products.patch("/products/bulk", response_model=ProductBulkUpdateResponse)
+def bulk_update_products_route(bulk: ProductBulkUpdate, db: Session = Depends(get_db)):
+    return bulk_update_products(db=db, bulk=bulk)
+
+
 @products.put("/products/{product_id}", response_model=ProductUpdateResponse)
 def update_product_route(product_id: int, product_data: ProductUpdate, db: Session = Depends(get_db)):
     return update_product(db=db, product_id=product_id, product_data=product_data)
 
 @products.get("/products/", response_model=List[ProductResponse])
-def get_products_route(db: Session = Depends(get_db)):
-    return get_all_products(db=db)
+async def get_products_route(
+    request: Request,
+    response: Response,
+    limit: int = Query(None, ge=1),  # Optional page size, the whole catalog is returned without it
+    cursor: str = Query(None),  # Cursor from the X-Next-Cursor header of the previous page
+    fields: str = Query(None),  # Optional sparse fieldset, e.g. "id,title,price"
+    db: ReadSession = Depends(get_read_db)
+):
+    # Answer 304 from the collection version alone when the client's copy is current
+    not_modified = check_not_modified(request, response, await db.run(get_products_version))
+    if not_modified:
+        return not_modified
+    products, next_cursor = await db.run(get_all_products, limit=limit, cursor=cursor, fields=fields)
+    set_next_cursor(response, next_cursor)
+    if fields:
+        return sparse_response(response, products)
+    # The controller built the ProductResponse objects, so skip re-validating them
+    return trusted_json_response(response, products, List[ProductResponse])
     
     
+# Batch get: many products in one round trip, e.g. ?ids=1,2,3 (POST the ids for long lists)
+@products.get("/products/batch", response_model=ProductBatchResponse)
+async def get_products_batch_route(response: Response, ids: str = Query(..., regex=r"^\s*\d+\s*(,\s*\d+\s*)*$"), db: ReadSession = Depends(get_read_db)):
+    batch = await db.run(get_products_batch, product_ids=[int(product_id) for product_id in ids.split(",")])
+    return trusted_json_response(response, batch, ProductBatchResponse)
+
+
+@products.post("/products/batch", response_model=ProductBatchResponse)
+async def post_products_batch_route(response: Response, batch: ProductBatchRequest, db: ReadSession = Depends(get_read_db)):
+    return trusted_json_response(response, await db.run(get_products_batch, product_ids=batch.ids), ProductBatchResponse)
+
+
 @products.get("/products/{product_id}", response_model=ProductResponse)
-def get_product_route(product_id: int, db: Session = Depends(get_db)):
-    return get_single_product(db=db, product_id=product_id)
+async def get_product_route(product_id: int, request: Request, response: Response, db: ReadSession = Depends(get_read_db)):
+    version = await db.run(get_product_version, product_id)
+    if version:
+        not_modified = check_not_modified(request, response, version)
+        if not_modified:
+            return not_modified
+    # The cached body is only served for the version the ETag was built from
+    return await db.run(get_single_product, product_id=product_id, version=version)
 
 @products.get("/limit/products/", response_model=List[ProductResponse])
-def get_limited_products_route(
-    limit: int = Query(10, ge=1), db: Session = Depends(get_db)
+async def get_limited_products_route(
+    request: Request,
+    response: Response,
+    limit: int = Query(10, ge=1),
+    cursor: str = Query(None),  # Cursor from the X-Next-Cursor header of the previous page
+    fields: str = Query(None),  # Optional sparse fieldset, e.g. "id,title,price"
+    db: ReadSession = Depends(get_read_db)
 ):
     try:
-        return get_limited_products(db=db, limit=limit)
+        not_modified = check_not_modified(request, response, await db.run(get_products_version))
+        if not_modified:
+            return not_modified
+        products, next_cursor = await db.run(get_limited_products, limit=limit, cursor=cursor, fields=fields)
+        set_next_cursor(response, next_cursor)
+        if fields:
+            return sparse_response(response, products)
+        return trusted_json_response(response, products, List[ProductResponse])
     except HTTPException as e:
         raise e
 
-@products.get("/products/search/", response_model=List[ProductResponse])
-def search_products_route(
+@products.get("/products/search/", response_model=Union[List[ProductResponse], ProductSearchResponse])
+async def search_products_route(
+    request: Request,
+    response: Response,
     id: int = Query(None, ge=1),  # Optional product ID
     title: str = Query(None),  # Optional title search
     min_price: float = Query(None),  # Optional minimum price
@@ -54,13 +134,21 @@ def search_products_route(
     color_name: str = Query(None),  # Optional color name
     stock_status_name: str = Query(None),  # Optional stock status name
     productcode: str = Query(None),  # Optional product code
-    sort_by: str = Query(None, regex="^(price|title|rating|created_at)$"),  # Sort field
+    sort_by: str = Query(None, regex="^(price|title|rating|created_at|relevance)$"),  # Sort field
     sort_order: str = Query('asc', regex="^(asc|desc)$"),  # Sort order (default is 'asc')
-    db: Session = Depends(get_db)
+    sort: str = Query(None),  # Multi-key sort, e.g. "-price,rating" ("-" for descending)
+    limit: int = Query(None, ge=1),  # Optional page size
+    cursor: str = Query(None),  # Cursor from the X-Next-Cursor header of the previous page
+    facets: str = Query(None),  # Optional facets to count, e.g. "brand,category,color,stock_status"
+    fields: str = Query(None),  # Optional sparse fieldset, e.g. "id,title,price"
+    db: ReadSession = Depends(get_read_db)
 ):
     try:
-        return search_products(
-            db=db,
+        not_modified = check_not_modified(request, response, await db.run(get_products_version))
+        if not_modified:
+            return not_modified
+        products, next_cursor = await db.run(
+            search_products,
             id=id,
             title=title,
             min_price=min_price,
@@ -72,11 +160,34 @@ def search_products_route(
             stock_status_name=stock_status_name,
             productcode=productcode,
             sort_by=sort_by,  # Include sorting params in the query
-            sort_order=sort_order
+            sort_order=sort_order,
+            sort=sort,
+            limit=limit,
+            cursor=cursor,
+            facets=facets,
+            fields=fields
         )
+        set_next_cursor(response, next_cursor)
+        if fields:
+            return sparse_response(response, products)
+        content_type = ProductSearchResponse if isinstance(products, ProductSearchResponse) else List[ProductResponse]
+        return trusted_json_response(response, products, content_type)
     except HTTPException as e:
         raise e
     
+@products.get("/autocomplete", response_model=List[ProductSuggestion])
+def autocomplete_products_route(
+    q: str = Query(..., min_length=1),  # Partial text typed by the user
+    limit: int = Query(10, ge=1, le=50),  # Maximum number of suggestions
+    db: Session = Depends(get_db),  # Only used to check for other workers' writes, at most every few seconds
+):
+    return autocomplete_products(db, q=q, limit=limit)
+
+# Counters of the single-product response cache
+@products.get("/cache/stats", response_model=dict)
+def product_cache_stats_route():
+    return get_product_cache_stats()
+
 # DELETE 
 @products.delete("/products/{product_id}", response_model=dict)
 def delete_product_route(product_id: int, db: Session = Depends(get_db)):
@@ -0,0 +1,140 @@
+# app/api/products/search.py
+
+import logging
+import re
+
+from sqlalchemy import column, func, literal_column, table, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Query, Session
+
+from app.db.models.product import Product
+
+logger = logging.getLogger(__name__)
+
+# FTS5 virtual table shadowing products on SQLite, keyed by rowid = products.id
+FTS_TABLE = "products_fts"
+products_fts = table(FTS_TABLE, column("rowid"), column("title"), column("productcode"), column("rank"))
+
+# Words are runs of letters/digits; everything else (including "_" and "-") separates them
+_WORD = re.compile(r"[^\W_]+", re.UNICODE)
+
+# Set once the FTS5 table exists, so a missing FTS5 build falls back to ILIKE instead of failing
+_sqlite_fts_ready = False
+
+
+def _dialect(bind) -> str:
+    return bind.dialect.name
+
+
+def _tokens(term: str) -> list[str]:
+    return _WORD.findall(term.lower()) if term else []
+
+
+def _pg_vector(col):
+    # Must match the GIN index expressions created in init_search_index
+    return func.to_tsvector(literal_column("'simple'"), func.coalesce(col, literal_column("''")))
+
+
+def init_search_index(engine: Engine):
+    """Create the full-text index for products and backfill any products missing from it."""
+    global _sqlite_fts_ready
+    dialect = _dialect(engine)
+
+    if dialect == "sqlite":
+        try:
+            with engine.begin() as conn:
+                conn.execute(text(f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(title, productcode, tokenize='unicode61')"))
+                # Backfill products written while the index didn't exist
+                conn.execute(text(
+                    f"INSERT INTO {FTS_TABLE}(rowid, title, productcode) "
+                    "SELECT id, coalesce(title, ''), coalesce(productcode, '') FROM products "
+                    f"WHERE id NOT IN (SELECT rowid FROM {FTS_TABLE})"
+                ))
+            _sqlite_fts_ready = True
+        except OperationalError as e:
+            logger.warning("FTS5 is not available, product search falls back to ILIKE: %s", e)
+
+    elif dialect == "postgresql":
+        with engine.begin() as conn:
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_products_title_tsv ON products "
+                "USING GIN (to_tsvector('simple', coalesce(title, '')))"
+            ))
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_products_productcode_tsv ON products "
+                "USING GIN (to_tsvector('simple', coalesce(productcode, '')))"
+            ))
+
+
+def search_backend(db: Session):
+    """Return the text-search backend in use for this session, or None for plain ILIKE."""
+    dialect = _dialect(db.get_bind())
+    if dialect == "sqlite" and _sqlite_fts_ready:
+        return "sqlite"
+    if dialect == "postgresql":
+        return "postgresql"
+    return None
+
+
+def apply_text_search(db: Session, query: Query, title: str = None, productcode: str = None, entity=Product):
+    """
+    Filter a product query by title and/or product code through the full-text index.
+
+    Every word of a term must match the start of a word in the column (prefix match).
+    `entity` is the queried table keyed by product id (Product or the catalog read model).
+    :return: Tuple of (query, rank) where rank orders best matches first, or None without an index.
+    """
+    backend = search_backend(db)
+    terms = {"title": _tokens(title), "productcode": _tokens(productcode)}
+
+    if backend is None:
+        if title:
+            query = query.filter(entity.title.ilike(f"%{title}%"))
+        if productcode:
+            query = query.filter(entity.productcode.ilike(f"%{productcode}%"))
+        return query, None
+
+    # A term without any word characters can't match anything in the index
+    if (title and not terms["title"]) or (productcode and not terms["productcode"]):
+        return query.filter(literal_column("1") == 0), None
+
+    if backend == "sqlite":
+        match = " AND ".join(
+            f"{col} : (" + " AND ".join(f'"{word}"*' for word in words) + ")"
+            for col, words in terms.items() if words
+        )
+        query = query.join(products_fts, products_fts.c.rowid == entity.id).filter(
+            literal_column(FTS_TABLE).op("MATCH")(match)
+        )
+        # FTS5 rank is bm25, lower is better
+        return query, products_fts.c.rank.asc()
+
+    rank = None
+    for col, words in terms.items():
+        if not words:
+            continue
+        vector = _pg_vector(getattr(entity, col))
+        tsquery = func.to_tsquery(literal_column("'simple'"), " & ".join(f"{word}:*" for word in words))
+        query = query.filter(vector.op("@@")(tsquery))
+        col_rank = func.ts_rank(vector, tsquery)
+        rank = col_rank if rank is None else rank + col_rank
+    return query, rank.desc()
+
+
+def index_products(db: Session, db_products: list[Product]):
+    """Write products into the full-text index; call inside the transaction that saves them."""
+    if search_backend(db) != "sqlite" or not db_products:
+        return
+    remove_from_index(db, [p.id for p in db_products])
+    db.execute(
+        text(f"INSERT INTO {FTS_TABLE}(rowid, title, productcode) VALUES (:id, :title, :productcode)"),
+        [{"id": p.id, "title": p.title or "", "productcode": p.productcode or ""} for p in db_products],
+    )
+
+
+def remove_from_index(db: Session, product_ids: list[int]):
+    """Drop products from the full-text index; call inside the transaction that deletes them."""
+    if search_backend(db) != "sqlite" or not product_ids:
+        return
+    db.execute(products_fts.delete().where(products_fts.c.rowid.in_(product_ids)))
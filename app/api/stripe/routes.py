@@ -1,12 +1,14 @@
 import os
 from typing import List
 from dotenv import load_dotenv
-from fastapi import APIRouter, HTTPException, Request, Depends
+from fastapi import APIRouter, HTTPException, Query, Request, Depends, Response
 from sqlalchemy.orm import Session
 from app.db import get_db 
+from app.db.config import ReadSession, get_read_db
 from app.db.models.stripe import StripePayment
 from app.schemas.utility import PaymentListItem, PaymentRequest, PaymentStatusResponse
 from app.api.stripe.controllers import create_payment_intent, get_payment_status
+from app.utility.pagination import paginate, set_next_cursor
 import logging
 
 load_dotenv()
@@ -16,8 +18,9 @@ base_url = os.getenv("BASE_URL", "BASE_URL")
 
 stripe = APIRouter()
 
+# Sync routes: the Stripe SDK blocks on HTTP, so these run in the threadpool instead of on the event loop
 @stripe.post("/create-payment-intent")
-async def create_payment_intent_route(request: PaymentRequest, db: Session = Depends(get_db)):
+def create_payment_intent_route(request: PaymentRequest, db: Session = Depends(get_db)):
     try:
         # Call the controller to create the payment intent and store it in the DB
         client_secret, payment_intent_id = create_payment_intent(
@@ -33,7 +36,7 @@ async def create_payment_intent_route(request: PaymentRequest, db: Session = Dep
 
 
 @stripe.get("/payment/confirmation")
-async def payment_confirmation(request: Request, db: Session = Depends(get_db)):
+def payment_confirmation(request: Request, db: Session = Depends(get_db)):
     # Extract payment intent ID from the query parameters (Stripe appends this to the URL)
     payment_intent_id = request.query_params.get('payment_intent')
     
@@ -52,9 +55,9 @@ async def payment_confirmation(request: Request, db: Session = Depends(get_db)):
 
 
 @stripe.get("/payment-status/{payment_intent_id}", response_model=PaymentStatusResponse)
-async def payment_status_route(payment_intent_id: str, db: Session = Depends(get_db)):
+def payment_status_route(payment_intent_id: str, db: Session = Depends(get_db)):
     try:
-        # Call the controller to retrieve the payment status from the DB
+        # Call the controller to retrieve the payment status from the DB (sync: it also sends a Telegram alert)
         status = get_payment_status(payment_intent_id, db)
         return {"status": status}
     except Exception as e:
@@ -63,14 +66,23 @@ async def payment_status_route(payment_intent_id: str, db: Session = Depends(get
 
 
 @stripe.get("/all-payments", response_model=List[PaymentListItem])
-async def get_all_payments(db: Session = Depends(get_db)):
+async def get_all_payments(
+    response: Response,
+    limit: int = Query(None, ge=1),
+    cursor: str = Query(None),
+    db: ReadSession = Depends(get_read_db)
+):
     try:
-        # Query all payments from the database
-        stripe_payments = db.query(StripePayment).all()
+        # Query the page of payments from the database (all of them when no limit or cursor is given)
+        stripe_payments, next_cursor = await db.run(
+            lambda session: paginate(session.query(StripePayment), [(StripePayment.id, False)], cursor=cursor, limit=limit)
+        )
 
-        if not stripe_payments:
+        if not stripe_payments and cursor is None:
             raise HTTPException(status_code=404, detail="No payments found")
 
+        set_next_cursor(response, next_cursor)
+
         # Convert the list of payments into a response that includes `created_at_iso` as a string
         return [
             {
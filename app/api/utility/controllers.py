@@ -8,6 +8,7 @@ from app.db.models.utility import Brand, Category, Color, Model, StockStatus, Su
 from app.schemas.inventory import StockStatusCreate
 from app.schemas.utility import BrandCreate, BrandResponse, CategoryCreate, CategoryResponse, ColorCreate, ColorResponse, ContactInfo, ModelCreate, ModelResponse, RoleCreateRequest, RoleResponse, GenderCreateRequest, GenderResponse, StatusResponse, SupplierCreate, SupplierResponse, UnitCreate, UnitResponse
 from app.core.logging import logger
+from app.utility.lookups import lookup_registry
 
 
 
@@ -20,6 +21,7 @@ def create_brand(db: Session, brand: BrandCreate) -> BrandResponse:
     db.add(db_brand)
     db.commit()
     db.refresh(db_brand)
+    lookup_registry.bump_version(db, Brand)
     logger.info(f"Brand created: {brand.name}")
     return BrandResponse.from_orm(db_brand)
 
@@ -42,6 +44,7 @@ def create_category(db: Session, category: CategoryCreate) -> CategoryResponse:
     db.add(db_category)
     db.commit()
     db.refresh(db_category)
+    lookup_registry.bump_version(db, Category)
     logger.info(f"Category created: {category.name}")
     return CategoryResponse.from_orm(db_category)
 
@@ -64,6 +67,7 @@ def create_color(db: Session, color: ColorCreate) -> ColorResponse:
     db.add(db_color)
     db.commit()
     db.refresh(db_color)
+    lookup_registry.bump_version(db, Color)
     logger.info(f"Color created: {color.name}")
     return ColorResponse.from_orm(db_color)
 
@@ -86,6 +90,7 @@ def create_model(db: Session, model: ModelCreate) -> ModelResponse:
     db.add(db_model)
     db.commit()
     db.refresh(db_model)
+    lookup_registry.bump_version(db, Model)
     logger.info(f"Model created: {model.name}")
     return ModelResponse.from_orm(db_model)
 
@@ -113,6 +118,7 @@ def create_stock_status(db: Session, status: StockStatusCreate) -> StatusRespons
     db.add(db_status)
     db.commit()
     db.refresh(db_status)
+    lookup_registry.bump_version(db, StockStatus)
     logger.info(f"Stock status created: {status.name}")
     
     # Return the newly created stock status response
@@ -152,6 +158,7 @@ def create_supplier(db: Session, supplier: SupplierCreate) -> SupplierResponse:
     db.add(db_supplier)
     db.commit()
     db.refresh(db_supplier)
+    lookup_registry.bump_version(db, Supplier)
 
     logger.info(f"Supplier created: {db_supplier.name}")
     
@@ -223,6 +230,7 @@ def create_unit(db: Session, unit: UnitCreate) -> UnitResponse:
     db.add(db_unit)
     db.commit()
     db.refresh(db_unit)
+    lookup_registry.bump_version(db, Unit)
     logger.info(f"Unit created: {unit.name}")
     return UnitResponse.from_orm(db_unit)
 
@@ -253,6 +261,7 @@ def create_role(role_data: RoleCreateRequest, db: Session):
     db.add(new_role)
     db.commit()
     db.refresh(new_role)
+    lookup_registry.bump_version(db, Role)
 
     logger.info(f"New role created: {role_data.name}")
 
@@ -288,6 +297,7 @@ def create_gender(gender_data: GenderCreateRequest, db: Session):
     db.add(new_gender)
     db.commit()
     db.refresh(new_gender)
+    lookup_registry.bump_version(db, Gender)
     return GenderResponse(id=new_gender.id, name=new_gender.name)
 
 def get_all_genders(db: Session):
@@ -323,6 +333,7 @@ def create_role(role_data: RoleCreateRequest, db: Session):
     db.add(new_role)
     db.commit()
     db.refresh(new_role)
+    lookup_registry.bump_version(db, Role)
 
     logger.info(f"New role created: {role_data.name}")
 
@@ -367,6 +378,7 @@ def create_gender(gender_data: GenderCreateRequest, db: Session):
     db.add(new_gender)
     db.commit()
     db.refresh(new_gender)
+    lookup_registry.bump_version(db, Gender)
 
     logger.info(f"New gender created: {gender_data.name}")
 
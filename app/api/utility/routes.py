@@ -2,6 +2,7 @@ from typing import List
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from app.db import get_db
+from app.db.config import ReadSession, get_read_db
 from app.schemas.inventory import StockStatusCreate
 from app.schemas.utility import BrandCreate, BrandResponse, CategoryCreate, CategoryResponse, ColorCreate, ColorResponse, ModelCreate, ModelResponse, RoleCreateRequest, GenderCreateRequest, RoleResponse, GenderResponse, StatusResponse, SupplierCreate, SupplierResponse, UnitCreate, UnitResponse
 from app.api.utility.controllers import create_brand, create_category, create_color, create_model, create_role, create_gender, create_stock_status, create_supplier, create_unit, get_all_genders, get_all_roles, get_brand, get_brands, get_categories, get_category, get_color, get_colors, get_gender_by_id, get_model, get_models, get_role_by_id, get_stock_status, get_stock_statuses, get_supplier, get_suppliers, get_unit, get_units
@@ -19,13 +20,13 @@ def create_role_route(role_data: RoleCreateRequest, db: Session = Depends(get_db
 
 # Route for getting all roles
 @utility.get("/roles", response_model=list[RoleResponse])
-def get_roles(db: Session = Depends(get_db)):
-    return get_all_roles(db)
+async def get_roles(db: ReadSession = Depends(get_read_db)):
+    return await db.run(get_all_roles)
 
 # Route for getting a single role by ID
 @utility.get("/roles/{role_id}", response_model=RoleResponse)
-def get_role(role_id: int, db: Session = Depends(get_db)):
-    return get_role_by_id(role_id, db)
+async def get_role(role_id: int, db: ReadSession = Depends(get_read_db)):
+    return await db.run(lambda session: get_role_by_id(role_id, session))
 
 # Route for creating a new gender
 @utility.post("/gender", response_model=GenderResponse)
@@ -34,13 +35,13 @@ def create_gender_route(gender_data: GenderCreateRequest, db: Session = Depends(
 
 # Route for getting all genders
 @utility.get("/genders", response_model=list[GenderResponse])
-def get_genders(db: Session = Depends(get_db)):
-    return get_all_genders(db)
+async def get_genders(db: ReadSession = Depends(get_read_db)):
+    return await db.run(get_all_genders)
 
 # Route for getting a single gender by ID
 @utility.get("/genders/{gender_id}", response_model=GenderResponse)
-def get_gender(gender_id: int, db: Session = Depends(get_db)):
-    return get_gender_by_id(gender_id, db)
+async def get_gender(gender_id: int, db: ReadSession = Depends(get_read_db)):
+    return await db.run(lambda session: get_gender_by_id(gender_id, session))
 
 
 # Brand Routes
@@ -52,12 +53,12 @@ def create_brand_endpoint(brand: BrandCreate, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail=str(e))
 
 @utility.get("/brands", response_model=List[BrandResponse])
-def read_brands(db: Session = Depends(get_db)):
-    return get_brands(db)
+async def read_brands(db: ReadSession = Depends(get_read_db)):
+    return await db.run(get_brands)
 
 @utility.get("/brands/{brand_id}", response_model=BrandResponse)
-def read_brand(brand_id: int, db: Session = Depends(get_db)):
-    brand = get_brand(db, brand_id)
+async def read_brand(brand_id: int, db: ReadSession = Depends(get_read_db)):
+    brand = await db.run(get_brand, brand_id)
     if not brand:
         raise_not_found_exception("Brand")
     return brand
@@ -72,12 +73,12 @@ def create_category_endpoint(category: CategoryCreate, db: Session = Depends(get
         raise HTTPException(status_code=400, detail=str(e))
 
 @utility.get("/categories", response_model=List[CategoryResponse])
-def read_categories(db: Session = Depends(get_db)):
-    return get_categories(db)
+async def read_categories(db: ReadSession = Depends(get_read_db)):
+    return await db.run(get_categories)
 
 @utility.get("/categories/{category_id}", response_model=CategoryResponse)
-def read_category(category_id: int, db: Session = Depends(get_db)):
-    category = get_category(db, category_id)
+async def read_category(category_id: int, db: ReadSession = Depends(get_read_db)):
+    category = await db.run(get_category, category_id)
     if not category:
         raise_not_found_exception("Category")
     return category
@@ -92,12 +93,12 @@ def create_color_endpoint(color: ColorCreate, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail=str(e))
 
 @utility.get("/colors", response_model=List[ColorResponse])
-def read_colors(db: Session = Depends(get_db)):
-    return get_colors(db)
+async def read_colors(db: ReadSession = Depends(get_read_db)):
+    return await db.run(get_colors)
 
 @utility.get("/colors/{color_id}", response_model=ColorResponse)
-def read_color(color_id: int, db: Session = Depends(get_db)):
-    color = get_color(db, color_id)
+async def read_color(color_id: int, db: ReadSession = Depends(get_read_db)):
+    color = await db.run(get_color, color_id)
     if not color:
         raise_not_found_exception("Color")
     return color
@@ -112,12 +113,12 @@ def create_model_endpoint(model: ModelCreate, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail=str(e))
 
 @utility.get("/models", response_model=List[ModelResponse])
-def read_models(db: Session = Depends(get_db)):
-    return get_models(db)
+async def read_models(db: ReadSession = Depends(get_read_db)):
+    return await db.run(get_models)
 
 @utility.get("/models/{model_id}", response_model=ModelResponse)
-def read_model(model_id: int, db: Session = Depends(get_db)):
-    model = get_model(db, model_id)
+async def read_model(model_id: int, db: ReadSession = Depends(get_read_db)):
+    model = await db.run(get_model, model_id)
     if not model:
         raise_not_found_exception("Model")
     return model
@@ -139,20 +140,20 @@ def create_stock_status_endpoint(
         raise HTTPException(status_code=400, detail=str(e))
 
 @utility.get("/statuses", response_model=List[StatusResponse])
-def read_stock_statuses(db: Session = Depends(get_db)):
+async def read_stock_statuses(db: ReadSession = Depends(get_read_db)):
     """
     Endpoint to retrieve all stock statuses.
     """
-    return get_stock_statuses(db)
+    return await db.run(get_stock_statuses)
 
 @utility.get("/statuses/{status_id}", response_model=StatusResponse)
-def read_stock_status(
-    status_id: int, db: Session = Depends(get_db)
+async def read_stock_status(
+    status_id: int, db: ReadSession = Depends(get_read_db)
 ):
     """
     Endpoint to retrieve a stock status by ID.
     """
-    return get_stock_status(db, status_id)
+    return await db.run(get_stock_status, status_id)
 
 
 # Supplier Routes
@@ -167,13 +168,13 @@ def create_supplier_endpoint(supplier: SupplierCreate, db: Session = Depends(get
 
 
 @utility.get("/suppliers", response_model=List[SupplierResponse])
-def read_suppliers(db: Session = Depends(get_db)):
-    return get_suppliers(db)
+async def read_suppliers(db: ReadSession = Depends(get_read_db)):
+    return await db.run(get_suppliers)
 
 
 @utility.get("/suppliers/{supplier_id}", response_model=SupplierResponse)
-def read_supplier(supplier_id: int, db: Session = Depends(get_db)):
-    return get_supplier(db, supplier_id)
+async def read_supplier(supplier_id: int, db: ReadSession = Depends(get_read_db)):
+    return await db.run(get_supplier, supplier_id)
 
 
 
@@ -186,12 +187,12 @@ def create_unit_endpoint(unit: UnitCreate, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail=str(e))
 
 @utility.get("/units", response_model=List[UnitResponse])
-def read_units(db: Session = Depends(get_db)):
-    return get_units(db)
+async def read_units(db: ReadSession = Depends(get_read_db)):
+    return await db.run(get_units)
 
 @utility.get("/units/{unit_id}", response_model=UnitResponse)
-def read_unit(unit_id: int, db: Session = Depends(get_db)):
-    unit = get_unit(db, unit_id)
+async def read_unit(unit_id: int, db: ReadSession = Depends(get_read_db)):
+    unit = await db.run(get_unit, unit_id)
     if not unit:
         raise_not_found_exception("Unit")
     return unit
\ No newline at end of file
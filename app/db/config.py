@@ -1,21 +1,48 @@
 # app/db/config.py
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
+from fastapi import Request
+from starlette.concurrency import run_in_threadpool
 from dotenv import load_dotenv
 import os
 
+from app.db.pool import pool_options, pool_status
+from app.db.replicas import DATABASE_REPLICA_URLS, ReplicaSet, RoutingSession, wants_replica
+
 # Load environment variables from .env file
 load_dotenv()
 
 # Retrieve database URL from .env
 DATABASE_URL = os.getenv("DATABASE_URL")
 
+# Serve read-heavy routes through the async engine (asyncpg / aiosqlite) instead of worker threads
+ASYNC_DB_READS = os.getenv("ASYNC_DB_READS", "false").lower() in ("1", "true", "yes")
+
+# Async drivers used for each sync dialect of DATABASE_URL
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+
+def _create_engine(url: str):
+    # Pool sized by the DB_POOL_* settings
+    return create_engine(
+        url,
+        connect_args={"check_same_thread": False} if "sqlite" in url else {},
+        **pool_options(url),
+    )
+
+
 # Create engine and session
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {})
+engine = _create_engine(DATABASE_URL)
+
+# Read replicas (DATABASE_REPLICA_URLS); sessions only use them when use_replica is set
+replicas = ReplicaSet([_create_engine(url) for url in DATABASE_REPLICA_URLS])
 
 # Session local for each request
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(
+    class_=RoutingSession, autocommit=False, autoflush=False, bind=engine, primary=engine, replicas=replicas
+)
 
 # Create Base class separately without importing models
 Base = declarative_base()
@@ -28,9 +55,125 @@ def get_db():
     finally:
         db.close()
 
+
+# Dependency for read-only routes: GET requests read from a replica when one is configured
+def get_replica_db(request: Request):
+    db = SessionLocal(use_replica=wants_replica(request))
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def async_database_url(url: str) -> str:
+    """DATABASE_URL with its driver swapped for the async one, e.g. postgresql+asyncpg://..."""
+    url = make_url(url)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No async driver configured for {url.get_backend_name()} databases")
+    return url.set(drivername=f"{url.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
+
+_async_engine = None
+_async_replicas = None
+_AsyncSessionLocal = None
+
+
+def get_async_engine():
+    """
+    Async engine for DATABASE_URL, created on first use.
+
+    Created lazily so the async drivers are only required when something actually uses them.
+    """
+    global _async_engine, _async_replicas, _AsyncSessionLocal
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+        def create(url):
+            url = async_database_url(url)
+            return create_async_engine(url, **pool_options(url, async_engine=True))
+
+        _async_engine = create(DATABASE_URL)
+        # Routing happens in the sync session underneath, so it works with the sync side of each engine
+        _async_replicas = ReplicaSet([create(url).sync_engine for url in DATABASE_REPLICA_URLS])
+        _AsyncSessionLocal = async_sessionmaker(
+            bind=_async_engine, sync_session_class=RoutingSession, autoflush=False, expire_on_commit=False,
+            primary=_async_engine.sync_engine, replicas=_async_replicas,
+        )
+    return _async_engine
+
+
+# Dependency to get an async DB session for routes
+async def get_async_db(request: Request):
+    get_async_engine()
+    async with _AsyncSessionLocal(use_replica=wants_replica(request)) as db:
+        yield db
+
+
+class ReadSession:
+    """
+    Runs the (sync) read controllers from async routes without blocking the event loop.
+
+    With ASYNC_DB_READS the controller runs against an AsyncSession through run_sync, so
+    waiting on the database doesn't hold a thread; otherwise it runs on a regular Session
+    in the threadpool, like a sync route would.
+    """
+
+    def __init__(self, session):
+        self.session = session
+
+    async def run(self, fn, *args, **kwargs):
+        """Call fn(session, *args, **kwargs) and return its result."""
+        if ASYNC_DB_READS:
+            return await self.session.run_sync(fn, *args, **kwargs)
+        return await run_in_threadpool(fn, self.session, *args, **kwargs)
+
+
+def get_pool_metrics() -> dict:
+    """Usage and checkout metrics of the connection pools of this worker, plus replica health."""
+    metrics = {"sync": pool_status(engine.pool)}
+    if replicas:
+        metrics["replicas"] = replicas.status()
+    if _async_engine is not None:
+        metrics["async"] = pool_status(_async_engine.sync_engine.pool)
+        if _async_replicas:
+            metrics["async_replicas"] = _async_replicas.status()
+    return metrics
+
+
+async def ping_database() -> bool:
+    """SELECT 1 against the database without blocking the event loop."""
+    if ASYNC_DB_READS:
+        async with get_async_engine().connect() as conn:
+            return (await conn.execute(text("SELECT 1"))).scalar() == 1
+
+    def select_one():
+        with engine.connect() as conn:
+            return conn.execute(text("SELECT 1")).scalar() == 1
+
+    return await run_in_threadpool(select_one)
+
+
+# Dependency for async read routes: db.run(controller, ...) instead of controller(db, ...)
+async def get_read_db(request: Request):
+    if ASYNC_DB_READS:
+        async for db in get_async_db(request):
+            yield ReadSession(db)
+    else:
+        db = SessionLocal(use_replica=wants_replica(request))
+        try:
+            yield ReadSession(db)
+        finally:
+            await run_in_threadpool(db.close)
+
 # Initialize the database and create tables
 def init_db():
     # Import models here to avoid circular imports
     from app.db.models import User, OTP, Role, Gender  # Import all relevant models
     from app.db.models.stripe import StripePayment
     Base.metadata.create_all(bind=engine) 
+
+    # create_all skips existing tables, so add indexes declared after a table was created
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
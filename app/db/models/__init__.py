@@ -4,8 +4,9 @@ from .user import User
 from .STMP import EmailLog
 from .utility import Role, Gender, OTP, Category, Unit, Supplier 
 from .product import Product 
-from .inventory import StockItem
+from .inventory import LowStockAlert, StockItem, StockMovement, StockSnapshot
 from .stripe import StripePayment
+from .catalog import ProductCatalogView
 
 __all__ = [
     'User',
@@ -13,10 +14,14 @@ __all__ = [
     'Gender',
     'OTP',
     'StockItem',   
+    'LowStockAlert',
+    'StockMovement',
+    'StockSnapshot',
     'Product',    
     'Category',    
     'Unit',  
     'Supplier',
     'EmailLog',
-    'StripePayment'
+    'StripePayment',
+    'ProductCatalogView'
 ]
@@ -0,0 +1,56 @@
+# app/db/models/catalog.py
+
+from sqlalchemy import Column, Integer, String, Float, DateTime, Index
+from app.db.config import Base
+
+
+class ProductCatalogView(Base):
+    """
+    Denormalized read model of a product: the product row with its lookup names and
+    embedded stock item fields flattened in, so list and search reads need no joins.
+
+    Maintained by the product and stock write paths (app/api/products/catalog.py);
+    column names shared with Product keep the same meaning.
+    """
+    __tablename__ = "product_catalog_view"
+
+    id = Column(Integer, primary_key=True)  # Product id
+    productcode = Column(String, unique=True)
+    title = Column(String)
+    price = Column(Float)
+    description = Column(String)
+    discount = Column(Float)
+    rating = Column(Float)
+    warranty = Column(String)
+    image = Column(String)
+    created_at = Column(DateTime)
+    updated_at = Column(DateTime)
+
+    brand_id = Column(Integer, index=True)
+    model_id = Column(Integer, index=True)
+    color_id = Column(Integer, index=True)
+    category_id = Column(Integer, index=True)
+    stock_status_id = Column(Integer, index=True)
+    brand_name = Column(String)
+    model_name = Column(String)
+    color_name = Column(String)
+    category_name = Column(String)
+    stock_status_name = Column(String)
+
+    # Embedded stock item
+    stock_item_id = Column(String, index=True)
+    stock_item_name = Column(String)
+    stock_quantity_in_stock = Column(Integer)
+    stock_expiry_date = Column(DateTime)
+    stock_unit_name = Column(String)
+    stock_category_name = Column(String)
+    stock_status = Column(String)
+    stock_barcode = Column(String)
+
+    # Keyset pagination indexes for every sort option (sort column + id tiebreak)
+    __table_args__ = (
+        Index('ix_product_catalog_view_price_id', 'price', 'id'),
+        Index('ix_product_catalog_view_title_id', 'title', 'id'),
+        Index('ix_product_catalog_view_rating_id', 'rating', 'id'),
+        Index('ix_product_catalog_view_created_at_id', 'created_at', 'id'),
+    )
@@ -47,4 +47,66 @@ class StockItem(Base):
         Index('ix_stocks_itemId', 'itemId'),
         Index('ix_stocks_category_id', 'category_id'),
         Index('ix_stocks_supplier_id', 'supplier_id'),
+        # Incremental scans re-check only the items touched since the previous scan
+        Index('ix_stocks_updated_at', 'updated_at'),
+        # Expiring-stock listing and first-expired-first-out allocation by name or category
+        Index('ix_stocks_expiry_date', 'expiry_date'),
+        Index('ix_stocks_item_name_expiry_date', 'item_name', 'expiry_date'),
+        Index('ix_stocks_category_id_expiry_date', 'category_id', 'expiry_date'),
+        # Partial index holding only the items at or below their restock level
+        Index(
+            'ix_stocks_low_stock', 'id',
+            postgresql_where=quantity_in_stock <= func.coalesce(restock_level, 0),
+            sqlite_where=quantity_in_stock <= func.coalesce(restock_level, 0),
+        ),
+    )
+
+
+class StockMovement(Base):
+    """
+    Append-only ledger of stock quantity changes; rows are never updated or deleted.
+
+    `quantity` is the signed change to quantity_in_stock. stock_item_id has no foreign
+    key so the history outlives deleted stock items.
+    """
+    __tablename__ = 'stock_movements'
+
+    id = Column(Integer, primary_key=True)
+    stock_item_id = Column(Integer, nullable=False)
+    movement_type = Column(String, nullable=False)  # receipt, sale, adjustment or return
+    quantity = Column(Integer, nullable=False)
+    reference = Column(String, nullable=True)
+    created_at = Column(DateTime, default=get_current_cambodia_time, nullable=False)
+
+    __table_args__ = (
+        Index('ix_stock_movements_stock_item_id_id', 'stock_item_id', 'id'),
+        Index('ix_stock_movements_stock_item_id_created_at', 'stock_item_id', 'created_at'),
+    )
+
+
+class LowStockAlert(Base):
+    """
+    A stock item a low-stock digest has reported; deleted once the item is above its restock level again.
+
+    No foreign key, like the ledger tables; rows of deleted items are dropped by the next full scan.
+    """
+    __tablename__ = 'low_stock_alerts'
+
+    stock_item_id = Column(Integer, primary_key=True)
+    notified_at = Column(DateTime, nullable=False)
+
+
+class StockSnapshot(Base):
+    """Quantity of a stock item after all its movements up to and including `movement_id`."""
+    __tablename__ = 'stock_snapshots'
+
+    id = Column(Integer, primary_key=True)
+    stock_item_id = Column(Integer, nullable=False)
+    movement_id = Column(Integer, nullable=False)
+    quantity = Column(Integer, nullable=False)
+    as_of = Column(DateTime, nullable=False)  # created_at of movement_id
+
+    __table_args__ = (
+        Index('ix_stock_snapshots_stock_item_id_movement_id', 'stock_item_id', 'movement_id'),
+        Index('ix_stock_snapshots_stock_item_id_as_of', 'stock_item_id', 'as_of'),
     )
@@ -1,6 +1,6 @@
 # app/db/models/product.py
 
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from app.db.config import Base
 from datetime import datetime
@@ -40,3 +40,11 @@ class Product(Base):
 
     def __repr__(self):
         return f"<Product(id={self.id}, title='{self.title}', price={self.price})>"
+
+    # Composite indexes so sorted, keyset-paginated reads walk an index (sort column + id tiebreak)
+    __table_args__ = (
+        Index('ix_products_price_id', 'price', 'id'),
+        Index('ix_products_title_id', 'title', 'id'),
+        Index('ix_products_rating_id', 'rating', 'id'),
+        Index('ix_products_created_at_id', 'created_at', 'id'),
+    )
@@ -130,6 +130,24 @@ class StockStatus(Base):
     stock_items = relationship("StockItem", back_populates="stock_status")
 
 
+# Lookup table versions, bumped on every change so each worker can tell its cached copy is stale
+class LookupVersion(Base):
+    __tablename__ = "lookup_versions"
+
+    table_name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=get_current_cambodia_time, onupdate=get_current_cambodia_time)
+
+
+# Periodic task leases: only the process holding a task's unexpired lease runs it
+class TaskLease(Base):
+    __tablename__ = "task_leases"
+
+    name = Column(String, primary_key=True)
+    owner = Column(String, nullable=False)  # host:pid of the holder
+    expires_at = Column(DateTime, nullable=False)
+
+
 # OTP Model
 class OTP(Base):
     __tablename__ = "otp"
@@ -0,0 +1,143 @@
+# app/db/pool.py
+
+import os
+import threading
+import time
+from collections import deque
+
+from sqlalchemy import exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Connection pool sizing; every worker process gets its own pool of up to DB_POOL_SIZE + DB_MAX_OVERFLOW connections
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+# Seconds a checkout waits for a free connection before raising "QueuePool limit ... reached"
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+# Seconds after which a connection is replaced, so server or proxy idle timeouts never hit a pooled one (-1 disables)
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+# Test connections with a lightweight ping on checkout and reconnect if they went stale
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+# Number of recent checkouts the latency percentiles are computed from
+POOL_LATENCY_SAMPLES = 1000
+
+
+class PoolMetrics:
+    """Checkout counters and latencies of one connection pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=POOL_LATENCY_SAMPLES)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.max_latency = 0.0
+        self.peak_checked_out = 0
+        self.peak_overflow = 0
+
+    def record(self, latency: float, checked_out: int, overflow: int):
+        with self._lock:
+            self.checkouts += 1
+            self._latencies.append(latency)
+            self.max_latency = max(self.max_latency, latency)
+            self.peak_checked_out = max(self.peak_checked_out, checked_out)
+            self.peak_overflow = max(self.peak_overflow, overflow)
+
+    def record_failure(self, timed_out: bool):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.errors += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            latencies = sorted(self._latencies)
+
+        def percentile(p):
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000, 3) if latencies else 0.0
+
+        return {
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "peak_checked_out": self.peak_checked_out,
+            "peak_overflow": self.peak_overflow,
+            "checkout_latency_ms": {
+                "avg": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+                "p50": percentile(0.5),
+                "p95": percentile(0.95),
+                "p99": percentile(0.99),
+                "max": round(self.max_latency * 1000, 3),
+            },
+        }
+
+
+class _MeteredPoolMixin:
+    """Times every checkout (waiting for a slot, connecting, pre-ping) and counts pool timeouts."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.metrics.record_failure(timed_out=True)
+            raise
+        except Exception:
+            self.metrics.record_failure(timed_out=False)
+            raise
+        self.metrics.record(time.perf_counter() - started, self.checkedout(), max(self.overflow(), 0))
+        return connection
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool; keep counting into the same metrics
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def status_dict(self) -> dict:
+        return {
+            "size": self.size(),
+            "max_overflow": self._max_overflow,
+            "timeout": self._timeout,
+            "checked_out": self.checkedout(),
+            "checked_in": self.checkedin(),
+            "overflow": max(self.overflow(), 0),
+            **self.metrics.snapshot(),
+        }
+
+
+class MeteredQueuePool(_MeteredPoolMixin, QueuePool):
+    pass
+
+
+class MeteredAsyncAdaptedQueuePool(_MeteredPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_options(url: str, async_engine: bool = False) -> dict:
+    """create_engine() pool arguments for `url` from the DB_POOL_* settings."""
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        # In-memory SQLite lives in a single connection; keep SQLAlchemy's default pool for it
+        return {}
+    return {
+        "poolclass": MeteredAsyncAdaptedQueuePool if async_engine else MeteredQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+def pool_status(pool) -> dict:
+    """Current usage and checkout metrics of an engine's pool."""
+    if isinstance(pool, _MeteredPoolMixin):
+        return pool.status_dict()
+    return {"status": pool.status()}
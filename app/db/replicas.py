@@ -0,0 +1,131 @@
+# app/db/replicas.py
+
+import logging
+import os
+import threading
+import time
+from typing import List, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.dml import UpdateBase
+
+from app.db.pool import pool_status
+
+logger = logging.getLogger(__name__)
+
+# Comma-separated replica URLs; read-only requests are spread over them, everything else uses DATABASE_URL
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+
+# Seconds between health pings of a replica (and before a failed replica is tried again)
+REPLICA_HEALTH_CHECK_INTERVAL = float(os.getenv("REPLICA_HEALTH_CHECK_INTERVAL", 10))
+
+# Request header that pins a read to the primary, e.g. right after the client wrote something
+READ_CONSISTENCY_HEADER = "X-Read-Consistency"
+
+
+class _Replica:
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self.healthy = True
+        self.checked_at = None
+
+
+class ReplicaSet:
+    """
+    Read replicas picked round-robin, skipping the ones that are down.
+
+    A replica is taken out of rotation when connecting to it fails (during a request or
+    a health ping) and is pinged again every REPLICA_HEALTH_CHECK_INTERVAL seconds.
+    """
+
+    def __init__(self, engines: List[Engine]):
+        self._replicas = [_Replica(engine) for engine in engines]
+        self._next = 0
+        self._lock = threading.Lock()
+        for replica in self._replicas:
+            event.listen(replica.engine, "handle_error", self._on_error(replica))
+
+    def __len__(self):
+        return len(self._replicas)
+
+    def _on_error(self, replica: _Replica):
+        def handle_error(context):
+            # No connection means connecting failed; a disconnect means the server went away
+            if context.connection is None or context.is_disconnect:
+                self._mark(replica, healthy=False)
+        return handle_error
+
+    def _mark(self, replica: _Replica, healthy: bool):
+        if replica.healthy and not healthy:
+            logger.warning("Read replica %s is down, sending its reads elsewhere", replica.engine.url)
+        elif healthy and not replica.healthy:
+            logger.info("Read replica %s is back in rotation", replica.engine.url)
+        replica.healthy = healthy
+        replica.checked_at = time.monotonic()
+
+    def _ping(self, replica: _Replica):
+        try:
+            with replica.engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            self._mark(replica, healthy=True)
+        except Exception:
+            self._mark(replica, healthy=False)
+
+    def _usable(self, replica: _Replica) -> bool:
+        if replica.checked_at is None or time.monotonic() - replica.checked_at >= REPLICA_HEALTH_CHECK_INTERVAL:
+            self._ping(replica)
+        return replica.healthy
+
+    def choose(self) -> Optional[Engine]:
+        """Next healthy replica engine, or None when all of them are down."""
+        for _ in range(len(self._replicas)):
+            with self._lock:
+                replica = self._replicas[self._next]
+                self._next = (self._next + 1) % len(self._replicas)
+            if self._usable(replica):
+                return replica.engine
+        return None
+
+    def status(self) -> list:
+        return [
+            {"url": replica.engine.url.render_as_string(), "healthy": replica.healthy, **pool_status(replica.engine.pool)}
+            for replica in self._replicas
+        ]
+
+
+class RoutingSession(Session):
+    """
+    Session sending its reads to a replica when `use_replica` is set, and everything else to the primary.
+
+    The replica is picked once per session, so one request reads a single snapshot. As
+    soon as the session writes (flush or DML statement) it stays on the primary, so it
+    reads its own writes.
+    """
+
+    def __init__(self, *args, primary: Engine, replicas: ReplicaSet, use_replica: bool = False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.primary = primary
+        self.replicas = replicas
+        self.use_replica = use_replica
+        self._replica = None
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self._flushing or isinstance(clause, UpdateBase):
+            self.use_replica = False
+        if not self.use_replica or not self.replicas:
+            return self.primary
+        if self._replica is None:
+            self._replica = self.replicas.choose() or self.primary
+        return self._replica
+
+
+def reads_from_replica(db: Session) -> bool:
+    """Whether `db` reads from a replica, whose rows may lag behind the primary's."""
+    return isinstance(db, RoutingSession) and db.get_bind() is not db.primary
+
+
+def wants_replica(request) -> bool:
+    """Whether a request may read from a replica: GET/HEAD without the primary consistency header."""
+    return request.method in ("GET", "HEAD") and request.headers.get(READ_CONSISTENCY_HEADER, "").lower() != "primary"
@@ -0,0 +1,19 @@
+# app/db/upsert.py
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+# Dialects whose INSERT supports ON CONFLICT ... DO UPDATE
+_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def dialect_insert(db: Session, model):
+    """
+    Return an INSERT for `model` supporting on_conflict_do_update(), or None when
+    the database has no native upsert and the caller must fall back to select + update.
+    """
+    insert = _INSERTS.get(db.get_bind().dialect.name)
+    return insert(model) if insert else None
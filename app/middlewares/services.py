@@ -2,6 +2,7 @@
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from app.utility.pagination import NEXT_CURSOR_HEADER
 
 def add_cors(app: FastAPI):
     app.add_middleware(
@@ -10,4 +11,5 @@ def add_cors(app: FastAPI):
         allow_credentials=True,
         allow_methods=["*"],  # Allow all methods
         allow_headers=["*"],  # Allow all headers
+        expose_headers=[NEXT_CURSOR_HEADER, "ETag", "Last-Modified"],  # Let browsers read the pagination cursor and cache validators
     )
\ No newline at end of file
@@ -1,6 +1,6 @@
 # app/schemas/inventory.py
 
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel, Field
 from datetime import date, datetime
 
@@ -50,6 +50,43 @@ class StockItemUpdate(BaseModel):
         from_attributes = True
 
 
+class StockBulkRow(BaseModel):
+    """One line of a supplier delivery; fields left out keep the existing stock item's values."""
+    itemId: str
+    itemName: str
+    categoryId: int
+    unitId: int
+    quantity: int = Field(..., gt=0)  # Delivered units, added to quantityAdded and quantityInStock
+    statusId: int
+    supplierId: Optional[int] = None
+    purchaseDate: Optional[date] = None
+    purchasePrice: Optional[float] = None
+    expiryDate: Optional[date] = None
+    barcode: Optional[str] = None
+    remark: Optional[str] = None
+    restockLevel: Optional[int] = None
+    image: Optional[str] = None
+
+
+class StockQuantityRequest(BaseModel):
+    quantity: int = Field(..., gt=0)
+
+
+class StockQuantityLine(BaseModel):
+    id: int
+    quantity: int = Field(..., gt=0)
+
+
+class StockBatchQuantityRequest(BaseModel):
+    items: List[StockQuantityLine] = Field(..., min_length=1)
+
+
+class StockAllocationRequest(BaseModel):
+    item_name: Optional[str] = None  # Allocate lots of this item ...
+    category_id: Optional[int] = None  # ... or of any item in this category
+    quantity: int = Field(..., gt=0)
+
+
 # ====================
 # === RESPONSE SCHEMAS ===
 # ====================
@@ -78,6 +115,49 @@ class StockItemResponse(BaseModel):
         orm_mode = True
 
 
+class StockQuantityResponse(BaseModel):
+    id: int
+    item_id: str
+    quantity_in_stock: int
+
+
+class StockBatchQuantityResponse(BaseModel):
+    items: List[StockQuantityResponse]
+
+
+class StockAllocationLine(BaseModel):
+    id: int
+    item_id: str
+    expiry_date: Optional[date] = None
+    quantity: int  # Taken from this lot
+    quantity_in_stock: int  # Left in this lot
+
+
+class StockAllocationResponse(BaseModel):
+    quantity: int
+    allocations: List[StockAllocationLine]
+
+
+class StockMovementResponse(BaseModel):
+    id: int
+    stock_item_id: int
+    movement_type: str
+    quantity: int
+    reference: Optional[str] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class StockLevelResponse(BaseModel):
+    id: int
+    quantity: int
+    at: Optional[datetime] = None
+    snapshot_as_of: Optional[datetime] = None
+    movements_replayed: int
+
+
 # ====================
 # === STOCK STATUS SCHEMAS ===
 # ====================
@@ -1,6 +1,6 @@
 # app/schemas/product.py
-from pydantic import BaseModel, root_validator
-from typing import Optional, List
+from pydantic import BaseModel, Field, model_validator, root_validator
+from typing import Dict, Optional, List
 from datetime import date, datetime
 
 class StockItemResponse(BaseModel):
@@ -65,6 +65,37 @@ class ProductResponse(BaseModel):
         orm_mode = True
 
 
+# Search with facet counts
+class FacetCount(BaseModel):
+    id: int
+    name: Optional[str] = None
+    count: int
+
+
+class ProductSearchResponse(BaseModel):
+    items: List[ProductResponse]
+    facets: Dict[str, List[FacetCount]]
+
+
+# Batch get: many products by id in one round trip
+class ProductBatchRequest(BaseModel):
+    ids: List[int] = Field(..., min_length=1)
+
+
+class ProductBatchResponse(BaseModel):
+    items: List[ProductResponse]
+    missing: List[int]
+
+
+# Autocomplete
+class ProductSuggestion(BaseModel):
+    id: int
+    title: Optional[str] = None
+    productcode: Optional[str] = None
+    brand_name: Optional[str] = None
+    score: float
+
+
 # Update
 class ProductUpdate(BaseModel):
     title: Optional[str] = None
@@ -83,6 +114,30 @@ class ProductUpdate(BaseModel):
     class Config:
         orm_mode = True
 
+# Bulk update: either one patch for many ids, or a list of per-id patches
+class ProductBulkPatch(BaseModel):
+    id: int
+    patch: ProductUpdate
+
+
+class ProductBulkUpdate(BaseModel):
+    ids: Optional[List[int]] = None
+    patch: Optional[ProductUpdate] = None
+    items: Optional[List[ProductBulkPatch]] = None
+
+    @model_validator(mode='after')
+    def check_shape(self):
+        if (self.items is None) == (self.ids is None or self.patch is None):
+            raise ValueError("Provide either `ids` and `patch`, or `items`")
+        return self
+
+
+class ProductBulkUpdateResponse(BaseModel):
+    updated: int
+    ids: List[int]
+    missing: List[int]
+
+
 # This is the response schema that we send back to the client
 class ProductUpdateResponse(BaseModel):
     id: int
@@ -0,0 +1,93 @@
+# app/utility/etag.py
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import Request, Response
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.utility.utc import convert_cambodia_to_utc
+
+# Headers copied onto a 304 so caches can refresh their stored entry
+_NOT_MODIFIED_HEADERS = ("ETag", "Last-Modified", "Cache-Control", "Vary")
+
+
+def collection_version(db: Session, *models) -> tuple:
+    """
+    (max updated_at, row count) for each model, fetched in one round trip.
+
+    The count catches deletes, which leave the max updated_at untouched.
+    """
+    columns = []
+    for model in models:
+        columns.append(select(func.max(model.updated_at)).scalar_subquery())
+        columns.append(select(func.count()).select_from(model).scalar_subquery())
+    return tuple(db.execute(select(*columns)).one())
+
+
+def make_etag(*parts) -> str:
+    """Build a weak ETag from the version parts of a representation."""
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()[:32]
+    return f'W/"{digest}"'
+
+
+def latest(*values) -> Optional[datetime]:
+    """The most recent datetime among `values`, ignoring anything else (counts, None)."""
+    dates = [value for value in values if isinstance(value, datetime)]
+    return max(dates, key=lambda value: convert_cambodia_to_utc(value)) if dates else None
+
+
+def _to_utc(value: datetime) -> datetime:
+    # Stored timestamps are naive Cambodia time (see app.utility.utc)
+    return convert_cambodia_to_utc(value).astimezone(timezone.utc).replace(microsecond=0)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # Weak comparison, as required for If-None-Match
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+
+def _not_modified_since(header: str, last_modified: datetime) -> bool:
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return _to_utc(last_modified) <= since
+
+
+def check_not_modified(request: Request, response: Response, version: tuple) -> Optional[Response]:
+    """
+    Set ETag/Last-Modified for a resource version and return a 304 when the client's copy is current.
+
+    The ETag covers the version and the query string (page, filters, sort), so each
+    representation of a collection gets its own tag. If-None-Match takes precedence over
+    If-Modified-Since, as in RFC 9110; the date check cannot see deletes, so clients that
+    send both get the stricter ETag comparison. Returns None when the full response must be built.
+    """
+    etag = make_etag(request.url.path, request.url.query, *version)
+    last_modified = latest(*version)
+    response.headers["ETag"] = etag
+    if last_modified is not None:
+        response.headers["Last-Modified"] = format_datetime(_to_utc(last_modified), usegmt=True)
+
+    if_none_match = request.headers.get("if-none-match")
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_none_match is not None:
+        fresh = _etag_matches(if_none_match, etag)
+    elif if_modified_since is not None and last_modified is not None:
+        fresh = _not_modified_since(if_modified_since, last_modified)
+    else:
+        fresh = False
+
+    if not fresh:
+        return None
+    headers = {name: response.headers[name] for name in _NOT_MODIFIED_HEADERS if name in response.headers}
+    return Response(status_code=304, headers=headers)
@@ -0,0 +1,64 @@
+# app/utility/export.py
+
+import csv
+import io
+import json
+import os
+from datetime import date, datetime
+from typing import Iterable, Iterator
+
+from fastapi.responses import StreamingResponse
+
+# Rows fetched per round trip from the server-side cursor
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 1000))
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Cannot export {type(value).__name__}")
+
+
+def _flatten(record: dict, prefix: str = "") -> dict:
+    """Flatten nested dicts into dotted keys for CSV, e.g. stockItem.itemId."""
+    flat = {}
+    for key, value in record.items():
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{prefix}{key}."))
+        else:
+            flat[f"{prefix}{key}"] = value.isoformat() if isinstance(value, (datetime, date)) else value
+    return flat
+
+
+def serialize_rows(records: Iterable[dict], fmt: str) -> Iterator[str]:
+    """Serialize records one at a time as NDJSON lines, or CSV with a header taken from the first record."""
+    if fmt == "ndjson":
+        for record in records:
+            yield json.dumps(record, default=_json_default) + "\n"
+        return
+
+    buffer = io.StringIO()
+    writer = None
+    for record in records:
+        flat = _flatten(record)
+        if writer is None:
+            writer = csv.DictWriter(buffer, fieldnames=list(flat))
+            writer.writeheader()
+        writer.writerow(flat)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+
+
+def export_response(records: Iterable[dict], fmt: str, filename: str) -> StreamingResponse:
+    """Stream records as a downloadable NDJSON or CSV file."""
+    return StreamingResponse(
+        serialize_rows(records, fmt),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'},
+    )
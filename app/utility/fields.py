@@ -0,0 +1,29 @@
+# app/utility/fields.py
+
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from fastapi import HTTPException, Response
+
+from app.utility.serialization import trusted_json_response
+
+
+def parse_fields(fields: Optional[str], allowed: Iterable[str]) -> Optional[list[str]]:
+    """
+    Parse a `?fields=id,title,price` sparse fieldset into a list of response keys.
+
+    Returns None when no projection was requested; unknown keys are a 400.
+    """
+    if fields is None:
+        return None
+    names = list(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    unknown = [name for name in names if name not in allowed]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Invalid field(s): {', '.join(unknown)}")
+    if not names:
+        raise HTTPException(status_code=400, detail="No fields requested")
+    return names
+
+
+def sparse_response(response: Response, content: Union[List[dict], Dict[str, Any]]) -> Response:
+    """Render projected items as JSON, skipping response_model validation (partial items would fail it)."""
+    return trusted_json_response(response, content, Union[List[Dict[str, Any]], Dict[str, Any]])
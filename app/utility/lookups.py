@@ -0,0 +1,183 @@
+# app/utility/lookups.py
+
+import os
+import threading
+import time
+from types import SimpleNamespace
+from typing import Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.db.config import SessionLocal
+from app.db.models.utility import Brand, Category, Color, Gender, LookupVersion, Model, Role, StockStatus, Supplier, Unit
+
+# Reference tables kept in memory by every worker
+LOOKUP_MODELS = (Brand, Model, Color, Category, Unit, Supplier, StockStatus, Role, Gender)
+
+# Seconds between checks of the shared version counters for changes made by other workers
+LOOKUP_VERSION_CHECK_INTERVAL = float(os.getenv("LOOKUP_VERSION_CHECK_INTERVAL", 5))
+
+
+class LookupTable:
+    """
+    In-memory copy of a small reference table, serving id -> row and name -> id lookups.
+
+    Rows are detached snapshots (SimpleNamespace with the table's columns), safe to share
+    between requests. The table is reloaded when this worker changes it or when its
+    version counter in `lookup_versions` moves past the version it was loaded at.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self._rows = {}
+        self._ids_by_name = {}
+        self._loaded = False
+        self._loaded_at = None
+        self._version = None
+        self._lock = threading.Lock()
+
+    @property
+    def name(self) -> str:
+        return self.model.__tablename__
+
+    def _load(self, db: Session):
+        rows = {}
+        for mapping in db.execute(select(self.model.__table__)).mappings():
+            rows[mapping["id"]] = SimpleNamespace(**mapping)
+        self._rows = rows
+        # Names are unique in every table but suppliers; the lowest id wins there
+        self._ids_by_name = {}
+        for row_id in sorted(rows, reverse=True):
+            if rows[row_id].name is not None:
+                self._ids_by_name[rows[row_id].name.casefold()] = row_id
+        self._loaded = True
+        self._loaded_at = time.monotonic()
+
+    def _ensure_loaded(self, db: Session):
+        lookup_registry.check_versions(db)
+        with self._lock:
+            if not self._loaded:
+                self._load(db)
+
+    def mark_stale(self, version: Optional[int] = None):
+        """Reload on next use; `version` is the shared version the reload will correspond to."""
+        with self._lock:
+            self._loaded = False
+            self._version = version
+
+    def get(self, db: Session, row_id: int):
+        """Row with the given id, or None."""
+        self._ensure_loaded(db)
+        row = self._rows.get(row_id)
+        if row is None and row_id is not None:
+            # Rows inserted outside the API (scripts, migrations) don't bump the version;
+            # an unknown id triggers a reload, at most once per check interval
+            with self._lock:
+                if time.monotonic() - self._loaded_at >= LOOKUP_VERSION_CHECK_INTERVAL:
+                    self._load(db)
+            row = self._rows.get(row_id)
+        return row
+
+    def name_of(self, db: Session, row_id: int, default=None):
+        row = self.get(db, row_id)
+        return row.name if row is not None else default
+
+    def id_for(self, db: Session, name: str) -> Optional[int]:
+        """ID of the row with exactly this name (case-insensitive), or None."""
+        self._ensure_loaded(db)
+        return self._ids_by_name.get(name.casefold())
+
+    def ids(self, db: Session) -> set[int]:
+        """All IDs in the table, for validating foreign key references."""
+        self._ensure_loaded(db)
+        return set(self._rows)
+
+    def ids_matching(self, db: Session, name: str) -> list[int]:
+        """IDs whose name contains `name`, case-insensitively (same rows as ILIKE '%name%')."""
+        self._ensure_loaded(db)
+        needle = name.casefold()
+        return [row_id for row_id, row in self._rows.items() if row.name and needle in row.name.casefold()]
+
+
+class LookupRegistry:
+    """All in-memory reference tables of this process, plus the shared version check."""
+
+    def __init__(self, models):
+        self.tables = {model: LookupTable(model) for model in models}
+        self._checked_at = None
+        self._check_lock = threading.Lock()
+
+    def load_all(self, db: Session):
+        """Load every table up front (called at startup)."""
+        self._checked_at = None
+        self.check_versions(db)
+        for table in self.tables.values():
+            table._ensure_loaded(db)
+
+    def check_versions(self, db: Session):
+        """
+        Compare the shared version counters with the loaded versions, at most once per
+        LOOKUP_VERSION_CHECK_INTERVAL, and mark tables changed by other workers as stale.
+        """
+        now = time.monotonic()
+        with self._check_lock:
+            if self._checked_at is not None and now - self._checked_at < LOOKUP_VERSION_CHECK_INTERVAL:
+                return
+            self._checked_at = now
+
+        versions = dict(db.execute(select(LookupVersion.table_name, LookupVersion.version)).all())
+        for table in self.tables.values():
+            version = versions.get(table.name, 0)
+            if version != table._version:
+                table.mark_stale(version)
+
+    def bump_version(self, db: Session, model):
+        """
+        Record that `model` changed: increment its shared version and reload it here.
+        Call after the write is committed; commits the version change itself.
+        """
+        table = self.tables[model]
+        table.mark_stale(bump_shared_version(db, table.name))
+
+
+def shared_version(db: Session, name: str) -> int:
+    """Current value of the shared version counter `name` (0 if it was never bumped)."""
+    return db.execute(select(LookupVersion.version).where(LookupVersion.table_name == name)).scalar() or 0
+
+
+def bump_shared_version(db: Session, name: str) -> int:
+    """
+    Increment the shared version counter `name` in lookup_versions and return its new value.
+    Call after the write is committed; commits the version change itself.
+    """
+    statement = (
+        update(LookupVersion)
+        .where(LookupVersion.table_name == name)
+        .values(version=LookupVersion.version + 1)
+    )
+    if not db.execute(statement).rowcount:
+        try:
+            db.add(LookupVersion(table_name=name, version=1))
+            db.commit()
+        except IntegrityError:
+            # Another worker created the counter first
+            db.rollback()
+            db.execute(statement)
+    db.commit()
+    return shared_version(db, name)
+
+
+lookup_registry = LookupRegistry(LOOKUP_MODELS)
+
+
+def lookup_table(model) -> LookupTable:
+    """Return the process-wide lookup table for a reference model."""
+    return lookup_registry.tables[model]
+
+
+def init_lookup_tables():
+    """Load every lookup table into memory."""
+    with SessionLocal() as db:
+        lookup_registry.load_all(db)
@@ -0,0 +1,125 @@
+# app/utility/pagination.py
+
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from typing import Optional
+
+from fastapi import HTTPException, Response
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Query
+
+# Response header carrying the opaque cursor of the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Page size used when a client sends a cursor without a limit
+DEFAULT_PAGE_SIZE = 50
+
+
+def _signature(sort: list) -> str:
+    """Describe a sort spec so a cursor can't be replayed against another ordering."""
+    return ",".join(f"{column.key}:{'desc' if descending else 'asc'}" for column, descending in sort)
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Cannot encode {type(value).__name__} in a cursor")
+
+
+def encode_cursor(sort: list, values: list) -> str:
+    """Encode the sort key values of the last row of a page into an opaque cursor."""
+    payload = json.dumps({"s": _signature(sort), "v": values}, default=_json_default, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(sort: list, cursor: str) -> list:
+    """Decode a cursor back into typed sort key values, validating it against the sort spec."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = payload["v"]
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if payload.get("s") != _signature(sort) or len(values) != len(sort):
+        raise HTTPException(status_code=400, detail="Cursor does not match the requested sort order")
+
+    # Restore datetimes, which JSON carries as ISO strings
+    decoded = []
+    for (column, _), value in zip(sort, values):
+        if value is not None and column.type.python_type in (datetime, date):
+            try:
+                value = column.type.python_type.fromisoformat(value)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+        decoded.append(value)
+    return decoded
+
+
+def _nullable(column) -> bool:
+    return bool(column.nullable) and not column.primary_key
+
+
+def order_by_clauses(sort: list) -> list:
+    """ORDER BY clauses for a sort spec; NULLs of a nullable key sort last in either direction."""
+    clauses = []
+    for column, descending in sort:
+        clause = column.desc() if descending else column.asc()
+        clauses.append(clause.nulls_last() if _nullable(column) else clause)
+    return clauses
+
+
+def keyset_condition(sort: list, values: list):
+    """
+    Build the row-value comparison "(k1, k2, ..., id) > (v1, v2, ..., vid)" honouring per-key
+    direction and the NULLS LAST order of order_by_clauses().
+    """
+    branches = []
+    for i, (column, descending) in enumerate(sort):
+        equal_prefix = [
+            prev_column.is_(None) if prev_value is None else prev_column == prev_value
+            for (prev_column, _), prev_value in zip(sort[:i], values[:i])
+        ]
+        # Nothing sorts after a NULL key, only the following keys can move past it
+        if values[i] is None:
+            continue
+        beyond = column < values[i] if descending else column > values[i]
+        if _nullable(column):
+            beyond = or_(beyond, column.is_(None))
+        branches.append(and_(*equal_prefix, beyond))
+    return or_(*branches)
+
+
+def paginate(query: Query, sort: list, cursor: Optional[str] = None, limit: Optional[int] = None):
+    """
+    Apply keyset pagination to a query.
+
+    :param sort: List of (column, descending) pairs; the last entry must be a unique column such as `id`.
+    :return: Tuple of (rows, next_cursor). next_cursor is None on the last page or when not paginating.
+    """
+    query = query.order_by(None).order_by(*order_by_clauses(sort))
+
+    # No paging requested: keep returning the whole result set
+    if cursor is None and limit is None:
+        return query.all(), None
+
+    limit = limit or DEFAULT_PAGE_SIZE
+    if cursor is not None:
+        query = query.filter(keyset_condition(sort, decode_cursor(sort, cursor)))
+
+    # Fetch one extra row to know whether another page exists
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(sort, [getattr(last, column.key) for column, _ in sort])
+
+
+def set_next_cursor(response: Response, next_cursor: Optional[str]):
+    """Expose the next page cursor to the client, if there is one."""
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
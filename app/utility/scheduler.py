@@ -0,0 +1,126 @@
+# app/utility/scheduler.py
+
+import logging
+import os
+import socket
+import threading
+from datetime import timedelta
+from typing import Callable, List
+
+from sqlalchemy import delete, or_, update
+from sqlalchemy.exc import IntegrityError
+
+from app.db.config import SessionLocal
+from app.db.models.utility import TaskLease
+from app.utility.utc import get_current_cambodia_time
+
+logger = logging.getLogger(__name__)
+
+# Take part in running the periodic tasks; set to false in processes that should never run them
+PERIODIC_TASKS_ENABLED = os.getenv("PERIODIC_TASKS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# A task's lease lasts this many intervals, so a runner that died is replaced after that long
+TASK_LEASE_INTERVALS = 3
+
+
+def _owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _now():
+    return get_current_cambodia_time().replace(tzinfo=None)
+
+
+def acquire_lease(name: str, seconds: float) -> bool:
+    """
+    Take or renew the lease on task `name` for `seconds`; False while another process holds it.
+
+    Every worker runs the schedule, but only the lease holder runs the task, so each run
+    happens once across all workers and hosts sharing the database.
+    """
+    now = _now()
+    values = {"owner": _owner(), "expires_at": now + timedelta(seconds=seconds)}
+    with SessionLocal() as db:
+        statement = (
+            update(TaskLease)
+            .where(TaskLease.name == name, or_(TaskLease.owner == values["owner"], TaskLease.expires_at < now))
+            .values(**values)
+        )
+        if db.execute(statement).rowcount:
+            db.commit()
+            return True
+        try:
+            db.add(TaskLease(name=name, **values))
+            db.commit()
+            return True
+        except IntegrityError:
+            # The lease exists and is held by another process
+            db.rollback()
+            return False
+
+
+def release_leases():
+    """Give up this process's leases so another worker takes over without waiting for them to expire."""
+    with SessionLocal() as db:
+        db.execute(delete(TaskLease).where(TaskLease.owner == _owner()))
+        db.commit()
+
+
+class PeriodicTask:
+    """Runs `fn` every `interval` seconds on a daemon thread until stopped, while holding the task's lease."""
+
+    def __init__(self, name: str, interval: float, fn: Callable[[], None]):
+        self.name = name
+        self.interval = interval
+        self.fn = fn
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                if acquire_lease(self.name, self.interval * TASK_LEASE_INTERVALS):
+                    self.fn()
+            except Exception:
+                # Keep the schedule going; the next run may well succeed
+                logger.exception("Periodic task %s failed", self.name)
+
+    def start(self):
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+_tasks: List[PeriodicTask] = []
+
+
+def schedule(name: str, interval: float, fn: Callable[[], None]) -> PeriodicTask:
+    """Register a task run by start_periodic_tasks(); an interval <= 0 disables it."""
+    task = PeriodicTask(name, interval, fn)
+    _tasks.append(task)
+    return task
+
+
+def start_periodic_tasks():
+    if not PERIODIC_TASKS_ENABLED:
+        return
+    for task in _tasks:
+        task.start()
+
+
+def stop_periodic_tasks():
+    for task in _tasks:
+        task.stop()
+    if PERIODIC_TASKS_ENABLED:
+        try:
+            release_leases()
+        except Exception:
+            logger.exception("Could not release periodic task leases")
@@ -0,0 +1,39 @@
+# app/utility/serialization.py
+
+from functools import lru_cache
+from typing import Any
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+# Headers of the route's Response parameter that belong to the body FastAPI would have rendered
+_BODY_HEADERS = {"content-length", "content-type"}
+
+
+@lru_cache(maxsize=None)
+def _adapter(content_type) -> TypeAdapter:
+    # Building a TypeAdapter compiles a serializer; do it once per response type
+    return TypeAdapter(content_type)
+
+
+def route_headers(response: Response) -> dict:
+    """
+    Headers set on a route's Response parameter (cursor, ETag, ...).
+
+    FastAPI only merges them into responses it renders itself, so routes returning a
+    Response directly must carry them over.
+    """
+    return {name: value for name, value in response.headers.items() if name not in _BODY_HEADERS}
+
+
+def trusted_json_response(response: Response, content, content_type: Any) -> Response:
+    """
+    Serialize trusted controller output straight to JSON bytes with pydantic's compiled serializer.
+
+    Routes returning this skip FastAPI's response_model pass, which re-validates every
+    object the controller already built and then encodes it with jsonable_encoder and the
+    stdlib json module. Only use it for values that already are instances of `content_type`
+    (e.g. List[ProductResponse] built by a controller); nothing is validated here.
+    """
+    body = _adapter(content_type).dump_json(content)
+    return Response(content=body, media_type="application/json", headers=route_headers(response))
@@ -0,0 +1,19 @@
+# app/utility/streaming.py
+
+from fastapi.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+
+class RequestStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse for endpoints whose body generator reads the request stream itself.
+
+    Starlette's StreamingResponse listens for client disconnects by consuming `receive()`
+    while streaming, which would swallow request body chunks. Here the generator owns
+    `receive()`; a disconnect surfaces as ClientDisconnect from `request.stream()`.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
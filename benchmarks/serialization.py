@@ -0,0 +1,93 @@
+# benchmarks/serialization.py
+#
+# Compare FastAPI's response_model path with trusted_json_response on large product lists.
+#
+#   python -m benchmarks.serialization [--items 10000] [--repeat 5]
+
+import argparse
+import asyncio
+import time
+from datetime import date, datetime
+from typing import List
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.schemas.product import ProductResponse, StockItemResponse
+from app.utility.serialization import trusted_json_response
+
+
+def make_products(count: int) -> List[ProductResponse]:
+    return [
+        ProductResponse(
+            id=i,
+            productcode=f"PC{i:06d}",
+            title=f"Product {i}",
+            price=10.0 + i % 500,
+            description="Lorem ipsum dolor sit amet, consectetur adipiscing elit.",
+            brand_name="Brand",
+            model_name="Model",
+            color_name="Black",
+            category_name="Phones",
+            discount=0.1,
+            rating=4.5,
+            warranty="1 year",
+            stock_status_name="In Stock",
+            image=f"https://example.com/images/{i}.png",
+            created_at=datetime(2024, 1, 1, 12, 0, 0),
+            stock_item_id=f"IT{i}",
+            stockItem=StockItemResponse(
+                itemId=f"IT{i}",
+                itemName=f"Item {i}",
+                quantityInStock=i % 100,
+                expiryDate=date(2026, 1, 1),
+                unitName="pcs",
+                categoryName="Phones",
+                status="In Stock",
+                barcode="0123456789012",
+            ),
+        )
+        for i in range(count)
+    ]
+
+
+def response_model_path(products, field) -> bytes:
+    # What FastAPI does for `response_model=List[ProductResponse]`: validate, encode, json.dumps
+    content = asyncio.run(serialize_response(field=field, response_content=products))
+    return JSONResponse(content).body
+
+
+def trusted_path(products) -> bytes:
+    return trusted_json_response(Response(), products, List[ProductResponse]).body
+
+
+def timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare list response serialization paths")
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    products = make_products(args.items)
+    field = create_model_field(name="Response_get_products", type_=List[ProductResponse], mode="serialization")
+
+    baseline = timed(lambda: response_model_path(products, field), args.repeat)
+    fast = timed(lambda: trusted_path(products), args.repeat)
+
+    print(f"{args.items} products, best of {args.repeat}")
+    print(f"  response_model + JSONResponse: {baseline * 1000:8.1f} ms")
+    print(f"  trusted_json_response:         {fast * 1000:8.1f} ms  ({baseline / fast:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
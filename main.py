@@ -1,14 +1,18 @@
 from datetime import datetime
-from fastapi import FastAPI, Depends
-from fastapi.testclient import TestClient
-from sqlalchemy import text
-from app.db.config import get_db, init_db, engine
+import httpx
+from fastapi import FastAPI
+from app.db.config import get_pool_metrics, init_db, engine, ping_database
 from app.api.auth.routes import auth as auth_router
 from app.api.utility.routes import utility as utility_router 
 from app.api.inventory.routes import stock as stock_router
 from app.api.products.routes import products as products_router
-from sqlalchemy.orm import Session
 from app.middlewares.services import add_cors
+from app.api.products.search import init_search_index
+from app.api.products.catalog import init_catalog
+from app.api.products.autocomplete import init_autocomplete_index
+from app.utility.lookups import init_lookup_tables
+from app.api.inventory.ledger import init_stock_ledger
+from app.utility.scheduler import start_periodic_tasks, stop_periodic_tasks
 import logging
 
 from app.utility.utc import get_current_cambodia_time
@@ -30,6 +34,17 @@ add_cors(app)
 @app.on_event("startup")
 def startup_event():
     init_db()
+    init_lookup_tables()
+    init_search_index(engine)
+    init_catalog(engine)
+    init_stock_ledger(engine)
+    init_autocomplete_index()
+    start_periodic_tasks()
+
+
+@app.on_event("shutdown")
+def shutdown_event():
+    stop_periodic_tasks()
 
 
 from app.api.SMTP.routes import SMTP as smtp_router
@@ -56,40 +71,45 @@ def get_current_time():
 def read_root():
     return {"message": "Health", "Check more url": "/health"}
 
+# Connection pool usage of this worker, for sizing DB_POOL_SIZE / DB_MAX_OVERFLOW
+@app.get("/metrics/db-pool")
+def db_pool_metrics():
+    return get_pool_metrics()
+
 # Health check endpoint
 @app.get("/health")
-async def health_check(db: Session = Depends(get_db)):
-    client = TestClient(app)  
+async def health_check():
     current_timestamp = datetime.utcnow().isoformat()  
 
     try:
         # Database connectivity check
-        with engine.connect() as conn:
-            result = conn.execute(text("SELECT 1"))
-            db_status = "healthy" if result.scalar() == 1 else "unhealthy"
-            db_message = "Database connection is successful" if db_status == "healthy" else "Database connection failed"
-        
+        db_status = "healthy" if await ping_database() else "unhealthy"
+        db_message = "Database connection is successful" if db_status == "healthy" else "Database connection failed"
+
         # API Routers status check (check each router's availability)
         api_routers_status = "healthy"
         api_routers_message = "API routers are loaded and functional"
         
+        # Call the routes in-process over ASGI; awaiting them keeps the event loop free
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://health", follow_redirects=True) as client:
+            stock_response = await client.get("/api/stock/stocks")  # Ensure this route exists and is functional
+            product_response = await client.get("/api/products/products")  # Ensure the route is correct
+            auth_response = await client.get("/api/auth/users")  # Ensure the correct route is checked
+
         # Check Stock API
         stock_check = {"status": "healthy", "message": "Stock API is responding correctly"}
-        stock_response = client.get("/api/stock/stocks")  # Ensure this route exists and is functional
         if stock_response.status_code != 200:
             stock_check = {"status": "unhealthy", "message": f"Stock API is not responding as expected. Status Code: {stock_response.status_code}"}
             logging.error(f"Stock API failed with status code: {stock_response.status_code} - Response: {stock_response.text}")
         
         # Check Product API
         product_check = {"status": "healthy", "message": "Product API is responding correctly"}
-        product_response = client.get("/api/products/products")  # Ensure the route is correct
         if product_response.status_code != 200:
             product_check = {"status": "unhealthy", "message": f"Product API is not responding as expected. Status Code: {product_response.status_code}"}
             logging.error(f"Product API failed with status code: {product_response.status_code} - Response: {product_response.text}")
         
         # Check Auth API
         auth_check = {"status": "healthy", "message": "Authentication API is working as expected"}
-        auth_response = client.get("/api/auth/users")  # Ensure the correct route is checked
         if auth_response.status_code != 200:
             auth_check = {"status": "unhealthy", "message": f"Authentication API is not responding as expected. Status Code: {auth_response.status_code}"}
             logging.error(f"Auth API failed with status code: {auth_response.status_code} - Response: {auth_response.text}")
@@ -0,0 +1,86 @@
+# tests/conftest.py
+
+import os
+import tempfile
+from types import SimpleNamespace
+
+# Point the app at a throwaway SQLite database before anything imports app.db.config
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}"
+# Background tasks are driven by the tests themselves
+os.environ["PERIODIC_TASKS_ENABLED"] = "false"
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+import main
+from app.api.products.autocomplete import autocomplete_index
+from app.api.products.cache import product_cache
+from app.db.config import SessionLocal, engine, init_db
+from app.db.models.catalog import ProductCatalogView
+from app.db.models.inventory import LowStockAlert, StockItem, StockMovement, StockSnapshot
+from app.db.models.product import Product
+from app.db.models.utility import Brand, Category, Color, Model, StockStatus, Supplier, TaskLease, Unit
+
+
+def seed_lookups():
+    """Reference rows every test can point at (id 1 of each table)."""
+    with SessionLocal() as db:
+        if db.query(Brand).count():
+            return
+        for model in (Brand, Model, Color, Category, StockStatus, Unit):
+            db.add(model(name=f"{model.__tablename__} 1"))
+        db.add(Supplier(name="Supplier 1", email="supplier@example.com"))
+        db.commit()
+
+
+@pytest.fixture(scope="session")
+def client():
+    # Seed before startup, which loads the lookup tables into memory
+    init_db()
+    seed_lookups()
+    with TestClient(main.app) as client:
+        yield client
+
+
+@pytest.fixture
+def db(client):
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+@pytest.fixture(autouse=True)
+def clean_tables(client):
+    """Start every test without products or stock items."""
+    yield
+    with SessionLocal() as db:
+        for model in (ProductCatalogView, Product, LowStockAlert, StockSnapshot, StockMovement, StockItem, TaskLease):
+            db.query(model).delete()
+        db.commit()
+        autocomplete_index.build(db)
+    product_cache.clear()
+
+
+@pytest.fixture
+def statements():
+    """SQL statements run against the primary engine during the test."""
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(engine, "before_cursor_execute", record)
+
+
+@pytest.fixture(autouse=True)
+def no_telegram(monkeypatch):
+    """Keep alerts off the network."""
+    monkeypatch.setattr(
+        "app.utility.telegramAlert.requests.get",
+        lambda *args, **kwargs: SimpleNamespace(status_code=200, raise_for_status=lambda: None),
+    )
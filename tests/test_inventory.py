@@ -0,0 +1,186 @@
+# tests/test_inventory.py
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from fastapi import HTTPException
+
+from app.api.inventory.controllers import reserve_stock
+from app.db.config import SessionLocal
+from app.db.models.inventory import StockItem, StockMovement
+from app.utility.utc import get_current_cambodia_time
+
+
+def bulk_upsert(client, rows: list) -> list:
+    response = client.post("/api/stock/stocks/bulk", json=rows)
+    assert response.status_code == 200, response.text
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def delivery(item_id: str, quantity: int, **fields) -> dict:
+    return {"itemId": item_id, "itemName": item_id, "categoryId": 1, "unitId": 1, "statusId": 1, "quantity": quantity, **fields}
+
+
+def test_bulk_created_item_reads_back(client, db):
+    report = bulk_upsert(client, [delivery("NEW-1", 5)])
+    assert report[-1] == {"summary": {"inserted": 1, "updated": 0, "failed": 0, "batches": 1}}
+
+    items = client.get("/api/stock/stocks")
+    assert items.status_code == 200, items.text
+    [item] = [item for item in items.json() if item["item_id"] == "NEW-1"]
+    assert item["purchase_date"] == get_current_cambodia_time().date().isoformat()
+    assert item["quantity_in_stock"] == 5
+
+    single = client.get(f"/api/stock/stocks/{item['id']}")
+    assert single.status_code == 200, single.text
+    assert single.json() == item
+
+
+def test_bulk_update_keeps_purchase_date_and_adds_quantity(client, db):
+    bulk_upsert(client, [delivery("NEW-2", 5, purchaseDate="2026-01-15")])
+    bulk_upsert(client, [delivery("NEW-2", 3), delivery("NEW-2", 2)])
+
+    [item] = [item for item in client.get("/api/stock/stocks").json() if item["item_id"] == "NEW-2"]
+    assert item["purchase_date"] == "2026-01-15"
+    assert (item["quantity_added"], item["quantity_in_stock"]) == (10, 10)
+
+
+def test_stock_dates_with_time_of_day_read_back(client, db):
+    db.add(StockItem(itemId="TIMED", item_name="Timed", category_id=1, unit_id=1, supplier_id=1, stock_status_id=1,
+                     purchase_date=datetime(2026, 3, 1, 21, 1, 46), expiry_date=datetime(2027, 3, 1, 8, 30)))
+    db.commit()
+
+    response = client.get("/api/stock/stocks")
+    assert response.status_code == 200, response.text
+    [item] = [item for item in response.json() if item["item_id"] == "TIMED"]
+    assert (item["purchase_date"], item["expiry_date"]) == (date(2026, 3, 1).isoformat(), date(2027, 3, 1).isoformat())
+
+
+def add_stock(db, item_id: str, quantity: int, **fields) -> StockItem:
+    item = StockItem(itemId=item_id, item_name=fields.pop("item_name", item_id), category_id=1, unit_id=1, supplier_id=1,
+                     stock_status_id=1, quantity_added=quantity, quantity_in_stock=quantity, **fields)
+    db.add(item)
+    db.commit()
+    return item
+
+
+def quantity_of(db, item: StockItem) -> int:
+    db.expire_all()
+    return db.get(StockItem, item.id).quantity_in_stock
+
+
+def test_reserve_more_than_in_stock_is_rejected(client, db):
+    item = add_stock(db, "RES-1", 5)
+    movements = db.query(StockMovement).count()
+
+    response = client.post(f"/api/stock/stocks/{item.id}/reserve", json={"quantity": 6})
+    assert response.status_code == 409, response.text
+    assert quantity_of(db, item) == 5
+    assert db.query(StockMovement).count() == movements
+
+    response = client.post(f"/api/stock/stocks/{item.id}/reserve", json={"quantity": 5})
+    assert response.status_code == 200, response.text
+    assert response.json() == {"id": item.id, "item_id": "RES-1", "quantity_in_stock": 0}
+    assert client.post("/api/stock/stocks/999999/reserve", json={"quantity": 1}).status_code == 404
+
+
+def test_failed_batch_line_changes_nothing(client, db):
+    first, second = add_stock(db, "RES-2", 10), add_stock(db, "RES-3", 1)
+    movements = db.query(StockMovement).count()
+
+    response = client.post("/api/stock/stocks/reserve", json={"items": [
+        {"id": first.id, "quantity": 4}, {"id": second.id, "quantity": 2},
+    ]})
+    assert response.status_code == 409, response.text
+    assert (quantity_of(db, first), quantity_of(db, second)) == (10, 1)
+    assert db.query(StockMovement).count() == movements
+
+    response = client.post("/api/stock/stocks/reserve", json={"items": [
+        {"id": first.id, "quantity": 4}, {"id": second.id, "quantity": 1},
+    ]})
+    assert response.status_code == 200, response.text
+    assert (quantity_of(db, first), quantity_of(db, second)) == (6, 0)
+
+
+def test_release_adds_the_quantity_back(client, db):
+    item = add_stock(db, "RES-4", 5)
+    assert client.post(f"/api/stock/stocks/{item.id}/reserve", json={"quantity": 3}).status_code == 200
+
+    response = client.post(f"/api/stock/stocks/{item.id}/release", json={"quantity": 2})
+    assert response.status_code == 200, response.text
+    assert response.json()["quantity_in_stock"] == 4
+
+    response = client.post("/api/stock/stocks/release", json={"items": [{"id": item.id, "quantity": 1}]})
+    assert response.status_code == 200, response.text
+    assert quantity_of(db, item) == 5
+    assert [(movement.movement_type, movement.quantity) for movement in
+            db.query(StockMovement).filter(StockMovement.stock_item_id == item.id).order_by(StockMovement.id)][-3:] == [
+        ("sale", -3), ("return", 2), ("return", 1),
+    ]
+
+
+def test_concurrent_reserves_never_oversell(client, db):
+    item = add_stock(db, "RES-5", 5)
+    item_id = item.id
+
+    def reserve(_):
+        with SessionLocal() as session:
+            try:
+                reserve_stock(session, item_id, 1)
+                return True
+            except HTTPException as e:
+                assert e.status_code == 409
+                return False
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(reserve, range(20)))
+    assert results.count(True) == 5
+    assert quantity_of(db, item) == 0
+
+
+@pytest.fixture
+def lots(db):
+    """Lots of one item: {days until expiry (None: no expiry date): stock item}."""
+    today = datetime.combine(get_current_cambodia_time().date(), datetime.min.time())
+    return {
+        days: add_stock(db, f"LOT{days}", quantity, item_name="Medicine",
+                        expiry_date=None if days is None else today + timedelta(days=days))
+        for days, quantity in ((40, 5), (10, 3), (-2, 50), (20, 4), (None, 100))
+    }
+
+
+def allocate(client, quantity: int):
+    return client.post("/api/stock/stocks/allocate", json={"item_name": "Medicine", "quantity": quantity})
+
+
+def test_allocation_takes_lots_expiring_first(client, db, lots):
+    response = allocate(client, 6)
+    assert response.status_code == 200, response.text
+    assert [(line["item_id"], line["quantity"], line["quantity_in_stock"]) for line in response.json()["allocations"]] == [
+        ("LOT10", 3, 0), ("LOT20", 3, 1),
+    ]
+    # Plain dates, like every other stock response
+    assert response.json()["allocations"][0]["expiry_date"] == lots[10].expiry_date.date().isoformat()
+
+
+def test_allocation_skips_expired_lots_and_takes_undated_lots_last(client, db, lots):
+    response = allocate(client, 20)
+    assert response.status_code == 200, response.text
+    assert [(line["item_id"], line["quantity"]) for line in response.json()["allocations"]] == [
+        ("LOT10", 3), ("LOT20", 4), ("LOT40", 5), ("LOTNone", 8),
+    ]
+    assert response.json()["allocations"][-1]["expiry_date"] is None
+    assert quantity_of(db, lots[-2]) == 50
+
+
+def test_allocation_beyond_unexpired_stock_is_rejected(client, db, lots):
+    # 112 units are unexpired; the 50 expired ones don't count
+    response = allocate(client, 113)
+    assert response.status_code == 409, response.text
+    assert {days: quantity_of(db, item) for days, item in lots.items()} == {40: 5, 10: 3, -2: 50, 20: 4, None: 100}
+
+    assert allocate(client, 112).status_code == 200
+    assert allocate(client, 1).status_code == 409
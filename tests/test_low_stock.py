@@ -0,0 +1,55 @@
+# tests/test_low_stock.py
+
+import pytest
+
+from app.api.inventory.low_stock import LowStockScanner
+from app.db.models.inventory import LowStockAlert, StockItem
+
+
+@pytest.fixture
+def stock(db):
+    items = {
+        item_id: StockItem(itemId=item_id, item_name=item_id, category_id=1, unit_id=1, supplier_id=1, stock_status_id=1,
+                           quantity_in_stock=quantity, restock_level=3)
+        for item_id, quantity in (("LOW", 1), ("OK", 10))
+    }
+    db.add_all(items.values())
+    db.commit()
+    return items
+
+
+def set_quantity(db, item: StockItem, quantity: int):
+    item.quantity_in_stock = quantity
+    db.commit()
+
+
+def reported(db, scanner: LowStockScanner) -> list:
+    return [row.itemId for row in scanner.scan(db)]
+
+
+def test_reported_items_stay_reported_across_restarts(db, stock):
+    assert reported(db, LowStockScanner()) == ["LOW"]
+    # A new process (or another worker) starts with a full scan and knows LOW was reported
+    assert reported(db, LowStockScanner()) == []
+
+
+def test_items_are_reported_again_after_recovering(db, stock):
+    scanner = LowStockScanner()
+    assert reported(db, scanner) == ["LOW"]
+
+    set_quantity(db, stock["OK"], 2)
+    assert reported(db, scanner) == ["OK"]
+    assert reported(db, LowStockScanner()) == []
+
+    set_quantity(db, stock["LOW"], 8)
+    assert reported(db, scanner) == []
+    set_quantity(db, stock["LOW"], 0)
+    assert reported(db, scanner) == ["LOW"]
+
+
+def test_full_scan_forgets_deleted_items(db, stock):
+    assert reported(db, LowStockScanner()) == ["LOW"]
+    db.delete(stock["LOW"])
+    db.commit()
+    assert reported(db, LowStockScanner()) == []
+    assert db.query(LowStockAlert).count() == 0
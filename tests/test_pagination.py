@@ -0,0 +1,73 @@
+# tests/test_pagination.py
+
+import pytest
+
+from app.db.models.catalog import ProductCatalogView
+
+SEARCH_URL = "/api/products/products/search/"
+
+RATINGS = {1: 2.0, 2: None, 3: None, 4: 4.0, 5: 4.0, 6: 5.0, 7: None}
+
+
+@pytest.fixture
+def rated_products(db):
+    db.add_all(
+        ProductCatalogView(id=product_id, productcode=f"P{product_id}", title=f"Product {product_id}", price=10.0, rating=rating)
+        for product_id, rating in RATINGS.items()
+    )
+    db.commit()
+
+
+def fetch_all_pages(client, params: dict) -> list:
+    ids, cursor = [], None
+    while True:
+        response = client.get(SEARCH_URL, params={**params, "fields": "id", **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200, response.text
+        ids += [product["id"] for product in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return ids
+
+
+@pytest.mark.parametrize("sort_order", ["asc", "desc"])
+def test_pages_cross_null_sort_keys(client, rated_products, sort_order):
+    rated = sorted((rating, product_id) for product_id, rating in RATINGS.items() if rating is not None)
+    if sort_order == "desc":
+        rated.reverse()
+    # NULL ratings come last in both directions, in id order of the direction
+    unrated = sorted((product_id for product_id, rating in RATINGS.items() if rating is None), reverse=sort_order == "desc")
+    expected = [product_id for _, product_id in rated] + unrated
+
+    for limit in (1, 2, 3):
+        assert fetch_all_pages(client, {"sort_by": "rating", "sort_order": sort_order, "limit": limit}) == expected
+
+
+PRICED = {
+    1: (20.0, None), 2: (20.0, 3.0), 3: (20.0, None), 4: (10.0, 1.0), 5: (None, 2.0),
+    6: (20.0, 1.0), 7: (None, None), 8: (10.0, None), 9: (None, 2.0),
+}
+
+
+def _sort_key(value, descending: bool):
+    # NULLS LAST in either direction
+    return (value is None, 0 if value is None else (-value if descending else value))
+
+
+@pytest.mark.parametrize("sort", ["-price,rating", "price,-rating", "rating,-price"])
+def test_multi_key_sort_pages_cross_nulls(client, db, sort):
+    db.add_all(
+        ProductCatalogView(id=product_id, productcode=f"P{product_id}", title=f"Product {product_id}", price=price, rating=rating)
+        for product_id, (price, rating) in PRICED.items()
+    )
+    db.commit()
+
+    keys = [(key.lstrip("-"), key.startswith("-")) for key in sort.split(",")]
+    tiebreak_descending = keys[-1][1]
+    expected = sorted(PRICED, key=lambda product_id: (
+        *[_sort_key(PRICED[product_id][0 if name == "price" else 1], descending) for name, descending in keys],
+        -product_id if tiebreak_descending else product_id,
+    ))
+
+    assert fetch_all_pages(client, {"sort": sort}) == expected
+    for limit in (1, 2, 4):
+        assert fetch_all_pages(client, {"sort": sort, "limit": limit}) == expected
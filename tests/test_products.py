@@ -0,0 +1,248 @@
+# tests/test_products.py
+
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, update
+
+from app.api.products.autocomplete import ProductAutocompleteIndex, autocomplete_index
+from app.api.products.cache import product_cache
+from app.api.products.catalog import refresh_catalog_for_stock_items
+from app.api.products.controllers import get_product_version, get_products_batch, get_single_product, upsert_product_batch
+from app.db.config import SessionLocal, engine
+from app.db.models.catalog import ProductCatalogView
+from app.db.models.inventory import StockItem
+from app.db.models.product import Product
+from app.db.replicas import ReplicaSet
+from app.schemas.inventory import StockItemUpdate
+from app.schemas.product import ProductCreate
+from app.utility.utc import get_current_cambodia_time
+
+
+@pytest.fixture
+def stock_item(db):
+    db.add(StockItem(itemId="STOCK-1", item_name="Stock 1", category_id=1, unit_id=1, supplier_id=1, stock_status_id=1))
+    db.commit()
+    return "STOCK-1"
+
+
+def product_rows(count: int, title: str = "Widget") -> list:
+    return [
+        ProductCreate(
+            productcode=f"CODE-{i}", title=f"{title} {i}", price=10.0, description="", brand_id=1, model_id=1,
+            color_id=1, category_id=1, warranty="1y", status_id=1, image="", stockItemId="STOCK-1",
+        )
+        for i in range(count)
+    ]
+
+
+def test_import_batch_queries_do_not_grow_with_rows(db, stock_item, statements):
+    # Warm the lookup tables so both runs start from the same state
+    upsert_product_batch(db, product_rows(1))
+    statements.clear()
+    upsert_product_batch(db, product_rows(2))
+    small = len(statements)
+    statements.clear()
+
+    assert upsert_product_batch(db, product_rows(20, title="Gadget")) == {"inserted": 18, "updated": 2}
+    assert len(statements) == small
+    assert [suggestion["id"] for suggestion in autocomplete_index.search("gadget", limit=50)]
+    assert {suggestion["brand_name"] for suggestion in autocomplete_index.search("gadget", limit=50)} == {"brands 1"}
+
+
+def test_bulk_update_queries_do_not_grow_with_rows(client, db, stock_item, statements):
+    upsert_product_batch(db, product_rows(20))
+    ids = [suggestion["id"] for suggestion in autocomplete_index.search("widget", limit=50)]
+
+    def bulk_update(product_ids, title):
+        statements.clear()
+        response = client.patch("/api/products/products/bulk", json={"items": [
+            {"id": product_id, "patch": {"title": f"{title} {product_id}"}} for product_id in product_ids
+        ]})
+        assert response.status_code == 200, response.text
+        return len(statements)
+
+    bulk_update(ids[:1], "Warmup")
+    small = bulk_update(ids[:2], "Sprocket")
+    # Two patches -> two UPDATEs; twenty patches -> twenty, and nothing else per row
+    assert bulk_update(ids, "Gizmo") - small == len(ids) - 2
+    assert len(autocomplete_index.search("gizmo", limit=50)) == len(ids)
+
+
+@pytest.fixture
+def product_id(db, stock_item):
+    upsert_product_batch(db, product_rows(1))
+    return db.query(Product.id).scalar()
+
+
+@pytest.fixture
+def lagging_replica(tmp_path, product_id):
+    """A replica holding a copy of the primary taken now, which later writes don't reach."""
+    primary = sqlite3.connect(engine.url.database)
+    replica = sqlite3.connect(tmp_path / "replica.db")
+    primary.backup(replica)
+    primary.close()
+    replica.close()
+    replica_engine = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    yield ReplicaSet([replica_engine])
+    replica_engine.dispose()
+
+
+@pytest.mark.parametrize("read", [get_single_product, lambda db, product_id: get_products_batch(db, [product_id]).items[0]])
+def test_replica_reads_do_not_refill_cache(client, product_id, lagging_replica, read):
+    # The write lands on the primary and invalidates the cache; the replica hasn't caught up yet
+    response = client.patch("/api/products/products/bulk", json={"ids": [product_id], "patch": {"title": "Renamed"}})
+    assert response.status_code == 200, response.text
+
+    with SessionLocal(replicas=lagging_replica, use_replica=True) as replica_db:
+        assert read(replica_db, product_id).title == "Widget 0"
+    with SessionLocal() as primary_db:
+        version = get_product_version(primary_db, product_id)
+    assert product_cache.get(product_id, version) is None
+
+    with SessionLocal() as primary_db:
+        assert read(primary_db, product_id).title == "Renamed"
+    assert product_cache.get(product_id, version).title == "Renamed"
+
+
+def test_writes_by_another_worker_bypass_the_cache(client, db, product_id):
+    url = f"/api/products/products/{product_id}"
+    first = client.get(url)
+    assert first.status_code == 200, first.text
+    assert client.get(url).json() == first.json()
+
+    # Another worker renames the product and sells stock; this worker's cache is never invalidated
+    product = db.get(Product, product_id)
+    product.title = "Renamed elsewhere"
+    product.updated_at = datetime.now()
+    stock = db.query(StockItem).filter(StockItem.itemId == product.stock_item_id).one()
+    stock.quantity_in_stock = 42
+    db.commit()
+
+    second = client.get(url)
+    assert second.status_code == 200, second.text
+    assert second.json()["title"] == "Renamed elsewhere"
+    assert second.json()["stockItem"]["quantityInStock"] == 42
+    assert second.headers["ETag"] != first.headers["ETag"]
+
+    # The new body is cached under the new version and revalidates against the new ETag
+    assert client.get(url).json() == second.json()
+    assert client.get(url, headers={"If-None-Match": second.headers["ETag"]}).status_code == 304
+
+
+def test_autocomplete_picks_up_writes_by_another_worker(client, db, product_id, monkeypatch):
+    monkeypatch.setattr("app.api.products.autocomplete.AUTOCOMPLETE_VERSION_CHECK_INTERVAL", 0)
+    rebuilds = []
+    build = autocomplete_index.build
+    monkeypatch.setattr(autocomplete_index, "build", lambda db: rebuilds.append(1) or build(db))
+
+    def suggest(q):
+        response = client.get("/api/products/autocomplete", params={"q": q})
+        assert response.status_code == 200, response.text
+        return [suggestion["title"] for suggestion in response.json()]
+
+    # This worker's own writes are already in its copy and don't trigger a rebuild
+    assert suggest("widget") == ["Widget 0"]
+    assert rebuilds == []
+
+    # Another worker renames the product and updates its own copy of the index
+    product = db.get(Product, product_id)
+    product.title = "Sprocket 0"
+    db.commit()
+    ProductAutocompleteIndex().upsert_products([(product_id, "Sprocket 0", product.productcode, None)])
+
+    assert suggest("sprocket") == ["Sprocket 0"]
+    assert suggest("widget") == []
+    assert rebuilds == [1]
+
+
+@pytest.fixture(params=["product", "collection"])
+def product_url(request, product_id):
+    return f"/api/products/products/{product_id}" if request.param == "product" else "/api/products/products/"
+
+
+def rename(client, product_id: int, title: str):
+    response = client.put(f"/api/products/products/{product_id}", json={"title": title})
+    assert response.status_code == 200, response.text
+
+
+def test_if_none_match_revalidates_until_a_write(client, product_id, product_url):
+    first = client.get(product_url)
+    assert first.status_code == 200, first.text
+
+    cached = client.get(product_url, headers={"If-None-Match": first.headers["ETag"]})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["ETag"] == first.headers["ETag"]
+
+    rename(client, product_id, "Renamed")
+    second = client.get(product_url, headers={"If-None-Match": first.headers["ETag"]})
+    assert second.status_code == 200, second.text
+    assert second.headers["ETag"] != first.headers["ETag"]
+    assert "Renamed" in second.text
+
+
+def test_if_modified_since_revalidates_until_a_write(client, db, product_id, product_url):
+    # Last-Modified has one-second resolution, so start from rows written an hour ago
+    an_hour_ago = get_current_cambodia_time().replace(tzinfo=None) - timedelta(hours=1)
+    db.execute(update(Product).values(updated_at=an_hour_ago))
+    db.execute(update(StockItem).values(updated_at=an_hour_ago))
+    db.commit()
+
+    first = client.get(product_url)
+    assert first.status_code == 200, first.text
+    cached = client.get(product_url, headers={"If-Modified-Since": first.headers["Last-Modified"]})
+    assert cached.status_code == 304
+    assert cached.headers["ETag"] == first.headers["ETag"]
+
+    rename(client, product_id, "Renamed")
+    second = client.get(product_url, headers={"If-Modified-Since": first.headers["Last-Modified"]})
+    assert second.status_code == 200, second.text
+    assert second.headers["ETag"] != first.headers["ETag"]
+    assert second.headers["Last-Modified"] != first.headers["Last-Modified"]
+    assert "Renamed" in second.text
+
+
+def catalog_row(db, product_id: int) -> ProductCatalogView:
+    db.expire_all()
+    return db.get(ProductCatalogView, product_id)
+
+
+def test_product_update_reaches_catalog(client, db, product_id):
+    rename(client, product_id, "Sprocket")
+
+    assert catalog_row(db, product_id).title == "Sprocket"
+    response = client.get("/api/products/products/search/", params={"title": "Sprocket"})
+    assert response.status_code == 200, response.text
+    assert [product["id"] for product in response.json()] == [product_id]
+
+
+def test_stock_quantity_change_reaches_catalog(client, db, product_id):
+    stock = db.query(StockItem).filter(StockItem.itemId == "STOCK-1").one()
+    # Every StockItemUpdate field is required, so send the others unchanged
+    body = {column: getattr(stock, column) for column in StockItemUpdate.model_fields if column not in ("purchase_date", "expiry_date")}
+    body.update(purchase_date="2026-01-01T00:00:00", expiry_date=None, quantity_in_stock=7)
+    response = client.put(f"/api/stock/stocks/{stock.id}", json=body)
+    assert response.status_code == 200, response.text
+    assert catalog_row(db, product_id).stock_quantity_in_stock == 7
+
+    # Reserving only copies the new quantity across, without a full refresh
+    response = client.post(f"/api/stock/stocks/{stock.id}/reserve", json={"quantity": 2})
+    assert response.status_code == 200, response.text
+    assert catalog_row(db, product_id).stock_quantity_in_stock == 5
+    assert client.get(f"/api/products/products/{product_id}").json()["stockItem"]["quantityInStock"] == 5
+
+
+def test_stock_item_id_change_reaches_catalog(db, product_id):
+    # The API has no itemId rename; this is the refresh update_stock_item runs for one (old and new itemId)
+    stock = db.query(StockItem).filter(StockItem.itemId == "STOCK-1").one()
+    stock.itemId, stock.item_name = "STOCK-2", "Stock 2"
+    db.get(Product, product_id).stock_item_id = "STOCK-2"
+    db.flush()
+    refresh_catalog_for_stock_items(db, {"STOCK-1", "STOCK-2"})
+    db.commit()
+
+    row = catalog_row(db, product_id)
+    assert (row.stock_item_id, row.stock_item_name) == ("STOCK-2", "Stock 2")
+    assert db.query(ProductCatalogView).filter(ProductCatalogView.stock_item_id == "STOCK-1").count() == 0
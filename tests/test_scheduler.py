@@ -0,0 +1,65 @@
+# tests/test_scheduler.py
+
+from datetime import timedelta
+
+import pytest
+
+from app.utility import scheduler
+
+
+@pytest.fixture
+def as_process(monkeypatch):
+    """Switch the lease owner identity, as if the code ran in another worker."""
+    def switch(owner: str):
+        monkeypatch.setattr(scheduler, "_owner", lambda: owner)
+    return switch
+
+
+def test_only_one_process_holds_a_task_lease(client, as_process):
+    as_process("host:1")
+    assert scheduler.acquire_lease("digest", 60)
+    as_process("host:2")
+    assert not scheduler.acquire_lease("digest", 60)
+    # Other tasks have their own leases
+    assert scheduler.acquire_lease("snapshots", 60)
+    as_process("host:1")
+    assert scheduler.acquire_lease("digest", 60)
+
+
+def test_expired_lease_passes_to_another_process(client, as_process, monkeypatch):
+    as_process("host:1")
+    assert scheduler.acquire_lease("digest", 60)
+
+    later = scheduler._now() + timedelta(seconds=61)
+    monkeypatch.setattr(scheduler, "_now", lambda: later)
+    as_process("host:2")
+    assert scheduler.acquire_lease("digest", 60)
+    as_process("host:1")
+    assert not scheduler.acquire_lease("digest", 60)
+
+
+def test_released_lease_is_free_at_once(client, as_process):
+    as_process("host:1")
+    assert scheduler.acquire_lease("digest", 60)
+    scheduler.release_leases()
+    as_process("host:2")
+    assert scheduler.acquire_lease("digest", 60)
+
+
+def test_task_runs_only_in_the_lease_holder(client, as_process, monkeypatch):
+    runs = []
+    task = scheduler.PeriodicTask("digest", 60, lambda: runs.append(scheduler._owner()))
+
+    def run_once():
+        # One pass of the schedule loop: the first wait times out, the second one stops it
+        waits = iter([False, True])
+        monkeypatch.setattr(task._stop, "wait", lambda timeout: next(waits))
+        task._run()
+
+    as_process("host:2")
+    run_once()
+    as_process("host:1")
+    run_once()
+    as_process("host:2")
+    run_once()
+    assert runs == ["host:2", "host:2"]